@@ -127,7 +127,7 @@ class HandleActivateResourceRequestInterval(ScheduledTask):
 
                 # Sends the message to destination
                 await self.client_message_processor.send_message(session.get_server_connnection(),
-                                                                 message.get_message())
+                                                                 message)
 
                 # Assign the new session to the interval.
                 interval.session = session.get_key()
@@ -416,9 +416,12 @@ class HandleAskResponseMessage(ScheduledTask):
     async def _run_specific(self):
         try:
             self.get_template_container()
-            auctions = self.auction_manager.parse_ipap_message(self.message, self.template_container)
+            # records and templates decoded are released together when the message is parsed.
+            with self.message as message:
+                auctions = self.auction_manager.parse_ipap_message(message, self.template_container)
+                domain = message.get_domain()
             max_interval = self.create_auctions(auctions)
-            self.create_process_request(auctions, max_interval, self.message.get_domain())
+            self.create_process_request(auctions, max_interval, domain)
             self.auction_manager.increment_references(auctions, self.server_connection.get_auction_session().get_key())
             self.server_connection.get_auction_session().set_auctions(auctions)
         except Exception as e:
@@ -617,7 +620,7 @@ class HandledAddGenerateBiddingObject(ScheduledTask):
             ipap_message.set_seqno(session.get_next_message_id())
             ipap_message.set_ack_seq_no(0)
             session.add_pending_message(ipap_message)
-            await self.message_processor.send_message(session.get_server_connnection(), ipap_message.get_message())
+            await self.message_processor.send_message(session.get_server_connnection(), ipap_message)
 
             for bidding_object in self.bidding_objects:
                 self.logger.info("after sending bidding object: {0}".format(bidding_object.get_key()))
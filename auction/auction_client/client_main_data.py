@@ -22,3 +22,9 @@ class ClientMainData(metaclass=Singleton):
                                 Config().get_config_param('Main','DefaultDestinationPort'))
         self.protocol = ParseFormats.parse_uint8( Config().get_config_param('Main','DefaultProtocol'))
         self.life_time = ParseFormats.parse_uint8( Config().get_config_param('Main','LifeTime'))
+
+        # Binary frames carry the ipap message as it is. Text framing is kept for peers running older versions.
+        try:
+            self.use_binary_frames = ParseFormats.parse_bool(Config().get_config_param('Main', 'UseBinaryFrames'))
+        except ValueError:
+            self.use_binary_frames = False
@@ -29,7 +29,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
     def __init__(self, app=None):
 
         self.client_data = ClientMainData()
-        super(ClientMessageProcessor, self).__init__(self.client_data.domain)
+        super(ClientMessageProcessor, self).__init__(self.client_data.domain, self.client_data.use_binary_frames)
         self.app = app
         self.auction_session_manager = AuctionSessionManager()
         self.logger = log().get_logger()
@@ -116,9 +116,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
         message = self.build_syn_message(seq_nbr)
 
-        str_msg = message.get_message()
-
-        await self.send_message(server_connection, str_msg)
+        await self.send_message(server_connection, message)
         server_connection.set_state(ServerConnectionState.SYN_SENT)
         session.add_pending_message(message)
         session.set_server_connection(server_connection)
@@ -167,8 +165,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
                 # send the ack message establishing the session.
                 syn_ack_message = self.build_ack_message(server_connection.get_auction_session().get_next_message_id(),
                                                          ipap_message.get_seqno())
-                msg = syn_ack_message.get_message()
-                await self.send_message(server_connection, msg)
+                await self.send_message(server_connection, syn_ack_message)
 
                 # puts the connection as established.
                 server_connection.set_state(ServerConnectionState.ESTABLISHED)
@@ -216,7 +213,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
                                              ipap_message.get_seqno())
 
             print('message ack disconnect id:', message.get_seqno())
-            await self.send_message(server_connection, message.get_message())
+            await self.send_message(server_connection, message)
 
             self.logger.debug("disconnecting - before putting close_wait ")
             # server_connection.set_state(ServerConnectionState.CLOSE_WAIT)
@@ -231,7 +228,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
             message = self.build_fin_message(server_connection.get_auction_session().get_next_message_id(), 0)
             server_connection.get_auction_session().add_pending_message(message)
             print('message fin message id:', message.get_seqno())
-            await self.send_message(server_connection, message.get_message())
+            await self.send_message(server_connection, message)
 
             self.logger.debug("disconnecting - after sending fin message ")
 
@@ -247,7 +244,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
                                              ipap_message.get_seqno())
 
             print('message fin wait ack id:', message.get_seqno())
-            await self.send_message(server_connection, message.get_message())
+            await self.send_message(server_connection, message)
 
             await self._disconnect_socket(server_connection)
             self.auction_session_manager.del_session(server_connection.get_auction_session().get_key())
@@ -289,12 +286,12 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
         self.logger.debug('End method handle_ack -new state: {0}'.format(str(server_connection.get_state())))
 
-    async def process_message(self, server_connection: ServerConnection, msg: str):
+    async def process_message(self, server_connection: ServerConnection, msg):
         """
         Processes a message arriving from an agent.
 
         :param server_connection: websocket and aiohttp session created for the connection
-        :param msg: message received
+        :param msg: message received, str for text frames and bytes for binary frames
         """
         try:
 
@@ -339,7 +336,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
             message = self.build_fin_message(session.get_next_message_id(), 0)
 
             session.add_pending_message(message)
-            await self.send_message(session.server_connection, message.get_message())
+            await self.send_message(session.server_connection, message)
 
             session.server_connection.set_state(ServerConnectionState.FIN_WAIT_1)
 
@@ -349,7 +346,7 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
         self.logger.debug('Ending disconnect')
 
-    async def send_message(self, server_connection: ServerConnection, message: str):
+    async def send_message(self, server_connection: ServerConnection, message: IpapMessage):
         """
         Sends the message for an agent
 
@@ -358,7 +355,11 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
         """
         self.logger.debug("start method send message")
 
-        await server_connection.web_socket.send_str(message)
+        frame = self.get_frame(message)
+        if isinstance(frame, bytes):
+            await server_connection.web_socket.send_bytes(frame)
+        else:
+            await server_connection.web_socket.send_str(frame)
 
         self.logger.debug("end method send message")
 
@@ -404,7 +405,10 @@ class ClientMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
         """
         try:
             async for msg in server_connection.web_socket:
-                if msg.type == WSMsgType.TEXT:
+                if msg.type == WSMsgType.BINARY:
+                    await self.process_message(server_connection, msg.data)
+
+                elif msg.type == WSMsgType.TEXT:
                     await self.process_message(server_connection, msg.data)
 
                 elif msg.type == WSMsgType.CLOSED:
@@ -84,20 +84,38 @@ class IpapResourceRequestParser(IpapMessageParser):
         gets the ipap_message that represents an specifc resource request.
         :return:
         """
+        return self.get_ipap_message_requests(start, [resource_request], resource_id, use_ipv6,
+                                              ip_address4, ip_address6, port)
 
+    def get_ipap_message_requests(self, start: datetime, resource_requests: list, resource_id: str,
+                                  use_ipv6: bool, ip_address4: str, ip_address6: str, port: int) -> IpapMessage:
+        """
+        gets the ipap_message that represents several resource requests, one option record per request.
+
+        :param start: start time of the request intervals to include
+        :param resource_requests: resource requests to include
+        :param resource_id: resource being requested
+        :param use_ipv6: whether or not the ipv6 address is used
+        :param ip_address4: ipv4 address of the client
+        :param ip_address6: ipv6 address of the client
+        :param port: port of the client
+        :return: the message, None when the template could not be created.
+        """
         message = IpapMessage(domain_id=self.domain, ipap_version=IpapMessage.IPAP_VERSION, _encode_network=True)
-        interval = resource_request.get_interval_by_start_time(start)
         template_id = self._add_fields_option_template(message)
 
         if template_id < 0:
             self.logger.error("error creating the template")
             return None
 
-        # Build the recordId as the resourceRequestSet + resourceRequestName
-        record_id = resource_request.get_key()
+        for resource_request in resource_requests:
+            interval = resource_request.get_interval_by_start_time(start)
+
+            # Build the recordId as the resourceRequestSet + resourceRequestName
+            record_id = resource_request.get_key()
 
-        self._add_option_record(record_id, resource_id, interval, use_ipv6, ip_address4,
-                                ip_address6, port, template_id, message)
+            self._add_option_record(record_id, resource_id, interval, use_ipv6, ip_address4,
+                                    ip_address6, port, template_id, message)
 
         # fill the char buffer to send
         message.output()
@@ -1,5 +1,6 @@
 from foundation.auction import Auction
 from foundation.bidding_object import BiddingObject
+from foundation.bid_book import BidBook
 from foundation.auction_process_object import AuctionProcessObject
 from foundation.config import Config
 from foundation.ipap_message_parser import IpapMessageParser
@@ -12,12 +13,20 @@ from foundation.config_param import ConfigParam
 from foundation.config_param import DataType
 from foundation.singleton import Singleton
 from foundation.field_value import FieldValue
+from foundation.random_stream import RandomStream
+
+from auction_server.execution_pool import ExecutionPool
+from auction_server.execution_pool import take_snapshot
+from auction_server.execution_pool import execute_snapshot
 
 
 from datetime import datetime
 from enum import Enum
-from typing import List
 from copy import deepcopy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 
 from python_wrapper.ipap_message import IpapMessage
 from python_wrapper.ipap_field_key import IpapFieldKey
@@ -36,30 +45,48 @@ class AgentFieldSet(Enum):
     REQUEST_FIELD_SET_NAME = 1
 
 
+class PeriodRecord:
+    """
+    Auction period executed, with the snapshot of the parameters and bids given to the module.
+    """
+
+    def __init__(self, start: datetime, stop: datetime, snapshot: tuple):
+        self.start = start
+        self.stop = stop
+        self.snapshot = snapshot
+
+
 class AuctionProcess(AuctionProcessObject):
     """
     This object represents an auction which is going to be executed. It Contains the auction definition,
-    its parameters and participating bidding objects.
+    its parameters and participating bidding objects, whose elements are also kept in a bid book. Parameters are
+    compiled by the module when it is initialized, and compiled again only when they change.
+    Every period is executed with a random stream derived from the seed of the process, and the last periods
+    executed can be recorded to replay them. Bids are inserted and deleted holding the lock of the process, so the
+    snapshot of a period can be taken out of the event loop.
     """
 
-    def __init__(self, key: str, module: Module, auction: Auction, config_dict: dict):
+    def __init__(self, key: str, module: Module, auction: Auction, config_dict: dict, seed: int = 0,
+                 recorded_periods: int = 0):
         """
         Creates the auction process.
         :param key: unique key to identify the auction process
         :param module: module used to execute the auction
         :param auction: auction that is going to be executed
         :param config_dict: parameters
+        :param seed: seed of the random streams
+        :param recorded_periods: number of periods kept to replay them
         """
         super(AuctionProcess, self).__init__(key, module)
         self.auction = auction
         self.bids = {}
+        self.bid_book = BidBook()
         self.config_params = {}
-
-        for config_param_name in config_dict:
-            config_param = config_dict[config_param_name]
-            field_value = FieldValue()
-            field_value.parse_field_value_from_config_param(config_param)
-            self.config_params[config_param_name] = field_value
+        self.params = None
+        self.seed = seed
+        self.recorded_periods = deque(maxlen=recorded_periods)
+        self.lock = threading.Lock()
+        self.set_config_params(config_dict)
 
     def insert_bid(self, bid: BiddingObject):
         """
@@ -68,10 +95,22 @@ class AuctionProcess(AuctionProcessObject):
         :param bid: bid to insert/.
         :return:
         """
-        if bid.get_key() not in self.bids:
-            self.bids[bid.get_key()] = bid
-        else:
-            raise ValueError("Bid is already inserted in the AuctionProcess")
+        with self.lock:
+            if bid.get_key() not in self.bids:
+                self.bids[bid.get_key()] = bid
+                self.bid_book.insert(bid, bid.get_state() == AuctioningObjectState.ACTIVE)
+            else:
+                raise ValueError("Bid is already inserted in the AuctionProcess")
+
+    def delete_bid(self, bid_key: str):
+        """
+        Deletes a bidding object of type bid from the auction process.
+
+        :param bid_key: key of the bid to delete.
+        """
+        with self.lock:
+            self.bids.pop(bid_key, None)
+            self.bid_book.remove(bid_key)
 
     def get_module(self) -> Module:
         """
@@ -88,6 +127,33 @@ class AuctionProcess(AuctionProcessObject):
         """
         return self.config_params
 
+    def set_config_params(self, config_dict: dict):
+        """
+        Sets the config params, the parameters compiled are discarded.
+        :param config_dict: parameters
+        """
+        self.config_params = {}
+        self.params = None
+        for config_param_name in config_dict:
+            config_param = config_dict[config_param_name]
+            field_value = FieldValue()
+            field_value.parse_field_value_from_config_param(config_param)
+            self.config_params[config_param_name] = field_value
+
+    def set_params(self, params):
+        """
+        Sets the parameters compiled by the module for the config params
+        :param params: parameters compiled, None when the module does not compile them.
+        """
+        self.params = params
+
+    def get_params(self):
+        """
+        Gets the parameters given to the module to execute the auction
+        :return: parameters compiled, or the config params when they are not.
+        """
+        return self.params if self.params is not None else self.config_params
+
     def get_bids(self) -> dict:
         """
         Gets the bids registered in the action process
@@ -95,6 +161,49 @@ class AuctionProcess(AuctionProcessObject):
         """
         return self.bids
 
+    def get_bid_book(self) -> BidBook:
+        """
+        Gets the bid book with the elements of the bids registered in the action process
+        :return: bid book
+        """
+        return self.bid_book
+
+    def get_random_stream(self, start: datetime) -> RandomStream:
+        """
+        Gets the random stream of a period
+        :param start: period start
+        :return: random stream
+        """
+        return RandomStream(self.seed, self.key, start)
+
+    def is_recording(self) -> bool:
+        """
+        Checks whether or not periods are recorded
+        :return: True if periods are recorded
+        """
+        return self.recorded_periods.maxlen > 0
+
+    def record_period(self, start: datetime, stop: datetime, snapshot: tuple):
+        """
+        Records a period executed, the oldest period is discarded when there are too many.
+        :param start: period start
+        :param stop: period stop
+        :param snapshot: parameters and bids given to the module
+        """
+        self.recorded_periods.append(PeriodRecord(start, stop, snapshot))
+
+    def get_recorded_period(self, start: datetime) -> PeriodRecord:
+        """
+        Gets a period recorded
+        :param start: period start
+        :return: period record
+        """
+        for period_record in self.recorded_periods:
+            if period_record.start == start:
+                return period_record
+        raise ValueError("period starting at {0} was not recorded for auction process {1}".format(
+            str(start), self.key))
+
 
 class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
     """
@@ -111,6 +220,19 @@ class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
         self.field_sets = {}
         self.logger = log().get_logger()
         self.field_def_manager = FieldDefManager()
+        self.module_loader = None
+        self.execution_pool = None
+        self.executor = None
+
+        try:
+            self.seed = int(Config().get_config_param('AUMProcessor', 'RandomSeed'))
+        except ValueError:
+            self.seed = 0
+
+        try:
+            self.recorded_periods = int(Config().get_config_param('AUMProcessor', 'RecordedPeriods'))
+        except ValueError:
+            self.recorded_periods = 0
 
         if not module_directory:
             if 'AUMProcessor' in self.config:
@@ -126,6 +248,7 @@ class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
             if 'Modules' in self.config['AUMProcessor']:
                 modules = self.config['AUMProcessor']['Modules']
                 self.module_loader = ModuleLoader(module_directory, 'AUMProcessor', modules)
+                self.init_execution_pool(module_directory, modules)
             else:
                 ValueError(
                     'Configuration file does not have {0} entry within {1}'.format('Modules', 'AumProcessor'))
@@ -134,6 +257,24 @@ class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
 
         self.build_field_sets()
 
+    def init_execution_pool(self, module_directory: str, modules: str):
+        """
+        Creates the pool of worker processes executing auctions, when a pool size is configured. Without it,
+        auctions are executed one at a time by a thread, out of the event loop.
+
+        :param module_directory: directory with the modules
+        :param modules: modules to preload separated by comma
+        """
+        try:
+            pool_size = int(Config().get_config_param('AUMProcessor', 'ExecutionPoolSize'))
+        except ValueError:
+            pool_size = 0
+
+        if pool_size > 0:
+            self.execution_pool = ExecutionPool(pool_size, str(Config().config_path), module_directory, modules)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+
     def read_misc_data(self, ipap_template: IpapTemplate, ipap_record: IpapDataRecord) -> dict:
         """
         read the data given in the data record
@@ -208,15 +349,40 @@ class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
         if 'domainid' not in config_params:
             config_params['domainid'] = ConfigParam('domainid', DataType.UINT32, str(self.domain))
 
-        action_process = AuctionProcess(key, module, auction, config_params)
-        module.init_module(action_process.get_config_params())
+        action_process = AuctionProcess(key, module, auction, config_params, self.seed, self.recorded_periods)
+        action_process.set_params(module.init_module(action_process.get_config_params()))
         self.auctions[key] = action_process
+
+        if self.execution_pool is not None:
+            self.execution_pool.add_auction(key, module_name, action_process.get_config_params())
         return key
 
-    def execute_auction(self, key: str, start: datetime, end: datetime) -> List[BiddingObject]:
+    def change_auction_params(self, key: str, config_dict: dict):
+        """
+        Changes the parameters of an auction process, they are compiled again by its module. Snapshots carry the
+        parameters, and the module pinned to a worker process is initialized again with them.
+
+        :param key: auction key
+        :param config_dict: parameters as config params by name
+        """
+        if key not in self.auctions:
+            raise ValueError("auction process with index:{0} was not found".format(key))
+
+        action_process = self.auctions[key]
+        config_params = deepcopy(config_dict)
+        if 'domainid' not in config_params:
+            config_params['domainid'] = ConfigParam('domainid', DataType.UINT32, str(self.domain))
+
+        action_process.set_config_params(config_params)
+        action_process.set_params(action_process.get_module().init_module(action_process.get_config_params()))
+
+        if self.execution_pool is not None:
+            self.execution_pool.change_auction(key, action_process.get_config_params())
+
+    def execute_auction(self, key: str, start: datetime, end: datetime) -> list:
         """
         Executes the allocation algorithm for the auction
-        :return:
+        :return: allocations created by the module, to_bidding_object gives the bidding object of every one.
         """
         if key not in self.auctions:
             raise ValueError("auction process with index:{0} was not found".format(key))
@@ -224,25 +390,129 @@ class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
         action_process = self.auctions[key]
         module = action_process.get_module()
 
-        # Sends for auctioning only active bids
+        with action_process.lock:
+            active_bids = self.get_active_bids(action_process)
+        if action_process.is_recording():
+            action_process.record_period(start, end, take_snapshot(action_process.get_params(),
+                                                                   action_process.get_bid_book()))
+
+        allocations = module.execute(action_process.get_params(), key, start, end, active_bids,
+                                     bid_book=action_process.get_bid_book(),
+                                     random_stream=action_process.get_random_stream(start))
+
+        self.increase_execution_periods(action_process)
+        return allocations
+
+    async def dispatch_auction(self, key: str, start: datetime, end: datetime) -> list:
+        """
+        Executes the allocation algorithm for the auction out of the event loop, in the worker process it is
+        pinned to or, without an execution pool, in the executor thread. The module is given a snapshot of the bids,
+        so bids can be received while the auction is executed. In the executor thread the snapshot is taken by the
+        thread too.
+
+        :param key: auction key
+        :param start: start datetime
+        :param end: end datetime
+        :return: allocations created by the module, to_bidding_object gives the bidding object of every one.
+        """
+        if key not in self.auctions:
+            raise ValueError("auction process with index:{0} was not found".format(key))
+
+        action_process = self.auctions[key]
+        random_stream = action_process.get_random_stream(start)
+        if self.execution_pool is not None:
+            snapshot = self.take_period_snapshot(action_process, start, end)
+            allocations = await self.execution_pool.execute(key, start, end, snapshot, random_stream)
+        else:
+            allocations = await asyncio.get_event_loop().run_in_executor(
+                self.executor, self.execute_period, action_process, key, start, end, random_stream)
+
+        self.increase_execution_periods(action_process)
+        return allocations
+
+    def take_period_snapshot(self, action_process: AuctionProcess, start: datetime, end: datetime) -> tuple:
+        """
+        Marks the active bids in the bid book and takes the snapshot of a period, which is recorded when periods are.
+        Bids are not inserted nor deleted meanwhile, so it can be called out of the event loop.
+
+        :param action_process: auction process
+        :param start: start datetime
+        :param end: end datetime
+        :return: snapshot, see take_snapshot
+        """
+        with action_process.lock:
+            self.get_active_bids(action_process)
+            snapshot = take_snapshot(action_process.get_params(), action_process.get_bid_book())
+
+        if action_process.is_recording():
+            action_process.record_period(start, end, snapshot)
+        return snapshot
+
+    def execute_period(self, action_process: AuctionProcess, key: str, start: datetime, end: datetime,
+                       random_stream: RandomStream) -> list:
+        """
+        Takes the snapshot of a period and executes the module with it, it is called in the executor thread.
+
+        :param action_process: auction process
+        :param key: auction key
+        :param start: start datetime
+        :param end: end datetime
+        :param random_stream: random stream of the period
+        :return: allocations created by the module
+        """
+        snapshot = self.take_period_snapshot(action_process, start, end)
+        return execute_snapshot(action_process.get_module(), key, start, end, snapshot, random_stream)
+
+    def replay_period(self, key: str, start: datetime) -> list:
+        """
+        Executes again a period recorded, with the same bids and random stream, so the allocations have the same
+        quantities and prices. Allocations get new keys.
+
+        :param key: auction key
+        :param start: period start
+        :return: allocations created by the module
+        """
+        if key not in self.auctions:
+            raise ValueError("auction process with index:{0} was not found".format(key))
+
+        action_process = self.auctions[key]
+        period_record = action_process.get_recorded_period(start)
+        return execute_snapshot(action_process.get_module(), key, period_record.start, period_record.stop,
+                                period_record.snapshot, action_process.get_random_stream(period_record.start))
+
+    @staticmethod
+    def get_active_bids(action_process: AuctionProcess) -> dict:
+        """
+        Gets the bids sent for auctioning, only active bids are, and marks them in the bid book. Bids are
+        activated after being added to the auction process.
+
+        :param action_process: auction process
+        :return: active bids by key
+        """
+        bid_book = action_process.get_bid_book()
         bids = action_process.get_bids()
         active_bids = {}
         for bidding_object_key in bids:
             bidding_object: BiddingObject = bids[bidding_object_key]
-            if bidding_object.get_state() == AuctioningObjectState.ACTIVE:
+            active = bidding_object.get_state() == AuctioningObjectState.ACTIVE
+            bid_book.set_active(bidding_object_key, active)
+            if active:
                 active_bids[bidding_object_key] = bidding_object
+        return active_bids
 
-        allocations = module.execute(action_process.get_config_params(), key, start, end, active_bids)
+    def increase_execution_periods(self, action_process: AuctionProcess):
+        """
+        Updates the periods executed for the bidding objects of the auction process (include those inactive)
 
-        # Updates the periods executed for the bidding object (include those inactive)
+        :param action_process: auction process
+        """
+        bids = action_process.get_bids()
         for bidding_object_key in bids:
             bidding_object: BiddingObject = bids[bidding_object_key]
             bidding_object.increase_execution_periods()
             self.logger.info("bidding object key: {0} - number of periods:{1}".format(
                 bidding_object.get_key(), str(bidding_object.get_execution_periods())))
 
-        return allocations
-
     def add_bidding_object_to_auction_process(self, key: str, bidding_object: BiddingObject):
         """
         adds a bidding Object to auction process
@@ -283,7 +553,7 @@ class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
             raise ValueError("auction process with index:{0} was not found".format(key))
 
         action_process = self.auctions[key]
-        action_process.bids.pop(bidding_object.get_key(), None)
+        action_process.delete_bid(bidding_object.get_key())
         bidding_object.disassociate_auction_process(key)
 
     def delete_auction_process(self, key: str):
@@ -301,6 +571,19 @@ class AuctionProcessor(IpapMessageParser, metaclass=Singleton):
         if action_process:
             self.module_loader.release_module(action_process.get_module().get_module_name())
 
+        if self.execution_pool is not None:
+            self.execution_pool.remove_auction(key)
+
+    def shutdown_execution_pool(self):
+        """
+        Stops the worker processes or the thread executing auctions.
+        """
+        if self.execution_pool is not None:
+            self.execution_pool.shutdown()
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
     def get_auction_process(self, key: str) -> AuctionProcess:
         """
         Gets the auction process with the key given
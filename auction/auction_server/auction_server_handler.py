@@ -15,6 +15,7 @@ from foundation.field_def_manager import FieldDefManager
 from foundation.bidding_object_manager import BiddingObjectManager
 from foundation.bidding_object import BiddingObject
 from foundation.id_source import IdSource
+from foundation.config import Config
 
 from python_wrapper.ipap_message import IpapMessage
 from python_wrapper.ipap_template_container import IpapTemplateContainerSingleton
@@ -27,14 +28,27 @@ from auction_server.auction_session import AuctionSession
 
 from datetime import datetime
 from datetime import timedelta
+from enum import Enum
 from utils.auction_utils import log
 import copy
 import math
 
 
+class DeadlinePolicy(Enum):
+    """
+    What to do with a period whose auction execution misses its deadline.
+    """
+    SKIP = 'skip'  # the period has no allocations.
+    REUSE = 'reuse'  # the allocations of the previous period are given again.
+    EXTEND = 'extend'  # the execution is waited until it ends.
+
+
 class HandleAuctionExecution(PeriodicTask):
     """
-    Executes an auction in the system
+    Executes an auction in the system. The auction is executed out of the event loop, within a deadline given
+    as a fraction of the auction interval (AUMProcessor.ExecutionDeadline), and periods missing it are handled
+    according to the AUMProcessor.DeadlinePolicy. A period is not executed while the execution of a previous
+    one is still running, it is handled as a period missing its deadline.
     """
 
     def __init__(self, auction: Auction, start: datetime, seconds_to_start: float):
@@ -51,6 +65,88 @@ class HandleAuctionExecution(PeriodicTask):
         self.server_main_data = ServerMainData()
         self.auction_processor = AuctionProcessor(self.server_main_data.domain)
         self.bidding_object_manager = BiddingObjectManager(self.server_main_data.domain)
+        self.last_allocations = []
+        self.missed_deadlines = 0
+        self.execution = None
+
+        try:
+            deadline_fraction = float(Config().get_config_param('AUMProcessor', 'ExecutionDeadline'))
+        except ValueError:
+            deadline_fraction = 1.0
+        self.deadline = self.auction.get_interval().interval * deadline_fraction
+
+        try:
+            self.deadline_policy = DeadlinePolicy(Config().get_config_param('AUMProcessor', 'DeadlinePolicy'))
+        except ValueError:
+            self.deadline_policy = DeadlinePolicy.EXTEND
+
+    def discard_execution(self, execution: asyncio.Future):
+        """
+        Discards the allocations of an execution that missed its deadline, errors are logged.
+
+        :param execution: execution ended
+        """
+        if not execution.cancelled() and execution.exception() is not None:
+            self.logger.error(str(execution.exception()))
+
+    def count_missed_deadline(self, reason: str):
+        """
+        Counts a period missing its deadline, it is logged.
+
+        :param reason: why the period missed it
+        """
+        self.missed_deadlines += 1
+        self.logger.warning("auction {0} {1} - missed deadlines:{2} policy:{3}".format(
+            self.auction.get_key(), reason, str(self.missed_deadlines), self.deadline_policy.value))
+
+    def get_missed_allocations(self, next_start: datetime) -> list:
+        """
+        Gets the allocations of a period without the ones of its execution, according to the deadline policy.
+
+        :param next_start: end of the period
+        :return: allocations of the period
+        """
+        if self.deadline_policy == DeadlinePolicy.REUSE:
+            return [allocation.copy_for_period(self.start_datetime, next_start)
+                    for allocation in self.last_allocations]
+        return []
+
+    async def handle_missed_deadline(self, execution: asyncio.Future, next_start: datetime) -> list:
+        """
+        Gets the allocations of a period whose execution missed the deadline, according to the deadline policy.
+
+        :param execution: execution running
+        :param next_start: end of the period
+        :return: allocations of the period
+        """
+        self.count_missed_deadline("missed the execution deadline of {0} seconds".format(str(self.deadline)))
+
+        if self.deadline_policy == DeadlinePolicy.EXTEND:
+            return await execution
+
+        # The execution can not be interrupted, it ends in its executor.
+        execution.add_done_callback(self.discard_execution)
+        return self.get_missed_allocations(next_start)
+
+    async def execute_period(self, next_start: datetime) -> list:
+        """
+        Executes the auction for the period, unless the execution of a previous period is still running: the
+        executor is busy with it, so the period is not executed and gets the allocations of the deadline policy.
+
+        :param next_start: end of the period
+        :return: allocations of the period
+        """
+        if self.execution is not None and not self.execution.done():
+            self.count_missed_deadline("is still executing a previous period")
+            return self.get_missed_allocations(next_start)
+
+        # Executes the algorithm, messages are processed while the auction is executed.
+        self.execution = asyncio.ensure_future(self.auction_processor.dispatch_auction(
+            self.auction.get_key(), self.start_datetime, next_start))
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.execution), self.deadline)
+        except asyncio.TimeoutError:
+            return await self.handle_missed_deadline(self.execution, next_start)
 
     async def _run_specific(self, **kwargs):
         """
@@ -64,13 +160,14 @@ class HandleAuctionExecution(PeriodicTask):
             if next_start > self.auction.get_stop():
                 next_start = self.auction.get_stop()
 
-            # Executes the algorithm
-            bidding_objects = self.auction_processor.execute_auction(self.auction.get_key(),
-                                                                     self.start_datetime, next_start)
+            allocations = await self.execute_period(next_start)
+            self.last_allocations = allocations
 
             # Gets a unique execution id.
             id_process = IdSource(True).new_id()
-            for bidding_object in bidding_objects:
+            for allocation in allocations:
+                # Allocations are created as records by the mechanism, they become bidding objects to be stored.
+                bidding_object = allocation.to_bidding_object()
                 bidding_object.set_process_request_key(str(id_process))
                 await self.bidding_object_manager.add_bidding_object(bidding_object)
 
@@ -301,12 +398,11 @@ class HandleAskRequest(ScheduledTask):
                 message_to_send.set_seqno(self.session.get_next_message_id())
 
                 await self.message_processor.send_message(self.session.get_connection(),
-                                                          message_to_send.get_message())
+                                                          message_to_send)
             else:
-                ack_message = self.message_processor.build_ack_message(self.session.get_next_message_id(),
-                                                                       self.message.get_seqno())
-                await self.message_processor.send_message(self.session.get_connnection(),
-                                                          ack_message.get_message())
+                await self.message_processor.send_ack_message(self.session.get_connection(),
+                                                              self.session.get_next_message_id(),
+                                                              self.message.get_seqno())
         except Exception as e:
             self.logger.error(str(e))
 
@@ -435,8 +531,10 @@ class HandleAddBiddingObjects(ScheduledTask):
         """
         try:
             self.logger.debug("starting HandleAddBiddingObjects")
-            # parse the message
-            bidding_objects = self.bididing_manager.parse_ipap_message(self.ipap_message, self.template_container)
+            # parse the message, records and templates decoded are released together when parsed.
+            seqno = self.ipap_message.get_seqno()
+            with self.ipap_message as ipap_message:
+                bidding_objects = self.bididing_manager.parse_ipap_message(ipap_message, self.template_container)
 
             # insert bidding objects to bidding object manager
             for bidding_object in bidding_objects:
@@ -472,10 +570,9 @@ class HandleAddBiddingObjects(ScheduledTask):
                     i = i + 1
 
             # confirm the message
-            confim_message = self.server_message_processor.build_ack_message(self.session.get_next_message_id(),
-                                                                             self.ipap_message.get_seqno())
-            await self.server_message_processor.send_message(self.session.get_connection(),
-                                                             confim_message.get_message())
+            await self.server_message_processor.send_ack_message(self.session.get_connection(),
+                                                                 self.session.get_next_message_id(),
+                                                                 seqno)
             self.logger.debug("ending HandleAddBiddingObjects")
         except Exception as e:
             self.logger.error(str(e))
@@ -0,0 +1,248 @@
+"""
+Execution of auction modules in worker processes.
+
+Every worker is a process pool of one process, so an auction is pinned to a worker: its module is initialized there
+by init_module when the auction is added and again when its parameters change, and every period the module is
+executed in the same process with the state it keeps. Every period the columns of the bid book are copied, shipped
+to the worker and given to the module in place of the book, bids are only built from them for the modules that
+read them. The allocation records created by the module are returned to be stored by the auction server. Without
+worker processes, snapshots are executed by execute_snapshot in a thread of the auction processor.
+"""
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from foundation.bid_book import BidBook
+from foundation.config import Config
+from foundation.module_loader import ModuleLoader
+from foundation.module import Module
+from foundation.random_stream import RandomStream
+from utils.auction_utils import log
+
+# Module loader and modules of the auctions pinned to the worker process.
+worker_module_loader = None
+worker_auctions = {}
+
+
+def init_worker(config_path: str, module_directory: str, modules: str):
+    """
+    Initializes a worker process, loading the configuration and the modules.
+
+    :param config_path: path of the configuration file
+    :param module_directory: directory with the modules
+    :param modules: modules to preload separated by comma
+    """
+    global worker_module_loader
+    Config(config_path)
+    worker_module_loader = ModuleLoader(module_directory, 'AUMProcessor', modules)
+
+
+def init_auction(auction_key: str, module_name: str, config_params: dict):
+    """
+    Initializes the module of an auction in the worker process.
+
+    :param auction_key: auction key
+    :param module_name: name of the module executing the auction
+    :param config_params: auction parameters
+    """
+    module = worker_module_loader.get_module(module_name)
+    module.init_module(config_params)
+    worker_auctions[auction_key] = module
+
+
+def change_auction_params(auction_key: str, config_params: dict):
+    """
+    Initializes again the module of an auction in the worker process with new parameters.
+
+    :param auction_key: auction key
+    :param config_params: auction parameters
+    """
+    if auction_key not in worker_auctions:
+        raise ValueError("auction process with index:{0} was not initialized in the worker".format(auction_key))
+
+    worker_auctions[auction_key].init_module(config_params)
+
+
+def release_auction(auction_key: str):
+    """
+    Removes an auction from the worker process.
+
+    :param auction_key: auction key
+    """
+    worker_auctions.pop(auction_key, None)
+
+
+def take_snapshot(config_params: dict, bid_book: BidBook) -> tuple:
+    """
+    Takes the parameters and a copy of the columns of the bid book of an auction, so the auction can be executed
+    while bids change. Parameters are not changed by the modules, so they are not copied.
+
+    :param config_params: auction parameters given to the module, compiled or as field values
+    :param bid_book: bid book of the auction process
+    :return: snapshot, the parameters and the columns of the bid book.
+    """
+    return config_params, bid_book.get_columns()
+
+
+def execute_snapshot(module: Module, auction_key: str, start: datetime, stop: datetime, snapshot: tuple,
+                     random_stream: RandomStream = None) -> list:
+    """
+    Executes the module of an auction with the bids of a snapshot.
+
+    :param module: module executing the auction
+    :param auction_key: auction key
+    :param start: start datetime
+    :param stop: stop datetime
+    :param snapshot: auction parameters and columns of the bid book, see take_snapshot
+    :param random_stream: random stream of the period
+    :return: allocation records
+    """
+    config_params, columns = snapshot
+    bids = columns.build_bids() if module.uses_bids() else {}
+    return module.execute(config_params, auction_key, start, stop, bids, bid_book=columns,
+                          random_stream=random_stream)
+
+
+def execute_auction(auction_key: str, start: datetime, stop: datetime, snapshot: tuple,
+                    random_stream: RandomStream = None) -> list:
+    """
+    Executes an auction in the worker process.
+
+    :param auction_key: auction key
+    :param start: start datetime
+    :param stop: stop datetime
+    :param snapshot: auction parameters and columns of the bid book, see take_snapshot
+    :param random_stream: random stream of the period
+    :return: allocation records
+    """
+    if auction_key not in worker_auctions:
+        raise ValueError("auction process with index:{0} was not initialized in the worker".format(auction_key))
+
+    return execute_snapshot(worker_auctions[auction_key], auction_key, start, stop, snapshot, random_stream)
+
+
+class ExecutionPool:
+    """
+    Set of worker processes executing auctions, every auction is pinned to the worker with fewer auctions when
+    it is added.
+
+    Attributes
+    ----------
+    workers: process pools of one process.
+    worker_by_auction: index of the worker of every auction.
+    auctions_by_worker: number of auctions pinned to every worker.
+    """
+
+    def __init__(self, size: int, config_path: str, module_directory: str, modules: str):
+        """
+        Creates the pool, processes are started when the first auction is submitted.
+
+        :param size: number of worker processes
+        :param config_path: path of the configuration file
+        :param module_directory: directory with the modules
+        :param modules: modules to preload separated by comma
+        """
+        if size <= 0:
+            raise ValueError("the execution pool size must be greater than zero")
+
+        self.workers = [ProcessPoolExecutor(max_workers=1, initializer=init_worker,
+                                            initargs=(config_path, module_directory, modules))
+                        for _ in range(size)]
+        self.worker_by_auction = {}
+        self.auctions_by_worker = [0] * size
+        self.logger = log().get_logger()
+
+    def submit(self, auction_key: str, function, *args) -> Future:
+        """
+        Submits a task of an auction to its worker. Tasks are not awaited, failures are logged when they finish.
+
+        :param auction_key: auction key
+        :param function: function executed in the worker
+        :param args: arguments of the function
+        :return: future of the task
+        """
+        def check_task(future: Future):
+            if future.cancelled():
+                self.logger.error("task {0} of auction {1} was cancelled".format(function.__name__, auction_key))
+            elif future.exception() is not None:
+                self.logger.error("task {0} of auction {1} failed: {2}".format(function.__name__, auction_key,
+                                                                               str(future.exception())))
+
+        future = self.workers[self.worker_by_auction[auction_key]].submit(function, auction_key, *args)
+        future.add_done_callback(check_task)
+        return future
+
+    def add_auction(self, auction_key: str, module_name: str, config_params: dict) -> Future:
+        """
+        Pins an auction to a worker and initializes its module there. Tasks of a worker are executed in order, so
+        the module is initialized before the auction is executed.
+
+        :param auction_key: auction key
+        :param module_name: name of the module executing the auction
+        :param config_params: auction parameters
+        :return: future of the initialization
+        """
+        if auction_key in self.worker_by_auction:
+            raise ValueError("auction process with index:{0} is already in the execution pool".format(auction_key))
+
+        worker = self.auctions_by_worker.index(min(self.auctions_by_worker))
+        self.worker_by_auction[auction_key] = worker
+        self.auctions_by_worker[worker] += 1
+        return self.submit(auction_key, init_auction, module_name, config_params)
+
+    def change_auction(self, auction_key: str, config_params: dict) -> Future:
+        """
+        Initializes again the module of an auction in its worker with new parameters, periods executed
+        afterwards find the module initialized with them.
+
+        :param auction_key: auction key
+        :param config_params: auction parameters
+        :return: future of the initialization
+        """
+        if auction_key not in self.worker_by_auction:
+            raise ValueError("auction process with index:{0} was not found in the execution pool".format(auction_key))
+
+        return self.submit(auction_key, change_auction_params, config_params)
+
+    def remove_auction(self, auction_key: str) -> Future:
+        """
+        Removes an auction from its worker
+
+        :param auction_key: auction key
+        :return: future of the removal, None when the auction is not in the pool.
+        """
+        if auction_key in self.worker_by_auction:
+            future = self.submit(auction_key, release_auction)
+            self.auctions_by_worker[self.worker_by_auction.pop(auction_key)] -= 1
+            return future
+        return None
+
+    async def execute(self, auction_key: str, start: datetime, stop: datetime, snapshot: tuple,
+                      random_stream: RandomStream = None) -> list:
+        """
+        Executes an auction in its worker. The snapshot is taken by take_snapshot before the auction is submitted,
+        so bids can change while it is executed.
+
+        :param auction_key: auction key
+        :param start: start datetime
+        :param stop: stop datetime
+        :param snapshot: auction parameters and columns of the bid book, see take_snapshot
+        :param random_stream: random stream of the period
+        :return: allocation records
+        """
+        if auction_key not in self.worker_by_auction:
+            raise ValueError("auction process with index:{0} was not found in the execution pool".format(auction_key))
+
+        worker = self.workers[self.worker_by_auction[auction_key]]
+        return await asyncio.get_event_loop().run_in_executor(worker, execute_auction, auction_key, start, stop,
+                                                              snapshot, random_stream)
+
+    def shutdown(self):
+        """
+        Stops the worker processes
+        """
+        for worker in self.workers:
+            worker.shutdown(wait=True)
+        self.worker_by_auction.clear()
+        self.auctions_by_worker = [0] * len(self.workers)
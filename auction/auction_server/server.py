@@ -106,6 +106,7 @@ class AuctionServer(Agent):
 
         # remove auctions and their processes
         await self.remove_auctions()
+        self.auction_processor.shutdown_execution_pool()
 
         try:
             await self.database_manager.close()
@@ -18,3 +18,9 @@ class ServerMainData(metaclass=Singleton):
         self.protocol = ParseFormats.parse_uint8( Config().get_config_param('Main','DefaultProtocol'))
         self.life_time = ParseFormats.parse_uint8( Config().get_config_param('Main','LifeTime'))
         self.inmediate_start = ParseFormats.parse_bool( Config().get_config_param('Main','ImmediateStart'))
+
+        # Binary frames carry the ipap message as it is. Text framing is kept for peers running older versions.
+        try:
+            self.use_binary_frames = ParseFormats.parse_bool(Config().get_config_param('Main', 'UseBinaryFrames'))
+        except ValueError:
+            self.use_binary_frames = False
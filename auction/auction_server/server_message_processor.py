@@ -105,7 +105,7 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
     def __init__(self):
         self.server_data = ServerMainData()
-        super(ServerMessageProcessor, self).__init__(self.server_data.domain)
+        super(ServerMessageProcessor, self).__init__(self.server_data.domain, self.server_data.use_binary_frames)
         self.session_manager = SessionManager()
         self.logger = log().get_logger()
 
@@ -159,7 +159,7 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
                                                  ipap_message.get_seqno())
 
             session.add_pending_message(message)
-            await self.send_message(session.get_connection(), message.get_message())
+            await self.send_message(session.get_connection(), message)
 
             session.get_connection().set_state(ClientConnectionState.SYN_RCVD)
 
@@ -240,10 +240,8 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
         # verifies the connection state
         if session.get_connection().state == ClientConnectionState.ESTABLISHED:
-            message = self.build_ack_message(session.get_next_message_id(),
-                                             ipap_message.get_seqno())
-
-            await self.send_message(session.get_connection(), message.get_message())
+            await self.send_ack_message(session.get_connection(), session.get_next_message_id(),
+                                        ipap_message.get_seqno())
             session.get_connection().set_state(ClientConnectionState.CLOSE_WAIT)
 
             from auction_server.auction_server_handler import HandleClientTearDown
@@ -252,16 +250,15 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
             message = self.build_fin_message(session.get_next_message_id(), 0)
             session.add_pending_message(message)
-            await self.send_message(session.get_connection(), message.get_message())
+            await self.send_message(session.get_connection(), message)
             session.get_connection().set_state(ClientConnectionState.LAST_ACK)
 
         elif session.get_connection().state == ClientConnectionState.FIN_WAIT_2:
 
             self.logger.debug("receive the fin message when in fin_wait")
             # send the ack message establishing the session.
-            message = self.build_ack_message(session.get_next_message_id(), ipap_message.get_seqno())
-
-            await self.send_message(session.get_connection(), message.get_message())
+            await self.send_ack_message(session.get_connection(), session.get_next_message_id(),
+                                        ipap_message.get_seqno())
 
             session.get_connection().set_state(ClientConnectionState.CLOSED)
             await self._disconnect_socket(session.get_connection())
@@ -274,12 +271,12 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
         self.logger.debug("Ending handle_fin")
 
-    async def process_message(self, session: AuctionSession, msg: str):
+    async def process_message(self, session: AuctionSession, msg):
         """
         Process a message arriving from an agent.
 
         :param session: session that is handling the connection
-        :param msg: message
+        :param msg: message, str for text frames and bytes for binary frames
         :return:
         """
         try:
@@ -341,7 +338,10 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
         try:
             async for msg in ws:
-                if msg.type == WSMsgType.text:
+                if msg.type == WSMsgType.binary:
+                    await self.process_message(session, msg.data)
+
+                elif msg.type == WSMsgType.text:
                     await self.process_message(session, msg.data)
 
                 elif msg.type == WSMsgType.error:
@@ -374,7 +374,7 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
             message = self.build_fin_message(session.get_next_message_id(), 0)
 
             session.add_pending_message(message)
-            await self.send_message(session.connection, message.get_message())
+            await self.send_message(session.connection, message)
 
             session.connection.set_state(ClientConnectionState.FIN_WAIT_1)
 
@@ -384,7 +384,7 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
 
         self.logger.debug('Ending disconnect')
 
-    async def send_message(self, client_connection: ClientConnection, message: str):
+    async def send_message(self, client_connection: ClientConnection, message: IpapMessage):
         """
         Sends the message for an agent
 
@@ -392,5 +392,28 @@ class ServerMessageProcessor(AuctionMessageProcessor, metaclass=Singleton):
         :param message: message to be send
         """
         self.logger.debug('Start send message')
-        await client_connection.web_socket.send_str(message)
+        await self.send_frame(client_connection, self.get_frame(message))
         self.logger.debug('End send message')
+
+    async def send_ack_message(self, client_connection: ClientConnection, sequence_nbr: int, ack_nbr: int):
+        """
+        Sends an ack message for an agent, taken from the control frame cache.
+
+        :param client_connection: websocket and aiohttp session created for the connection
+        :param sequence_nbr: sequence number for the message
+        :param ack_nbr: ack number to send within the message
+        """
+        await self.send_frame(client_connection, self.get_ack_frame(sequence_nbr, ack_nbr))
+
+    @staticmethod
+    async def send_frame(client_connection: ClientConnection, frame):
+        """
+        Sends an encoded message for an agent
+
+        :param client_connection: websocket and aiohttp session created for the connection
+        :param frame: encoded message, bytes are sent as binary frames and str as text frames.
+        """
+        if isinstance(frame, bytes):
+            await client_connection.web_socket.send_bytes(frame)
+        else:
+            await client_connection.web_socket.send_str(frame)
@@ -5,21 +5,41 @@ import aiounittest
 from aiohttp import web
 
 from foundation.auction_parser import AuctionXmlFileParser
+from foundation.auctioning_object import AuctioningObjectState
+from foundation.auctioning_object import AuctioningObjectType
+from foundation.bid_book import BidBook
 from foundation.bidding_object import BiddingObject
 from foundation.bidding_object_manager import BiddingObjectManager
 from foundation.config import Config
+from foundation.config_param import ConfigParam
+from foundation.config_param import DataType
+from foundation.field_value import FieldValue
+from foundation.module import Module
+from foundation.module_loader import ModuleLoader
 from foundation.session import Session
+from proc_modules.proc_module import AllocationRecord
+from proc_modules.proc_module import ProcModule
+from proc_modules.two_auction_generalized_test import QStarMechanism
 
 from auction_server.server import AuctionServer
 from auction_server.auction_processor import AuctionProcessor
 from auction_server.auction_processor import AgentFieldSet
+from auction_server.auction_processor import AuctionProcess
+from auction_server.execution_pool import ExecutionPool
+from auction_server.execution_pool import take_snapshot
 from auction_server.server_message_processor import ClientConnection
+from auction_server.auction_server_handler import DeadlinePolicy
+from auction_server.auction_server_handler import HandleAuctionExecution
 from auction_server.auction_server_handler import HandleClientTearDown
 from auction_server.auction_server_handler import HandleRemoveBiddingObject
 from auction_server.server_main_data import ServerMainData
 
 from datetime import datetime
 from datetime import timedelta
+import asyncio
+import os
+import random
+import time
 
 
 class AuctionProcessorTest(unittest.TestCase):
@@ -280,6 +300,22 @@ class AuctionProcessorTest(unittest.TestCase):
                                                              datetime.now() + timedelta(seconds=10))
         self.assertEqual(len(allocations), 10)
 
+        # the same auction executed in a worker process gives the same allocations.
+        module_directory = '/home/ns3/py_charm_workspace/paper_subastas/auction/proc_modules'
+        execution_pool = ExecutionPool(1, str(Config().config_path), module_directory, 'basic_module')
+        try:
+            execution_pool.add_auction(auction.get_key(), auction.get_action().name,
+                                       auction_process.get_config_params())
+            snapshot = take_snapshot(auction_process.get_config_params(), auction_process.get_bid_book())
+            allocations_pool = asyncio.get_event_loop().run_until_complete(
+                execution_pool.execute(auction.get_key(), datetime.now(), datetime.now() + timedelta(seconds=10),
+                                       snapshot))
+        finally:
+            execution_pool.shutdown()
+
+        self.assertEqual(sorted((allocation.get_parent_key(), allocation.quantity) for allocation in allocations),
+                         sorted((allocation.get_parent_key(), allocation.quantity) for allocation in allocations_pool))
+
     def test_delete_bidding_object_from_auction_process(self):
         lst_auctions = self.auction_xml_file_parser.parse(
             "/home/ns3/py_charm_workspace/paper_subastas/auction/xmls/example_auctions3.xml")
@@ -291,6 +327,7 @@ class AuctionProcessorTest(unittest.TestCase):
         auction_process = self.auction_processor.get_auction_process(auction.get_key())
         bids = auction_process.get_bids()
         self.assertEqual(len(bids), 0)
+        self.assertEqual(len(auction_process.get_bid_book()), 0)
 
     def test_delete_auction_process(self):
         lst_auctions = self.auction_xml_file_parser.parse(
@@ -322,6 +359,334 @@ class AuctionProcessorTest(unittest.TestCase):
         self.assertEqual(len(set2), 3)
 
 
+class ExecutionPoolTest(unittest.TestCase):
+    """
+    Executes an auction built from a bid book in a worker process and with its module in this process.
+    """
+
+    def setUp(self):
+        Config('auction_server.yaml')
+        self.module_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                             'proc_modules')
+        self.module = ModuleLoader(self.module_directory, 'AUMProcessor', 'basic_module').get_module('basic_module')
+
+        self.config_params = self.get_field_values({'bandwidth': '30', 'reserveprice': '0.2', 'domainid': '10'})
+
+        rnd = random.Random(10)
+        self.bid_book = BidBook()
+        for i in range(0, 20):
+            elements = {'element1': {
+                'quantity': ConfigParam('quantity', DataType.DOUBLE, typed_value=float(rnd.randint(1, 5))),
+                'unitprice': ConfigParam('unitprice', DataType.DOUBLE, typed_value=rnd.randint(1, 10) / 10)}}
+            bid = BiddingObject('1.1', '1.bid{0}'.format(str(i)), AuctioningObjectType.BID, elements, {})
+            bid.set_session('session{0}'.format(str(i)))
+            self.bid_book.insert(bid, True)
+
+        self.execution_pool = ExecutionPool(1, str(Config().config_path), self.module_directory, 'basic_module')
+        self.start = datetime.now()
+        self.stop = self.start + timedelta(seconds=10)
+
+    def tearDown(self):
+        self.execution_pool.shutdown()
+
+    @staticmethod
+    def get_field_values(values: dict) -> dict:
+        config_params = {}
+        for name, value in values.items():
+            ProcModule().insert_string_field(name, value, config_params)
+
+        field_values = {}
+        for name, config_param in config_params.items():
+            field_values[name] = FieldValue()
+            field_values[name].parse_field_value_from_config_param(config_param)
+        return field_values
+
+    def execute(self) -> (list, list):
+        params = self.module.init_module(self.config_params)
+        allocations = self.module.execute(params, '1.1', self.start, self.stop, self.bid_book.build_bids(),
+                                          bid_book=self.bid_book)
+        allocations_pool = asyncio.get_event_loop().run_until_complete(
+            self.execution_pool.execute('1.1', self.start, self.stop, take_snapshot(params, self.bid_book)))
+        return allocations, allocations_pool
+
+    @staticmethod
+    def get_values(allocations: list) -> list:
+        return sorted((allocation.domain, allocation.get_parent_key(), allocation.quantity, allocation.price)
+                      for allocation in allocations)
+
+    def test_execute(self):
+        self.execution_pool.add_auction('1.1', 'basic_module', self.config_params).result()
+        allocations, allocations_pool = self.execute()
+        self.assertEqual(len(allocations), 20)
+        self.assertEqual(self.get_values(allocations), self.get_values(allocations_pool))
+
+    def test_change_auction(self):
+        self.execution_pool.add_auction('1.1', 'basic_module', self.config_params).result()
+
+        # the module in the worker is initialized again, it creates the allocations in the new domain.
+        self.config_params = self.get_field_values({'bandwidth': '10', 'reserveprice': '0.2', 'domainid': '11'})
+        self.execution_pool.change_auction('1.1', self.config_params).result()
+        allocations, allocations_pool = self.execute()
+        self.assertEqual(set(allocation.domain for allocation in allocations_pool), {11})
+        self.assertEqual(self.get_values(allocations), self.get_values(allocations_pool))
+
+        with self.assertRaises(ValueError):
+            self.execution_pool.change_auction('1.2', self.config_params)
+
+    def test_add_and_remove_auction(self):
+        self.execution_pool.add_auction('1.1', 'basic_module', self.config_params).result()
+        with self.assertRaises(ValueError):
+            self.execution_pool.add_auction('1.1', 'basic_module', self.config_params)
+
+        # tasks failing in the worker are given by their futures.
+        with self.assertRaises(ModuleNotFoundError):
+            self.execution_pool.add_auction('1.2', 'not_a_module', self.config_params).result()
+
+        self.execution_pool.remove_auction('1.1').result()
+        self.execution_pool.remove_auction('1.2').result()
+        self.assertIsNone(self.execution_pool.remove_auction('1.1'))
+        self.assertEqual(self.execution_pool.auctions_by_worker, [0])
+
+
+class SlowModule(Module):
+    """
+    Module taking the time given to execute, every execution creates an allocation with the number of the
+    execution as quantity.
+    """
+
+    def __init__(self, delay: float):
+        super(SlowModule, self).__init__('slow_module', 'slow_module.py', 'SlowModule', None)
+        self.delay = delay
+        self.executions = 0
+
+    def init_module(self, config_params: dict):
+        return None
+
+    def destroy_module(self):
+        pass
+
+    def execute(self, request_params: dict, auction_key: str, start: datetime, stop: datetime, bids: dict,
+                bid_book: BidBook = None, random_stream=None) -> list:
+        self.executions = self.executions + 1
+        time.sleep(self.delay)
+        return [AllocationRecord(10, 'session1', '1.bid1', start, stop, self.executions, 0.5)]
+
+    def execute_user(self, request_params: dict, auctions: dict, start: datetime, stop: datetime) -> list:
+        return []
+
+    def reset(self):
+        pass
+
+
+class SlowAuction:
+    """
+    Auction executed by the slow module, every period lasts one second.
+    """
+
+    def __init__(self, start: datetime):
+        self.interval = 1
+        self.stop = start + timedelta(hours=1)
+
+    def get_key(self) -> str:
+        return '1.slow'
+
+    def get_interval(self):
+        return self
+
+    def get_stop(self) -> datetime:
+        return self.stop
+
+
+class BiddingObjectStore:
+    """
+    Keeps the allocations stored by the auction execution.
+    """
+
+    def __init__(self):
+        self.bidding_objects = []
+
+    async def add_bidding_object(self, bidding_object: BiddingObject):
+        self.bidding_objects.append(bidding_object)
+
+
+class HandleAuctionExecutionTest(unittest.TestCase):
+    """
+    Executes periods of an auction whose module is slower than the deadline.
+    """
+
+    def setUp(self):
+        Config('auction_server.yaml')
+        module_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                        'proc_modules')
+        self.auction_processor = AuctionProcessor(10, module_directory)
+        self.start = datetime.now()
+        self.auction = SlowAuction(self.start)
+        self.module = SlowModule(0)
+        self.auction_processor.auctions[self.auction.get_key()] = AuctionProcess(self.auction.get_key(), self.module,
+                                                                                  None, {})
+
+        self.loop = asyncio.get_event_loop()
+
+    def tearDown(self):
+        self.auction_processor.auctions.pop(self.auction.get_key(), None)
+
+    def create_task(self, policy: DeadlinePolicy) -> HandleAuctionExecution:
+        task = HandleAuctionExecution(self.auction, self.start, 1)
+        task.bidding_object_manager = BiddingObjectStore()
+        task.deadline = 0.05
+        task.deadline_policy = policy
+        return task
+
+    def run_period(self, task: HandleAuctionExecution) -> list:
+        nbr_stored = len(task.bidding_object_manager.bidding_objects)
+        self.loop.run_until_complete(task._run_specific())
+        return task.bidding_object_manager.bidding_objects[nbr_stored:]
+
+    @staticmethod
+    def get_quantities(allocations: list) -> list:
+        return [ProcModule.get_allocation_quantity(allocation) for allocation in allocations]
+
+    def test_dispatch(self):
+        task = self.create_task(DeadlinePolicy.EXTEND)
+        allocations = self.run_period(task)
+        self.assertEqual(self.get_quantities(allocations), [1])
+        self.assertEqual(task.missed_deadlines, 0)
+        self.assertEqual(task.start_datetime, self.start + timedelta(seconds=1))
+
+    def test_extend(self):
+        task = self.create_task(DeadlinePolicy.EXTEND)
+        self.module.delay = 0.3
+        allocations = self.run_period(task)
+
+        # the allocations are the ones of the execution, given once it ends.
+        self.assertEqual(self.get_quantities(allocations), [1])
+        self.assertEqual(task.missed_deadlines, 1)
+        self.assertTrue(task.execution.done())
+
+    def test_skip(self):
+        task = self.create_task(DeadlinePolicy.SKIP)
+        self.module.delay = 0.3
+        self.assertEqual(self.run_period(task), [])
+        self.assertEqual(task.missed_deadlines, 1)
+
+        # the next period is not executed while the execution of the previous one is running.
+        self.assertEqual(self.run_period(task), [])
+        self.assertEqual(task.missed_deadlines, 2)
+        self.assertEqual(self.module.executions, 1)
+
+        self.loop.run_until_complete(asyncio.wait([task.execution]))
+        self.module.delay = 0
+        self.assertEqual(self.get_quantities(self.run_period(task)), [2])
+        self.assertEqual(task.missed_deadlines, 2)
+
+    def test_reuse(self):
+        task = self.create_task(DeadlinePolicy.REUSE)
+        self.assertEqual(self.get_quantities(self.run_period(task)), [1])
+
+        # the allocations of the previous period are given for the periods missing the deadline.
+        self.module.delay = 0.3
+        for period in range(2, 4):
+            allocations = self.run_period(task)
+            self.assertEqual(self.get_quantities(allocations), [1])
+            self.assertEqual(allocations[0].get_parent_key(), '1.bid1')
+            self.assertEqual(task.missed_deadlines, period - 1)
+        self.assertEqual(self.module.executions, 2)
+
+        self.loop.run_until_complete(asyncio.wait([task.execution]))
+
+
+class AuctionReplayTest(unittest.TestCase):
+    """
+    Executes periods of auctions recording them, and replays them.
+    """
+
+    def setUp(self):
+        Config('auction_server.yaml')
+        self.module_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                             'proc_modules')
+        self.auction_processor = AuctionProcessor(10, self.module_directory)
+        self.start = datetime(2019, 1, 1, 10, 0, 0)
+        self.keys = []
+
+    def tearDown(self):
+        for key in self.keys:
+            self.auction_processor.auctions.pop(key, None)
+
+    def add_auction(self, key: str, module_name: str, values: dict) -> Module:
+        module = ModuleLoader(self.module_directory, 'AUMProcessor', module_name).get_module(module_name)
+
+        config_params = {}
+        for name, value in values.items():
+            ProcModule().insert_string_field(name, value, config_params)
+
+        action_process = AuctionProcess(key, module, None, config_params, 5, 3)
+        action_process.set_params(module.init_module(action_process.get_config_params()))
+        self.auction_processor.auctions[key] = action_process
+        self.keys.append(key)
+
+        rnd = random.Random(10)
+        for i in range(0, 20):
+            elements = {'element1': {
+                'quantity': ConfigParam('quantity', DataType.DOUBLE, typed_value=float(rnd.randint(1, 5))),
+                'unitprice': ConfigParam('unitprice', DataType.DOUBLE, typed_value=rnd.randint(1, 10) / 10)}}
+            bid = BiddingObject(key, '1.bid{0}'.format(str(i)), AuctioningObjectType.BID, elements, {})
+            bid.set_session('session{0}'.format(str(i)))
+            bid.set_state(AuctioningObjectState.ACTIVE)
+            self.auction_processor.add_bidding_object_to_auction_process(key, bid)
+        return module
+
+    @staticmethod
+    def get_values(allocations: list) -> list:
+        return sorted((allocation.get_parent_key(), ProcModule.get_allocation_quantity(allocation),
+                       ProcModule.get_bid_price(allocation)) for allocation in allocations)
+
+    def replay_periods(self, key: str):
+        # periods are executed in the event loop and out of it, both are recorded.
+        starts = [self.start + timedelta(seconds=10 * period) for period in range(0, 4)]
+        values = {}
+        for start in starts[:2]:
+            values[start] = self.get_values(self.auction_processor.execute_auction(
+                key, start, start + timedelta(seconds=10)))
+        for start in starts[2:]:
+            values[start] = self.get_values(asyncio.get_event_loop().run_until_complete(
+                self.auction_processor.dispatch_auction(key, start, start + timedelta(seconds=10))))
+
+        # only the last periods are kept.
+        with self.assertRaises(ValueError):
+            self.auction_processor.replay_period(key, starts[0])
+
+        for start in starts[1:]:
+            self.assertTrue(len(values[start]) > 0)
+            self.assertEqual(self.get_values(self.auction_processor.replay_period(key, start)), values[start])
+
+    def test_replay_basic_module(self):
+        self.add_auction('1.replay_basic', 'basic_module',
+                         {'bandwidth': '30', 'reserveprice': '0.2', 'domainid': '10'})
+        self.replay_periods('1.replay_basic')
+
+    def test_replay_two_auction_generalized(self):
+        module = self.add_auction('1.replay_generalized', 'two_auction_generalized',
+                                  {'bandwidth01': '10', 'bandwidth02': '10', 'reserveprice01': '0.1',
+                                   'reserveprice02': '0.2', 'maxvalue01': '0.5', 'maxvalue02': '1',
+                                   'domainid': '10'})
+        module.get_mechanism = lambda: QStarMechanism(0.1)
+        self.replay_periods('1.replay_generalized')
+
+    def test_dispatch_snapshot(self):
+        self.add_auction('1.dispatch_snapshot', 'basic_module',
+                         {'bandwidth': '30', 'reserveprice': '0.2', 'domainid': '10'})
+        action_process = self.auction_processor.auctions['1.dispatch_snapshot']
+
+        # the executor thread takes the snapshot, it waits while bids are being changed.
+        loop = asyncio.get_event_loop()
+        with action_process.lock:
+            task = loop.create_task(self.auction_processor.dispatch_auction(
+                '1.dispatch_snapshot', self.start, self.start + timedelta(seconds=10)))
+            loop.run_until_complete(asyncio.sleep(0.1))
+            self.assertFalse(task.done())
+        self.assertTrue(len(loop.run_until_complete(task)) > 0)
+
+
 class AuctionServerHandlerTest(aiounittest.AsyncTestCase):
 
 
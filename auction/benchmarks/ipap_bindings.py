@@ -0,0 +1,148 @@
+"""
+Micro benchmark for the libipap bindings.
+
+It compares the per call cost of the hot wrapper calls (get_field, get_data_record_at_pos and write_value)
+when the arguments are boxed and the return type is declared on every call, as the wrappers used to do,
+against the prototypes declared once in python_wrapper.ipap_lib.
+
+Run from the auction directory:
+
+    python -m benchmarks.ipap_bindings [--number 100000] [--output results.json]
+"""
+import argparse
+import json
+import timeit
+from ctypes import cdll
+from ctypes import c_char_p
+from ctypes import c_int
+from ctypes import c_void_p
+from ctypes import create_string_buffer
+from ctypes import sizeof
+
+from python_wrapper.ipap_lib import lib
+from python_wrapper.ipap_data_record import IpapDataRecord
+from python_wrapper.ipap_field_container import IpapFieldContainer
+from python_wrapper.ipap_message import IpapMessage
+from python_wrapper.ipap_template import TemplateType
+
+# A second handle to the library, its function objects do not share the prototypes declared in ipap_lib.
+raw_lib = cdll.LoadLibrary('libipap.so')
+
+ENO = 0
+FTYPE = 30
+
+
+def build_message() -> IpapMessage:
+    """
+    Builds a message with a template and one data record with the field under test.
+
+    :return: message built.
+    """
+    field_container = IpapFieldContainer()
+    field_container.initialize_forward()
+    field_container.initialize_reverse()
+
+    message = IpapMessage(1, IpapMessage.IPAP_VERSION, True)
+    template_id = message.new_data_template(1, TemplateType.IPAP_SETID_AUCTION_TEMPLATE)
+    message.add_field(template_id, ENO, FTYPE)
+
+    record = IpapDataRecord(templ_id=template_id)
+    field = field_container.get_field(ENO, FTYPE)
+    record.insert_field(ENO, FTYPE, field.get_ipap_field_value_uint64(12231213))
+    message.include_data(template_id, record)
+    return message
+
+
+def per_call_declared(message: IpapMessage, record_obj, field_obj, value_obj) -> dict:
+    """
+    Calls are made as the wrappers did before the registry: restype set and arguments boxed on each call.
+    """
+    def get_field():
+        function = raw_lib.ipap_data_record_get_field
+        function.restype = c_void_p
+        return function(c_void_p(record_obj), c_int(ENO), c_int(FTYPE))
+
+    def get_data_record_at_pos():
+        function = raw_lib.ipap_message_get_data_record_at_pos
+        function.restype = c_void_p
+        return function(c_void_p(message.obj), c_int(0))
+
+    def write_value():
+        num_characters = raw_lib.ipap_field_number_characters
+        num_characters.restype = c_int
+        write = raw_lib.ipap_field_write_value
+        write.restype = c_char_p
+        result = create_string_buffer(num_characters(c_void_p(field_obj), c_void_p(value_obj)) + 1)
+        write(c_void_p(field_obj), c_void_p(value_obj), result, sizeof(result))
+        return result.value
+
+    return {'get_field': get_field, 'get_data_record_at_pos': get_data_record_at_pos, 'write_value': write_value}
+
+
+def prebound(message: IpapMessage, record_obj, field_obj, value_obj) -> dict:
+    """
+    Calls are made through the prototypes declared once in ipap_lib.
+    """
+    get_field_function = lib.ipap_data_record_get_field
+    get_data_record_at_pos_function = lib.ipap_message_get_data_record_at_pos
+    num_characters = lib.ipap_field_number_characters
+    write = lib.ipap_field_write_value
+
+    def get_field():
+        return get_field_function(record_obj, ENO, FTYPE)
+
+    def get_data_record_at_pos():
+        return get_data_record_at_pos_function(message.obj, 0)
+
+    def write_value():
+        result = create_string_buffer(num_characters(field_obj, value_obj) + 1)
+        write(field_obj, value_obj, result, sizeof(result))
+        return result.value
+
+    return {'get_field': get_field, 'get_data_record_at_pos': get_data_record_at_pos, 'write_value': write_value}
+
+
+def run(number: int) -> dict:
+    """
+    Runs the benchmark
+
+    :param number: number of calls per measure
+    :return: nanoseconds per call by function and binding style.
+    """
+    message = build_message()
+    record = message.get_data_record_at_pos(0)
+    record_obj = lib.ipap_message_get_data_record_at_pos(message.obj, 0)
+    value_obj = lib.ipap_data_record_get_field(record_obj, ENO, FTYPE)
+    field_obj = lib.ipap_template_get_field(message.get_template_object(record.get_template_id()).obj, ENO, FTYPE)
+
+    results = {}
+    styles = {'before': per_call_declared(message, record_obj, field_obj, value_obj),
+              'after': prebound(message, record_obj, field_obj, value_obj)}
+    for style, functions in styles.items():
+        for name, function in functions.items():
+            elapsed = min(timeit.repeat(function, number=number, repeat=5))
+            results.setdefault(name, {})[style] = elapsed * 1e9 / number
+
+    for name in results:
+        results[name]['speedup'] = results[name]['before'] / results[name]['after']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='libipap binding micro benchmark')
+    parser.add_argument('--number', type=int, default=100000, help='calls per measure')
+    parser.add_argument('--output', default=None, help='json file to write the results')
+    args = parser.parse_args()
+
+    results = run(args.number)
+    for name, result in results.items():
+        print('{0:<25} before: {1:8.1f} ns  after: {2:8.1f} ns  speedup: {3:.2f}x'.format(
+            name, result['before'], result['after'], result['speedup']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
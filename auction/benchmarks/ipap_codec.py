@@ -0,0 +1,288 @@
+"""
+Benchmark suite for the ipap codec.
+
+It measures, for ask, auction, bid and allocation messages with 1, 10, 100 and 1000 objects:
+
+    encode       building the message (IpapResourceRequestParser.get_ipap_message_requests for asks,
+                 IpapAuctionParser.get_ipap_message for auctions, IpapBiddingObjectParser.get_ipap_message for bids
+                 and allocations)
+    get_message  serializing the message built
+    decode       creating a message from the serialized one, IpapMessage(value=...)
+    parse        reading the bids from the decoded message, IpapBiddingObjectParser.parse
+
+Bids are generated from the fixtures xmls/example_bids*.xml and reference the auction in xmls/example_auctions1.xml,
+their options run from now for their bidding duration. Allocations are created for those bids as the auction
+modules create them. Every object adds its data record and its option records to the message.
+
+Results are written as json with sorted keys, so two runs can be compared. Given a baseline file, the ratio
+against the baseline is printed for every measure.
+
+Run from the auction directory:
+
+    python -m benchmarks.ipap_codec [--sizes 1 10 100 1000] [--output results.json] [--baseline previous.json]
+"""
+import argparse
+import json
+import pathlib
+import platform
+import timeit
+from datetime import datetime
+from datetime import timedelta
+
+from auction_client.ipap_resource_request_parser import IpapResourceRequestParser
+from auction_client.resource_request import ResourceRequest
+from auction_client.resource_request_interval import ResourceRequestInterval
+from foundation.auction_parser import AuctionXmlFileParser
+from foundation.auctioning_object import AuctioningObjectType
+from foundation.bidding_object import BiddingObject
+from foundation.bidding_object_file_parser import BiddingObjectXmlFileParser
+from foundation.config import Config
+from foundation.config_param import ConfigParam
+from foundation.field_def_manager import DataType
+from foundation.ipap_auction_parser import IpapAuctionParser
+from foundation.ipap_bidding_object_parser import IpapBiddingObjectParser
+from proc_modules.proc_module import ProcModule
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_message import IpapMessage
+from python_wrapper.ipap_template_container import IpapTemplateContainerSingleton
+
+XML_DIR = pathlib.Path(__file__).parent.parent / 'xmls'
+AUCTION_FIXTURE = XML_DIR / 'example_auctions1.xml'
+BID_FIXTURES = sorted(XML_DIR.glob('example_bids*.xml'))
+
+DOMAIN = 1
+SIZES = [1, 10, 100, 1000]
+MESSAGE_TYPES = ['ask', 'auction', 'bid', 'allocation']
+RECORDS_PER_MEASURE = 1000
+# seconds, used for options without bidding duration.
+BIDDING_DURATION = 100
+
+
+def load_auctions(size: int) -> list:
+    """
+    Loads auctions from the auction fixture, the file is parsed until there are size auctions.
+
+    :param size: number of auctions
+    :return: list of auctions
+    """
+    parser = AuctionXmlFileParser(DOMAIN)
+    auctions = []
+    while len(auctions) < size:
+        auctions.extend(parser.parse(str(AUCTION_FIXTURE)))
+    return auctions[:size]
+
+
+def generate_bids(auction, size: int) -> list:
+    """
+    Generates bids for an auction, elements and options are taken in turn from every bid fixture.
+
+    :param auction: auction referenced by the bids
+    :param size: number of bids
+    :return: list of bidding objects
+    """
+    parser = BiddingObjectXmlFileParser(DOMAIN)
+    fixtures = []
+    for file_name in BID_FIXTURES:
+        fixtures.extend(parser.parse(str(file_name)))
+
+    start = int(datetime.now().timestamp())
+    bids = []
+    for i in range(0, size):
+        fixture = fixtures[i % len(fixtures)]
+        key = '{0}.bid{1}'.format(str(DOMAIN), str(i))
+        options = {}
+        for option_name, option_fields in fixture.options.items():
+            # options give their interval, it runs from now for the bidding duration.
+            duration = int(option_fields['biddingduration'].value) if 'biddingduration' in option_fields \
+                else BIDDING_DURATION
+            options[option_name] = dict(option_fields)
+            options[option_name]['start'] = ConfigParam('start', DataType.UINT64, str(start))
+            options[option_name]['stop'] = ConfigParam('stop', DataType.UINT64, str(start + duration))
+        bids.append(BiddingObject(auction.get_key(), key, AuctioningObjectType.BID, fixture.elements, options))
+    return bids
+
+
+def generate_allocations(auction, size: int) -> list:
+    """
+    Generates allocations for the bids of an auction as the auction modules create them, with the quantity and
+    price of the first bid element.
+
+    :param auction: auction referenced by the allocations
+    :param size: number of allocations
+    :return: list of bidding objects
+    """
+    proc_module = ProcModule()
+    start = datetime.now()
+    allocations = []
+    for bid in generate_bids(auction, size):
+        element = list(bid.elements.values())[0]
+        # the parser requires the auction as parent of the bidding objects in the message.
+        allocation = proc_module.create_allocation(DOMAIN, 'session1', auction.get_key(), start,
+                                                   start + timedelta(seconds=BIDDING_DURATION),
+                                                   float(element['quantity'].value),
+                                                   float(element['unitprice'].value))
+        allocations.append(proc_module.materialize_allocation(allocation))
+    return allocations
+
+
+def ask_encoder(size: int):
+    """
+    Gets the function building an ask message with size resource requests.
+    """
+    parser = IpapResourceRequestParser(DOMAIN)
+    start = datetime.now()
+    resource_requests = []
+    for i in range(0, size):
+        resource_request = ResourceRequest('request{0}'.format(str(i)), '%Y-%m-%d %H:%M:%S')
+        interval = ResourceRequestInterval(resource_request.get_key())
+        interval.start = start
+        interval.stop = start + timedelta(seconds=BIDDING_DURATION)
+        interval.interval = 10
+        resource_request.add_interval(interval)
+        resource_requests.append(resource_request)
+
+    def encode() -> IpapMessage:
+        return parser.get_ipap_message_requests(start, resource_requests, 'router1', False,
+                                                '127.0.0.1', '0:0:0:0:0:0:0:0', 12000)
+    return encode
+
+
+def auction_encoder(size: int):
+    """
+    Gets the function building an auction message with size auctions.
+    """
+    parser = IpapAuctionParser(DOMAIN)
+    auctions = load_auctions(size)
+
+    def encode() -> IpapMessage:
+        return parser.get_ipap_message(auctions, False, '127.0.0.1', 12000)
+    return encode
+
+
+def bidding_object_encoder(object_type: AuctioningObjectType, size: int):
+    """
+    Gets the function building a message with size bids or allocations.
+    """
+    parser = IpapBiddingObjectParser(DOMAIN)
+    template_container = IpapTemplateContainerSingleton()
+    auction = load_auctions(1)[0]
+    if object_type == AuctioningObjectType.BID:
+        bidding_objects = generate_bids(auction, size)
+    else:
+        bidding_objects = generate_allocations(auction, size)
+
+    def encode() -> IpapMessage:
+        message = IpapMessage(DOMAIN, IpapMessage.IPAP_VERSION, True)
+        for bidding_object in bidding_objects:
+            parser.get_ipap_message(bidding_object, auction, template_container, message)
+        return message
+    return encode
+
+
+def get_encoder(message_type: str, size: int):
+    if message_type == 'ask':
+        return ask_encoder(size)
+    elif message_type == 'auction':
+        return auction_encoder(size)
+    elif message_type == 'bid':
+        return bidding_object_encoder(AuctioningObjectType.BID, size)
+    elif message_type == 'allocation':
+        return bidding_object_encoder(AuctioningObjectType.ALLOCATION, size)
+    else:
+        raise ValueError("Unsupported message type: {0}".format(message_type))
+
+
+def measure(function, number: int, repeat: int) -> float:
+    """
+    Measures a function
+
+    :return: best time per call in microseconds.
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) * 1e6 / number
+
+
+def run(sizes: list, repeat: int) -> dict:
+    """
+    Runs the benchmark
+
+    :param sizes: numbers of objects per message
+    :param repeat: measures taken, the best one is kept.
+    :return: microseconds per call by message type, size and operation.
+    """
+    template_container = IpapTemplateContainerSingleton()
+    parser = IpapBiddingObjectParser(DOMAIN)
+
+    results = {}
+    for message_type in MESSAGE_TYPES:
+        for size in sizes:
+            number = max(1, RECORDS_PER_MEASURE // size)
+            encode = get_encoder(message_type, size)
+            message = encode()
+            frame = message.get_message()
+            decoded = IpapMessage(DOMAIN, IpapMessage.IPAP_VERSION, True, value=frame)
+
+            operations = {
+                'encode': encode,
+                'get_message': message.get_message,
+                'decode': lambda: IpapMessage(DOMAIN, IpapMessage.IPAP_VERSION, True, value=frame),
+            }
+            # allocations are written with their auctioning object type, which parse_type does not read back.
+            if message_type == 'bid':
+                operations['parse'] = lambda: parser.parse(decoded, template_container)
+
+            result = {'records': message.get_data_record_size(), 'bytes': len(frame)}
+            for operation, function in operations.items():
+                result[operation] = measure(function, number, repeat)
+            results.setdefault(message_type, {})[str(size)] = result
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """
+    Compares results against a baseline
+
+    :return: list of (message type, size, operation, ratio), ratio above 1 is slower than the baseline.
+    """
+    ratios = []
+    for message_type, by_size in results.items():
+        for size, result in by_size.items():
+            previous = baseline.get(message_type, {}).get(size, {})
+            for operation, elapsed in result.items():
+                if operation in ['records', 'bytes'] or not previous.get(operation):
+                    continue
+                ratios.append((message_type, size, operation, elapsed / previous[operation]))
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ipap codec benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='objects per message')
+    parser.add_argument('--repeat', type=int, default=5, help='measures per operation, the best one is kept')
+    parser.add_argument('--config', default='auction_server.yaml', help='configuration file')
+    parser.add_argument('--output', default=None, help='json file to write the results')
+    parser.add_argument('--baseline', default=None, help='json file of a previous run to compare with')
+    args = parser.parse_args()
+
+    Config(args.config)
+    results = run(args.sizes, args.repeat)
+    for message_type, by_size in results.items():
+        for size, result in by_size.items():
+            print('{0:<11} {1:>5} objects {2:>6} records '.format(message_type, size, result['records']) +
+                  ' '.join('{0}: {1:10.1f} us'.format(operation, result[operation])
+                           for operation in ['encode', 'get_message', 'decode', 'parse'] if operation in result))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        for message_type, size, operation, ratio in compare(results, baseline):
+            print('{0:<11} {1:>5} {2:<12} {3:.2f}x'.format(message_type, size, operation, ratio))
+
+    if args.output:
+        output = {'backend': IPAP_BACKEND, 'python': platform.python_version(), 'repeat': args.repeat,
+                  'unit': 'us', 'results': results}
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Benchmark suite for the auction mechanisms.
+
+It executes the modules BasicModule, SubsidyAuction, ProgressiveSecondPrice, TwoAuctionPerfectInformation and
+TwoAuctionGeneralized with synthetic bids, calling their execute method directly with the bids and their bid book,
+as AuctionProcessor does, and measures for 100, 1000, 10000 and 100000 bids:
+
+    seconds                  best wall time of an execution
+    peak_memory              peak of the memory traced by tracemalloc during an execution, in bytes
+    allocations              allocations created by an execution
+    allocations_per_second   allocations created by second of the best execution
+
+Bids are generated with a seeded generator. Every bid belongs to a budget class, low budget bids price below
+maxvalue01 and high budget bids from maxvalue01 up to the maximum price, and it has a number of elements with
+their own price and quantity. The units to sell are a fraction of the units requested, so auctions are contested.
+The state of the modules (like the q* cache of TwoAuctionGeneralized) is kept between executions, as it is
+between auction periods.
+
+Results are written as json with sorted keys, so runs of several releases can be charted together.
+
+Run from the auction directory:
+
+    python -m benchmarks.mechanisms [--sizes 100 1000 10000 100000] [--mechanisms basic_module ...]
+                                    [--output results.json]
+"""
+import argparse
+import importlib
+import json
+import platform
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from datetime import timedelta
+
+import numpy as np
+
+from foundation.auctioning_object import AuctioningObjectType
+from foundation.bid_book import BidBook
+from foundation.bidding_object import BiddingObject
+from foundation.config import Config
+from foundation.config_param import ConfigParam
+from foundation.field_def_manager import DataType
+from foundation.field_value import FieldValue
+from foundation.random_stream import RandomStream
+from proc_modules.proc_module import AuctionParameters
+
+DOMAIN = 1
+AUCTION_KEY = '1.1'
+START = datetime(2019, 1, 1)
+STOP = START + timedelta(seconds=10)
+SIZES = [100, 1000, 10000, 100000]
+
+# module and class of every mechanism, they are imported when they are run.
+MECHANISMS = {
+    'basic_module': ('proc_modules.basic_module', 'BasicModule'),
+    'subsidy_auction': ('proc_modules.subsidy_auction', 'SubsidyAuction'),
+    'progressive_second_price': ('proc_modules.progressive_second_price', 'ProgressiveSecondPrice'),
+    'two_auction_perfect_information': ('proc_modules.two_auction_perfect_information',
+                                        'TwoAuctionPerfectInformation'),
+    'two_auction_generalized': ('proc_modules.two_auction_generalized', 'TwoAuctionGeneralized'),
+}
+
+PRICE_DISTRIBUTIONS = ['uniform', 'triangular']
+
+
+class BidGenerator:
+    """
+    Generates synthetic bids
+
+    Attributes
+    ----------
+    rnd: seeded generator
+    price_distribution: distribution of prices within the range of the budget class, uniform or triangular.
+    min_price: minimum price of low budget bids
+    max_price: maximum price of high budget bids
+    max_value_low: price splitting low and high budget bids (maxvalue01)
+    high_budget: fraction of high budget bids
+    quantities: minimum and maximum quantity of an element
+    elements: minimum and maximum number of elements of a bid
+    """
+
+    def __init__(self, seed: int, price_distribution: str, min_price: float, max_price: float,
+                 max_value_low: float, high_budget: float, quantities: list, elements: list):
+        if price_distribution not in PRICE_DISTRIBUTIONS:
+            raise ValueError("Unsupported price distribution: {0}".format(price_distribution))
+
+        self.rnd = random.Random(seed)
+        self.price_distribution = price_distribution
+        self.min_price = min_price
+        self.max_price = max_price
+        self.max_value_low = max_value_low
+        self.high_budget = high_budget
+        self.quantities = quantities
+        self.elements = elements
+
+    def get_price(self, high_budget: bool) -> float:
+        """
+        Draws a price in the range of a budget class
+
+        :param high_budget: whether the bid is of the high budget class
+        :return: price rounded to cents
+        """
+        low, high = (self.max_value_low, self.max_price) if high_budget else (self.min_price, self.max_value_low)
+        if self.price_distribution == 'uniform':
+            price = self.rnd.uniform(low, high)
+        else:
+            price = self.rnd.triangular(low, high)
+        return min(max(round(price, 2), low), high)
+
+    def generate(self, size: int) -> dict:
+        """
+        Generates bids
+
+        :param size: number of bids
+        :return: bids by key
+        """
+        bids = {}
+        for i in range(0, size):
+            high_budget = self.rnd.random() < self.high_budget
+            elements = {}
+            for j in range(0, self.rnd.randint(self.elements[0], self.elements[1])):
+                quantity = float(self.rnd.randint(self.quantities[0], self.quantities[1]))
+                elements['record_{0}'.format(str(j + 1))] = {
+                    'quantity': ConfigParam('quantity', DataType.FLOAT, typed_value=quantity),
+                    'unitprice': ConfigParam('unitprice', DataType.DOUBLE, typed_value=self.get_price(high_budget))}
+
+            key = '{0}.bid{1}'.format(str(DOMAIN), str(i))
+            bid = BiddingObject(AUCTION_KEY, key, AuctioningObjectType.BID, elements, {})
+            bid.set_session('session{0}'.format(str(i)))
+            bids[key] = bid
+        return bids
+
+
+def get_params(bids: dict, supply: float, max_value_low: float, max_price: float) -> dict:
+    """
+    Gets the parameters of the auction, the units to sell are the given fraction of the units requested.
+
+    :param bids: bids of the auction
+    :param supply: fraction of the units requested to sell
+    :param max_value_low: price splitting low and high budget bids
+    :param max_price: maximum price of high budget bids
+    :return: parameters by name
+    """
+    requested = 0
+    for bid in bids.values():
+        for config_params in bid.elements.values():
+            requested += config_params['quantity'].get_typed_value()
+    bandwidth = max(1, round(requested * supply))
+
+    values = {'domainid': DOMAIN, 'bandwidth': bandwidth, 'bandwidth01': bandwidth // 2,
+              'bandwidth02': bandwidth - bandwidth // 2, 'reserveprice': 0.1, 'reserveprice01': 0.1,
+              'reserveprice02': max_value_low / 2, 'maxvalue01': max_value_low, 'maxvalue02': max_price,
+              'subsidy': 1.2}
+
+    params = {}
+    for name, value in values.items():
+        field_value = FieldValue(name=name)
+        field_value.parse_field_value(str(value))
+        params[name] = field_value
+    return params
+
+
+def load_module(mechanism: str):
+    """
+    Creates the module of a mechanism
+
+    :param mechanism: mechanism name, a key of MECHANISMS
+    :return: module
+    """
+    module_name, class_name = MECHANISMS[mechanism]
+    module_class = getattr(importlib.import_module(module_name), class_name)
+    return module_class(mechanism, mechanism + '.py', None, 'AUMProcessor')
+
+
+def measure(module, params: AuctionParameters, bids: dict, bid_book: BidBook, seed: int, repeat: int) -> dict:
+    """
+    Measures the execution of a module
+
+    :param module: module executing the auction
+    :param params: auction parameters compiled by the module
+    :param bids: bids of the auction
+    :param bid_book: bid book with the bids
+    :param seed: seed of the random stream
+    :param repeat: executions measured, the best one is kept.
+
+    :return: best time, peak memory and allocations created.
+    """
+    def execute() -> list:
+        return module.execute(params, AUCTION_KEY, START, STOP, bids, bid_book=bid_book,
+                              random_stream=RandomStream(seed, AUCTION_KEY, START))
+
+    seconds = []
+    allocations = []
+    for _ in range(0, repeat):
+        begin = time.perf_counter()
+        allocations = execute()
+        seconds.append(time.perf_counter() - begin)
+
+    # memory is traced in its own execution, as tracing slows it down.
+    tracemalloc.start()
+    execute()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(seconds)
+    return {'seconds': best, 'peak_memory': peak_memory, 'allocations': len(allocations),
+            'allocations_per_second': len(allocations) / best if best > 0 else 0}
+
+
+def run(mechanisms: list, sizes: list, generator: BidGenerator, supply: float, seed: int, repeat: int) -> dict:
+    """
+    Runs the benchmark, mechanisms failing are reported with their error.
+
+    :param mechanisms: mechanisms to execute
+    :param sizes: numbers of bids
+    :param generator: generator of bids
+    :param supply: fraction of the units requested to sell
+    :param seed: seed of the random streams given to the modules
+    :param repeat: executions measured, the best one is kept.
+    :return: measures by mechanism and size.
+    """
+    populations = {}
+    for size in sizes:
+        bids = generator.generate(size)
+        bid_book = BidBook()
+        for bid in bids.values():
+            bid_book.insert(bid, True)
+        params = get_params(bids, supply, generator.max_value_low, generator.max_price)
+        populations[size] = (bids, bid_book, params)
+
+    results = {}
+    for mechanism in mechanisms:
+        for size in sizes:
+            bids, bid_book, config_params = populations[size]
+            try:
+                module = load_module(mechanism)
+                params = module.init_module(config_params)
+                result = measure(module, params, bids, bid_book, seed, repeat)
+            except (ImportError, OSError, ValueError, KeyError) as e:
+                result = {'error': '{0}: {1}'.format(type(e).__name__, str(e))}
+            results.setdefault(mechanism, {})[str(size)] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='auction mechanisms benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='bids per auction')
+    parser.add_argument('--mechanisms', nargs='+', default=list(MECHANISMS.keys()), choices=list(MECHANISMS.keys()),
+                        help='mechanisms to execute')
+    parser.add_argument('--repeat', type=int, default=3, help='executions measured, the best one is kept')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the bids and the random streams')
+    parser.add_argument('--price-distribution', default='uniform', choices=PRICE_DISTRIBUTIONS,
+                        help='distribution of prices within the range of the budget class')
+    parser.add_argument('--min-price', type=float, default=0.1, help='minimum price of low budget bids')
+    parser.add_argument('--max-price', type=float, default=1.0, help='maximum price of high budget bids')
+    parser.add_argument('--max-value-low', type=float, default=0.5, help='price splitting the budget classes')
+    parser.add_argument('--high-budget', type=float, default=0.5, help='fraction of high budget bids')
+    parser.add_argument('--quantities', type=int, nargs=2, default=[1, 10], help='minimum and maximum quantity')
+    parser.add_argument('--elements', type=int, nargs=2, default=[1, 1], help='minimum and maximum elements by bid')
+    parser.add_argument('--supply', type=float, default=0.5, help='fraction of the units requested to sell')
+    parser.add_argument('--config', default='auction_server.yaml', help='configuration file')
+    parser.add_argument('--output', default=None, help='json file to write the results')
+    args = parser.parse_args()
+
+    Config(args.config)
+    generator = BidGenerator(args.seed, args.price_distribution, args.min_price, args.max_price,
+                             args.max_value_low, args.high_budget, args.quantities, args.elements)
+    results = run(args.mechanisms, args.sizes, generator, args.supply, args.seed, args.repeat)
+    for mechanism, by_size in results.items():
+        for size, result in by_size.items():
+            if 'error' in result:
+                print('{0:<32} {1:>6} bids {2}'.format(mechanism, size, result['error']))
+            else:
+                print('{0:<32} {1:>6} bids {2:10.4f} s {3:12d} bytes {4:7d} allocations {5:12.1f} allocations/s'.format(
+                    mechanism, size, result['seconds'], result['peak_memory'], result['allocations'],
+                    result['allocations_per_second']))
+
+    if args.output:
+        distributions = {'price_distribution': args.price_distribution, 'min_price': args.min_price,
+                         'max_price': args.max_price, 'max_value_low': args.max_value_low,
+                         'high_budget': args.high_budget, 'quantities': args.quantities,
+                         'elements': args.elements, 'supply': args.supply}
+        output = {'numpy': np.__version__, 'python': platform.python_version(), 'repeat': args.repeat,
+                  'seed': args.seed, 'bids': distributions, 'results': results}
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,9 @@ from datetime import datetime
 
 from foundation.parse_format import ParseFormats
 from foundation.config import Config
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import PYTHON_BACKEND
+from python_wrapper.ipap_codec import is_wire_compatible
 
 from utils.auction_utils import log
 from abc import ABC
@@ -25,6 +28,10 @@ class Agent(ABC):
         log_file_name = self.config['DefaultLogFile']
         self.logger = log(log_file_name).get_logger()
 
+        if IPAP_BACKEND == PYTHON_BACKEND and not is_wire_compatible():
+            self.logger.warning("the python ipap codec was not checked against libipap, agents using libipap "
+                                "may not read its messages")
+
         self.domain = ParseFormats.parse_int(Config().get_config_param('Main', 'Domain'))
         self.immediate_start = ParseFormats.parse_bool(Config().get_config_param('Main', 'ImmediateStart'))
 
@@ -1,4 +1,6 @@
 from python_wrapper.ipap_message import IpapMessage
+from python_wrapper.ipap_message_view import IpapMessageView
+from foundation.control_frame_cache import ControlFrameCache
 
 
 class AuctionMessageProcessor:
@@ -6,19 +8,47 @@ class AuctionMessageProcessor:
     # time in milliseconds
     TIMEOUT_SYN = 3000
 
-    def __init__(self, domain: int):
+    def __init__(self, domain: int, use_binary_frames: bool = False):
         self.domain = domain
+        self.use_binary_frames = use_binary_frames
+        self.control_frame_cache = ControlFrameCache()
 
     @staticmethod
-    def is_auction_message(msg: str) -> IpapMessage:
+    def is_auction_message(msg) -> IpapMessageView:
         """
         Establishes whether the given message is a valid auction message.
 
-        :param msg: message to verify
-        :return: An IpapMessage if it is a valid message, raise ValueError otherwise.
+        :param msg: message to verify, the text or the binary payload read from the websocket.
+        :return: A lazy view of the message if it is a valid message, raise ValueError otherwise. Templates and
+                 records are decoded when they are used.
         """
-        return IpapMessage(0, 0, True, msg)
+        return IpapMessageView(msg, True)
 
+    def get_frame(self, message: IpapMessage):
+        """
+        Encodes the message as the payload of a websocket frame.
+
+        :param message: message to encode
+        :return: bytes when binary frames are used, str otherwise.
+        """
+        if self.use_binary_frames:
+            return message.get_message_bytes()
+        else:
+            return message.get_message()
+
+    def get_ack_frame(self, sequence_nbr: int, ack_nbr: int):
+        """
+        Gets the payload of an ack message from the control frame cache.
+
+        :param sequence_nbr: sequence number for the message
+        :param ack_nbr: ack number to send within the message
+        :return: bytes when binary frames are used, str otherwise.
+        """
+        frame = self.control_frame_cache.get_frame(int(self.domain), False, True, False, sequence_nbr, ack_nbr)
+        if self.use_binary_frames:
+            return frame
+        else:
+            return frame.decode('latin-1')
 
     def build_syn_message(self, sequence_nbr: int) -> IpapMessage:
         """
@@ -0,0 +1,300 @@
+import sys
+from array import array
+
+import numpy as np
+from sortedcontainers import SortedList
+
+from foundation.bidding_object import BiddingObject
+from foundation.auctioning_object import AuctioningObjectType
+from foundation.config_param import ConfigParam
+from foundation.field_def_manager import DataType
+
+
+class BidBookEntry:
+    """
+    Owner of a row in the bid book, it has the attributes of AllocProc used to create allocations.
+    """
+
+    def __init__(self, auction_key: str, bidding_object_key: str, element_name: str, session_id: str):
+        self.auction_key = auction_key
+        self.bidding_object_key = bidding_object_key
+        self.element_name = element_name
+        self.session_id = session_id
+
+
+class BidBook:
+    """
+    Columnar book with the bids of an auction process, one row per bid element. Rows are stored in contiguous
+    arrays, so they can be read without copying by numpy.frombuffer.
+
+    Rows are appended when a bid is inserted and removed by moving the last row into the position released, so
+    row order is not the arrival order, which is kept in the arrivals column. The price order of the rows is kept
+    in a sorted list keyed by (-price, arrival), updated on every insert and delete in O(log n), so the rows can
+    be iterated in descending price order without sorting the book every period.
+
+    Attributes
+    ----------
+    prices: unit price of every row.
+    quantities: quantity requested by every row.
+    sessions: index of the session in session_ids.
+    active: 1 if the bid of the row is active.
+    arrivals: sequence number given when the row was inserted.
+    keys: key of the bid of every row.
+    element_names: element name of every row.
+    auction_keys: key of the auction of every row.
+    entries: BidBookEntry of every row.
+    order: (-price, arrival) of every row, sorted.
+    """
+
+    def __init__(self):
+        self.prices = array('d')
+        self.quantities = array('d')
+        self.sessions = array('l')
+        self.active = array('b')
+        self.arrivals = array('q')
+        self.keys = []
+        self.element_names = []
+        self.auction_keys = []
+        self.entries = []
+        self.order = SortedList()
+        self.row_by_arrival = {}
+        self.rows = {}
+        self.session_ids = []
+        self.session_index = {}
+        self.next_arrival = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, bidding_object_key: str):
+        return bidding_object_key in self.rows
+
+    def get_session_index(self, session_id: str) -> int:
+        """
+        Gets the index of a session, the session is registered the first time.
+
+        :param session_id: session id
+        :return: index in session_ids
+        """
+        index = self.session_index.get(session_id)
+        if index is None:
+            index = len(self.session_ids)
+            self.session_ids.append(session_id)
+            self.session_index[session_id] = index
+        return index
+
+    def insert(self, bidding_object: BiddingObject, active: bool = False):
+        """
+        Inserts the elements of a bid
+
+        :param bidding_object: bid to insert
+        :param active: whether or not the bid is active
+        """
+        key = bidding_object.get_key()
+        if key in self.rows:
+            raise ValueError("Bid {0} is already inserted in the bid book".format(key))
+
+        session_index = self.get_session_index(bidding_object.get_session())
+        # names are interned, so they are pickled once in the columns.
+        auction_key = sys.intern(bidding_object.get_parent_key())
+        rows = []
+        for element_name, config_params in bidding_object.elements.items():
+            rows.append(len(self.entries))
+            self.prices.append(float(config_params["unitprice"].get_typed_value()))
+            self.quantities.append(float(config_params["quantity"].get_typed_value()))
+            self.sessions.append(session_index)
+            self.active.append(1 if active else 0)
+            self.arrivals.append(self.next_arrival)
+            self.keys.append(key)
+            self.element_names.append(sys.intern(element_name))
+            self.auction_keys.append(auction_key)
+            self.entries.append(BidBookEntry(auction_key, key, element_name, bidding_object.get_session()))
+            self.order.add((-self.prices[-1], self.next_arrival))
+            self.row_by_arrival[self.next_arrival] = rows[-1]
+            self.next_arrival += 1
+        self.rows[key] = rows
+
+    def remove(self, bidding_object_key: str):
+        """
+        Removes the elements of a bid, every row is replaced by the last one and removed from the price order.
+
+        :param bidding_object_key: key of the bid to remove
+        """
+        rows = self.rows.pop(bidding_object_key, None)
+        if rows is None:
+            return
+
+        # rows are removed from the highest, so the last row is never one of the rows pending to remove.
+        for row in sorted(rows, reverse=True):
+            self.order.remove((-self.prices[row], self.arrivals[row]))
+            del self.row_by_arrival[self.arrivals[row]]
+
+            last = len(self.entries) - 1
+            if row != last:
+                self.prices[row] = self.prices[last]
+                self.quantities[row] = self.quantities[last]
+                self.sessions[row] = self.sessions[last]
+                self.active[row] = self.active[last]
+                self.arrivals[row] = self.arrivals[last]
+                self.keys[row] = self.keys[last]
+                self.element_names[row] = self.element_names[last]
+                self.auction_keys[row] = self.auction_keys[last]
+                entry = self.entries[last]
+                self.entries[row] = entry
+                moved_rows = self.rows[entry.bidding_object_key]
+                moved_rows[moved_rows.index(last)] = row
+                self.row_by_arrival[self.arrivals[row]] = row
+
+            self.prices.pop()
+            self.quantities.pop()
+            self.sessions.pop()
+            self.active.pop()
+            self.arrivals.pop()
+            self.keys.pop()
+            self.element_names.pop()
+            self.auction_keys.pop()
+            self.entries.pop()
+
+    def set_active(self, bidding_object_key: str, active: bool):
+        """
+        Sets whether or not a bid participates in the auction
+
+        :param bidding_object_key: key of the bid
+        :param active: True if it is active
+        """
+        for row in self.rows[bidding_object_key]:
+            self.active[row] = 1 if active else 0
+
+    def iter_rows(self):
+        """
+        Iterates the active rows in descending price order, rows with the same price in arrival order.
+
+        :return: generator of rows
+        """
+        for _, arrival in self.order:
+            row = self.row_by_arrival[arrival]
+            if self.active[row]:
+                yield row
+
+    def is_single_element(self) -> bool:
+        """
+        Checks whether or not every bid has one element
+
+        :return: True if there is a row by bid.
+        """
+        return len(self.entries) == len(self.rows)
+
+    def get_columns(self):
+        """
+        Copies the columns of the book, so an auction can be executed with them while bids change. Only arrays and
+        lists are copied, the copy is cheap to take and to pickle to a worker process.
+
+        :return: columns of the book
+        """
+        return BidBookColumns(self)
+
+    def build_bids(self) -> dict:
+        """
+        Builds the active bids of the book with the fields used by the modules.
+
+        :return: bids by key, in the order they were inserted.
+        """
+        return self.get_columns().build_bids()
+
+
+class BidBookColumns:
+    """
+    Copy of the columns of a bid book, given to the modules instead of the book when an auction is executed out of
+    the event loop. It reads as the book: prices, quantities, active and arrivals are arrays with the same rows,
+    and entries, iter_rows and is_single_element give the same results.
+
+    Attributes
+    ----------
+    prices: unit price of every row.
+    quantities: quantity requested by every row.
+    sessions: index of the session in session_ids.
+    active: 1 if the bid of the row is active.
+    arrivals: sequence number given when the row was inserted.
+    keys: key of the bid of every row.
+    element_names: element name of every row.
+    auction_keys: key of the auction of every row.
+    session_ids: session ids.
+    nbr_bids: number of bids in the book.
+    """
+
+    def __init__(self, bid_book: BidBook):
+        self.prices = array('d', bid_book.prices)
+        self.quantities = array('d', bid_book.quantities)
+        self.sessions = array('l', bid_book.sessions)
+        self.active = array('b', bid_book.active)
+        self.arrivals = array('q', bid_book.arrivals)
+        self.keys = list(bid_book.keys)
+        self.element_names = list(bid_book.element_names)
+        self.auction_keys = list(bid_book.auction_keys)
+        self.session_ids = list(bid_book.session_ids)
+        self.nbr_bids = len(bid_book.rows)
+        self._entries = None
+
+    def __getstate__(self):
+        # entries are built again from the columns.
+        state = self.__dict__.copy()
+        state['_entries'] = None
+        return state
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def entries(self) -> list:
+        """
+        Gets the BidBookEntry of every row, they are created the first time.
+
+        :return: entries by row
+        """
+        if self._entries is None:
+            session_ids = self.session_ids
+            self._entries = [BidBookEntry(auction_key, key, element_name, session_ids[session])
+                             for auction_key, key, element_name, session
+                             in zip(self.auction_keys, self.keys, self.element_names, self.sessions)]
+        return self._entries
+
+    def iter_rows(self):
+        """
+        Iterates the active rows in descending price order, rows with the same price in arrival order.
+
+        :return: generator of rows
+        """
+        rows = np.flatnonzero(np.frombuffer(self.active, dtype=np.int8))
+        order = np.lexsort((np.frombuffer(self.arrivals, dtype=np.int64)[rows], -np.frombuffer(self.prices)[rows]))
+        return iter(rows[order].tolist())
+
+    def is_single_element(self) -> bool:
+        """
+        Checks whether or not every bid has one element
+
+        :return: True if there is a row by bid.
+        """
+        return len(self.keys) == self.nbr_bids
+
+    def build_bids(self) -> dict:
+        """
+        Builds the active bids of the book with the fields used by the modules, for the modules that read them.
+
+        :return: bids by key, in the order they were inserted.
+        """
+        bids = {}
+        for row in sorted(range(0, len(self.keys)), key=self.arrivals.__getitem__):
+            if not self.active[row]:
+                continue
+
+            bidding_object_key = self.keys[row]
+            bid = bids.get(bidding_object_key)
+            if bid is None:
+                bid = BiddingObject(self.auction_keys[row], bidding_object_key, AuctioningObjectType.BID, {}, {})
+                bid.set_session(self.session_ids[self.sessions[row]])
+                bids[bidding_object_key] = bid
+
+            bid.elements[self.element_names[row]] = {
+                'quantity': ConfigParam('quantity', DataType.FLOAT, typed_value=self.quantities[row]),
+                'unitprice': ConfigParam('unitprice', DataType.DOUBLE, typed_value=self.prices[row])}
+        return bids
@@ -12,11 +12,25 @@ class ConfigParam:
     name : str : name of the configuration param
     p_type: str: type of the configuration param
     value : str: value as string.
+    typed_value: value as a python value (int, float or str) according to the type. Values are kept in the form
+                 they were given, the other one is created the first time it is requested.
     """
-    def __init__(self, name: str=None, p_type: DataType=None, value: str=None):
+    def __init__(self, name: str=None, p_type: DataType=None, value: str=None, typed_value=None):
         self.name = name
         self.type = p_type
-        self.value = value
+        self._value = value
+        self._typed_value = typed_value
+
+    @property
+    def value(self) -> str:
+        if self._value is None and self._typed_value is not None:
+            self._value = str(self._typed_value)
+        return self._value
+
+    @value.setter
+    def value(self, value: str):
+        self._value = value
+        self._typed_value = None
 
     def get_name(self) -> str:
         """
@@ -39,6 +53,23 @@ class ConfigParam:
         """
         return self.value
 
+    def get_typed_value(self):
+        """
+        Returns the value of the configuration param as a python value
+        :return: int for integer types, float for float and double types, str otherwise.
+        """
+        if self._typed_value is None and self._value is not None:
+            self._typed_value = ParseFormats.parse_typed(self.type, self._value)
+        return self._typed_value
+
+    def set_typed_value(self, value):
+        """
+        Sets the value of the configuration param as a python value, the text is created when it is requested.
+        :param value: value to set
+        """
+        self._typed_value = value
+        self._value = None
+
     def parse_config_item(self, item: Element):
         """
         Parse a configuration item from xml
@@ -0,0 +1,68 @@
+from struct import Struct
+
+from foundation.singleton import Singleton
+from python_wrapper.ipap_message import IpapMessage
+
+
+class ControlFrameCache(metaclass=Singleton):
+    """
+    Keeps control messages (syn, ack, fin) encoded once by flags and domain. Frames are given by copying the
+    encoded message and patching its sequence and ack sequence numbers, so no ipap message is created for them.
+
+    The offsets of the sequence numbers are found by encoding the message with known values, so the cache does
+    not depend on the message layout of the backend. The export time of cached frames is the time they were
+    first encoded.
+    """
+    SEQNO_PROBE = 0x5EC0A001
+    ACKSEQNO_PROBE = 0xAC0A5002
+    SEQUENCE_NUMBER = Struct('!I')
+
+    def __init__(self):
+        self.frames = {}
+
+    def _encode(self, domain: int, syn: bool, ack: bool, fin: bool) -> (bytes, int, int):
+        """
+        Encodes a control message and finds where its sequence numbers are stored.
+
+        :return: encoded message, offset of the sequence number, offset of the ack sequence number
+        """
+        message = IpapMessage(domain_id=domain, ipap_version=IpapMessage.IPAP_VERSION, _encode_network=True)
+        message.set_syn(syn)
+        message.set_ack(ack)
+        message.set_fin(fin)
+        message.set_seqno(self.SEQNO_PROBE)
+        message.set_ack_seq_no(self.ACKSEQNO_PROBE)
+        frame = message.get_message_bytes()
+
+        offsets = []
+        for probe in [self.SEQNO_PROBE, self.ACKSEQNO_PROBE]:
+            packed = self.SEQUENCE_NUMBER.pack(probe)
+            offset = frame.find(packed)
+            if offset < 0 or frame.find(packed, offset + 1) >= 0:
+                raise ValueError("The sequence numbers could not be located in the control message")
+            offsets.append(offset)
+
+        return frame, offsets[0], offsets[1]
+
+    def get_frame(self, domain: int, syn: bool, ack: bool, fin: bool, seqno: int, ackseqno: int) -> bytes:
+        """
+        Gets an encoded control message
+
+        :param domain: domain of the message
+        :param syn: whether or not the syn flag is set
+        :param ack: whether or not the ack flag is set
+        :param fin: whether or not the fin flag is set
+        :param seqno: sequence number for the message
+        :param ackseqno: ack number to send within the message
+        :return: the encoded message
+        """
+        key = (syn, ack, fin, domain)
+        entry = self.frames.get(key)
+        if entry is None:
+            entry = self.frames[key] = self._encode(domain, syn, ack, fin)
+
+        frame, seqno_offset, ackseqno_offset = entry
+        frame = bytearray(frame)
+        self.SEQUENCE_NUMBER.pack_into(frame, seqno_offset, seqno)
+        self.SEQUENCE_NUMBER.pack_into(frame, ackseqno_offset, ackseqno)
+        return bytes(frame)
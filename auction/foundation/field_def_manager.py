@@ -2,6 +2,7 @@
 import pathlib
 import yaml
 from foundation.singleton import Singleton
+from python_wrapper.ipap_codec import set_field_definitions
 from enum import Enum
 
 
@@ -45,6 +46,7 @@ class FieldDefManager(metaclass=Singleton):
         self.field_name_file = field_name_file
         self.field_value_file = field_value_file
         self.field_definitions = None
+        self.field_definitions_by_code = None
         self.field_values = None
 
         # Valid types are stored in lower cae
@@ -217,6 +219,13 @@ class FieldDefManager(metaclass=Singleton):
         self.field_definitions = dict()
         self._insert_field_defs(field_definitions)
 
+        # Index field definitions by (eno, ftype) for decoding records.
+        self.field_definitions_by_code = dict()
+        for name in self.field_definitions:
+            field = self.field_definitions[name]
+            # the first definition wins when two share the same code.
+            self.field_definitions_by_code.setdefault((field['eno'], field['ftype']), field)
+
     def _load_field_values(self, field_value_file=None):
         """
         Loads field values files. if not given as parameter, it reads the
@@ -292,10 +301,8 @@ class FieldDefManager(metaclass=Singleton):
         if self.field_definitions is None:
             self._load_field_definitions(self.field_name_file)
 
-        for name in self.field_definitions:
-            if self.field_definitions[name]['eno'] == eno \
-                    and self.field_definitions[name]['ftype'] == ftype:
-                return self.field_definitions[name]
+        if (eno, ftype) in self.field_definitions_by_code:
+            return self.field_definitions_by_code[(eno, ftype)]
 
         # Field not found
         raise ValueError("The field with eno:{0} ftype:{1} was not \
@@ -326,3 +333,7 @@ class FieldDefManager(metaclass=Singleton):
         # Value not found
         raise ValueError("The field value with field type:{0} and value:{1} was not \
                          found in the field value definition".format(str(field_type), str(value)))
+
+
+# The pure python ipap codec takes the fields of the field definition file from here.
+set_field_definitions(lambda: FieldDefManager().get_field_defs())
@@ -9,7 +9,7 @@ from foundation.parse_format import ParseFormats
 from python_wrapper.ipap_message import IpapMessage
 from python_wrapper.ipap_template import IpapTemplate
 from python_wrapper.ipap_template_container import IpapTemplateContainer
-from python_wrapper.ipap_data_record import IpapDataRecord
+from python_wrapper.ipap_template_codec import IpapTemplateCodec
 from python_wrapper.ipap_template import ObjectType
 
 from datetime import datetime
@@ -110,60 +110,34 @@ class IpapAllocationParser(IpapMessageParser):
 
         return allocation_ret
 
-    def include_data_record(self, template: IpapTemplate, allocation: Allocation, record_id: str,
+    def include_data_record(self, codec: IpapTemplateCodec, allocation: Allocation, record_id: str,
                             config_params: dict, message: IpapMessage):
 
-        ipap_data_record = IpapDataRecord(obj=None, templ_id=template.get_template_id())
-
-        # Insert the auction id field.
-        self.insert_string_field('auctionid', allocation.get_auction_key(), ipap_data_record)
-
-        # Insert the bidding object id field.
-        self.insert_string_field('biddingobjectid', allocation.get_bid_key(), ipap_data_record)
-
-        # Insert the allocation id field.
-        self.insert_string_field('allocationid', allocation.get_key(), ipap_data_record)
-
-        # Add the Record Id
-        self.insert_string_field('recordid', record_id, ipap_data_record)
-
-        # Add the Status
-        self.insert_integer_field('status', allocation.get_state().value, ipap_data_record)
-
-        # Add bidding_object type
-        self.insert_integer_field('biddingobjecttype', allocation.get_type().value, ipap_data_record)
+        values = {'auctionid': allocation.get_auction_key(),
+                  'biddingobjectid': allocation.get_bid_key(),
+                  'allocationid': allocation.get_key(),
+                  'recordid': record_id,
+                  'status': allocation.get_state().value,
+                  'biddingobjecttype': allocation.get_type().value}
 
         # Adds non mandatory fields.
-        mandatory_fields = template.get_template_type_mandatory_field(template.get_type())
-        self.include_non_mandatory_fields(mandatory_fields, config_params, ipap_data_record)
+        self.include_non_mandatory_values(codec, config_params, values)
 
         # Include the data record in the message.
-        message.include_data(template.get_template_id(), ipap_data_record)
+        message.include_data(codec.get_template_id(), codec.encode(values))
 
-    def include_options_record(self, template: IpapTemplate, allocation: Allocation, record_id: str,
+    def include_options_record(self, codec: IpapTemplateCodec, allocation: Allocation, record_id: str,
                                start: datetime, stop: datetime, message: IpapMessage):
 
-        ipap_record = IpapDataRecord(obj=None, templ_id=template.get_template_id())
-
-        # Insert the auction id field.
-        self.insert_string_field('auctionid', allocation.get_auction_key(), ipap_record)
-
-        # Insert the bidding object id field.
-        self.insert_string_field('biddingobjectid', allocation.get_bid_key(), ipap_record)
-
-        # Insert the allocation id field.
-        self.insert_string_field('allocationid', allocation.get_key(), ipap_record)
-
-        # Add the Record Id
-        self.insert_string_field('recordid', record_id, ipap_record)
-
-        # Add the start time - Unix time is seconds from 1970-1-1 .
-        self.insert_datetime_field('start', start, ipap_record)
-
-        # Add the end time.
-        self.insert_datetime_field('stop', stop, ipap_record)
+        # Unix time is seconds from 1970-1-1 for start and stop.
+        values = {'auctionid': allocation.get_auction_key(),
+                  'biddingobjectid': allocation.get_bid_key(),
+                  'allocationid': allocation.get_key(),
+                  'recordid': record_id,
+                  'start': start,
+                  'stop': stop}
 
-        message.include_data(template.get_template_id(), ipap_record)
+        message.include_data(codec.get_template_id(), codec.encode(values))
 
     def get_ipap_message(self, allocation: Allocation, template_container: IpapTemplateContainer) -> IpapMessage:
         """
@@ -190,13 +164,15 @@ class IpapAllocationParser(IpapMessageParser):
         message.make_template(option_template)
 
         # Include data records.
-        self.include_data_record(data_template, allocation, 'Record_1', allocation.config_params, message)
+        data_codec = template_container.get_codec(data_template_id, self.field_def_manager.get_field_by_code)
+        self.include_data_record(data_codec, allocation, 'Record_1', allocation.config_params, message)
 
         # Include option records.
+        option_codec = template_container.get_codec(option_template_id, self.field_def_manager.get_field_by_code)
         index = 1
         for interval in allocation.intervals:
             record_id = 'Record_{0}'.format(str(index))
-            self.include_options_record(option_template, allocation,
+            self.include_options_record(option_codec, allocation,
                                         record_id, interval.start, interval.stop, message)
             index = index + 1
 
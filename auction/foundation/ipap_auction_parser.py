@@ -70,7 +70,7 @@ class IpapAuctionParser(IpapMessageParser):
         Parse an auction from the ipap_message
 
         :param templates: templates for the auction
-        :param data_records: records for the auction
+        :param data_records: records (template_id, values) for the auction
         :param ipap_template_container: template container where we have to include the templates.
         :return: auction parsed.
         """
@@ -86,12 +86,16 @@ class IpapAuctionParser(IpapMessageParser):
 
         data_template, opts_template = self.insert_auction_templates(object_key.get_object_type(),
                                                                      templates, ipap_template_container)
+        data_codec = ipap_template_container.get_codec(data_template.get_template_id(),
+                                                       self.field_def_manager.get_field_by_code)
+        opts_codec = ipap_template_container.get_codec(opts_template.get_template_id(),
+                                                       self.field_def_manager.get_field_by_code)
+
         # Read data records
-        for data_record in data_records:
-            template_id = data_record.get_template_id()
+        for template_id, values in data_records:
             # Read a data record for a data template
             if template_id == data_template.get_template_id():
-                data_misc = self.read_record(data_template, data_record)
+                data_misc = self.read_record_values(data_codec.decode(values))
                 auction_key = self.extract_param(data_misc, 'auctionid')
                 auction_status = self.extract_param(data_misc, 'status')
                 resource_key = self.extract_param(data_misc, 'resourceid')
@@ -99,7 +103,7 @@ class IpapAuctionParser(IpapMessageParser):
                 nbr_data_read = nbr_data_read + 1
 
             if template_id == opts_template.get_template_id():
-                opts_misc = self.read_record(opts_template, data_record)
+                opts_misc = self.read_record_values(opts_codec.decode(values))
                 action_name = self.extract_param(opts_misc, 'algoritmname')
                 nbr_option_read = nbr_option_read + 1
 
@@ -138,7 +142,7 @@ class IpapAuctionParser(IpapMessageParser):
         auction_ret = []
 
         # Splits the message by object.
-        object_templates, object_data_records, templates_not_related = self.split(ipap_message)
+        object_templates, object_data_records, templates_not_related = self.split_records(ipap_message)
 
         # insert new templates not related (for example bidding templates to use for the auction) to the object.
         for template_id in templates_not_related:
@@ -148,7 +152,8 @@ class IpapAuctionParser(IpapMessageParser):
                     str(ipap_message.get_domain()),
                     str(template_id),
                     str(template.get_num_fields())))
-                ipap_template_container.add_template(template)
+                # the template is kept by the container after the message is released.
+                ipap_template_container.add_template(template.detach())
 
         # loop through data records and parse the auction data
         for object_key in object_data_records:
@@ -2,7 +2,7 @@ from python_wrapper.ipap_template import ObjectType
 from python_wrapper.ipap_message import IpapMessage
 from python_wrapper.ipap_template_container import IpapTemplateContainer
 from python_wrapper.ipap_template import IpapTemplate
-from python_wrapper.ipap_data_record import IpapDataRecord
+from python_wrapper.ipap_template_codec import IpapTemplateCodec
 
 from foundation.ipap_message_parser import IpapMessageParser
 from foundation.ipap_message_parser import IpapObjectKey
@@ -57,7 +57,7 @@ class IpapBiddingObjectParser(IpapMessageParser):
         Parse a bidding object from the ipap_message
 
         :param templates: templates for the auction
-        :param data_records: records for the auction
+        :param data_records: records (template_id, values) for the auction
         :param ipap_template_container: template container where we have to include the templates.
         :return: bidding object parsed.
         """
@@ -71,13 +71,17 @@ class IpapBiddingObjectParser(IpapMessageParser):
         data_template, opts_template = self.insert_auction_templates(object_key.get_object_type(),
                                                                      templates, ipap_template_container)
 
+        data_codec = ipap_template_container.get_codec(data_template.get_template_id(),
+                                                       self.field_def_manager.get_field_by_code)
+        opts_codec = ipap_template_container.get_codec(opts_template.get_template_id(),
+                                                       self.field_def_manager.get_field_by_code)
+
         # Read data records
         elements = {}
-        for data_record in data_records:
-            template_id = data_record.get_template_id()
+        for template_id, values in data_records:
             # Read a data record for a data template
             if template_id == data_template.get_template_id():
-                data_misc = self.read_record(data_template, data_record)
+                data_misc = self.read_record_values(data_codec.decode(values))
                 record_id = self.extract_param(data_misc, 'recordid').value
                 elements[record_id] = data_misc
                 # all records have the following same information.
@@ -92,7 +96,7 @@ class IpapBiddingObjectParser(IpapMessageParser):
 
             options = {}
             if template_id == opts_template.get_template_id():
-                opts_misc = self.read_record(opts_template, data_record)
+                opts_misc = self.read_record_values(opts_codec.decode(values))
                 record_id = self.extract_param(opts_misc, 'recordid').value
                 auction_key_tmp = self.extract_param(opts_misc, 'auctionid').value
                 bidding_object_key_tmp = self.extract_param(opts_misc, 'biddingobjectid').value
@@ -121,7 +125,7 @@ class IpapBiddingObjectParser(IpapMessageParser):
         bidding_object_ret = []
 
         # Splits the message by object.
-        object_templates, object_data_records, templates_not_related = self.split(ipap_message)
+        object_templates, object_data_records, templates_not_related = self.split_records(ipap_message)
 
         # loop through data records and parse the auction data
         for object_key in object_data_records:
@@ -132,58 +136,35 @@ class IpapBiddingObjectParser(IpapMessageParser):
 
         return bidding_object_ret
 
-    def include_data_record(self, template: IpapTemplate, bidding_object: BiddingObject, record_id: str,
+    def include_data_record(self, codec: IpapTemplateCodec, bidding_object: BiddingObject, record_id: str,
                             config_params: dict, message: IpapMessage):
 
-        ipap_data_record = IpapDataRecord(obj=None, templ_id=template.get_template_id())
-
-        # Insert the auction id field.
-        self.insert_string_field('auctionid', bidding_object.get_parent_key(), ipap_data_record)
-
-        # Insert the bidding object id field.
-        self.insert_string_field('biddingobjectid', bidding_object.get_key(), ipap_data_record)
-
-        # Add the Record Id
-        self.insert_string_field('recordid', record_id, ipap_data_record)
-
-        # Add the Status
-        self.insert_integer_field('status', bidding_object.get_state().value, ipap_data_record)
-
-        # Add bidding_object type
-        self.insert_integer_field('biddingobjecttype', bidding_object.get_type().value, ipap_data_record)
+        values = {'auctionid': bidding_object.get_parent_key(),
+                  'biddingobjectid': bidding_object.get_key(),
+                  'recordid': record_id,
+                  'status': bidding_object.get_state().value,
+                  'biddingobjecttype': bidding_object.get_type().value}
 
         # Adds non mandatory fields.
-        mandatory_fields = template.get_template_type_mandatory_field(template.get_type())
-        self.include_non_mandatory_fields(mandatory_fields, config_params, ipap_data_record)
+        self.include_non_mandatory_values(codec, config_params, values)
 
         # Include the data record in the message.
-        message.include_data(template.get_template_id(), ipap_data_record)
+        message.include_data(codec.get_template_id(), codec.encode(values))
 
-    def include_options_record(self, template: IpapTemplate, bidding_object: BiddingObject, record_id: str,
+    def include_options_record(self, codec: IpapTemplateCodec, bidding_object: BiddingObject, record_id: str,
                                start: datetime, stop: datetime, config_params: dict, message: IpapMessage):
 
-        ipap_record = IpapDataRecord(obj=None, templ_id=template.get_template_id())
-
-        # Insert the auction id field.
-        self.insert_string_field('auctionid', bidding_object.get_parent_key(), ipap_record)
-
-        # Insert the bidding object id field.
-        self.insert_string_field('biddingobjectid', bidding_object.get_key(), ipap_record)
-
-        # Add the Record Id
-        self.insert_string_field('recordid', record_id, ipap_record)
-
-        # Add the start time - Unix time is seconds from 1970-1-1 .
-        self.insert_datetime_field('start', start, ipap_record)
-
-        # Add the end time.
-        self.insert_datetime_field('stop', stop, ipap_record)
+        # Unix time is seconds from 1970-1-1 for start and stop.
+        values = {'auctionid': bidding_object.get_parent_key(),
+                  'biddingobjectid': bidding_object.get_key(),
+                  'recordid': record_id,
+                  'start': start,
+                  'stop': stop}
 
         # Adds non mandatory fields.
-        mandatory_fields = template.get_template_type_mandatory_field(template.get_type())
-        self.include_non_mandatory_fields(mandatory_fields, config_params, ipap_record)
+        self.include_non_mandatory_values(codec, config_params, values)
 
-        message.include_data(template.get_template_id(), ipap_record)
+        message.include_data(codec.get_template_id(), codec.encode(values))
 
     def get_ipap_message(self, bidding_object: BiddingObject, auction: Auction,
                          template_container: IpapTemplateContainer, message: IpapMessage):
@@ -206,13 +187,15 @@ class IpapBiddingObjectParser(IpapMessageParser):
         message.make_template(option_template)
 
         # Include data records.
+        data_codec = template_container.get_codec(data_template_id, self.field_def_manager.get_field_by_code)
         for element_name in bidding_object.elements:
             config_params = bidding_object.elements[element_name]
-            self.include_data_record(data_template, bidding_object, element_name, config_params, message)
+            self.include_data_record(data_codec, bidding_object, element_name, config_params, message)
 
         # Include option records.
+        option_codec = template_container.get_codec(option_template_id, self.field_def_manager.get_field_by_code)
         for option_name in bidding_object.options:
             interval = bidding_object.calculate_interval(option_name)
             config_params = bidding_object.options[option_name]
-            self.include_options_record(option_template, bidding_object,
+            self.include_options_record(option_codec, bidding_object,
                                         option_name, interval.start, interval.stop, config_params, message)
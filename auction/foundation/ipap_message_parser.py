@@ -4,6 +4,7 @@ from python_wrapper.ipap_data_record import IpapDataRecord
 from python_wrapper.ipap_field import IpapField
 from python_wrapper.ipap_field_container import IpapFieldContainer
 from python_wrapper.ipap_template_container import IpapTemplateContainer
+from python_wrapper.ipap_template_codec import IpapTemplateCodec
 
 from foundation.field_def_manager import FieldDefManager
 from foundation.config_param import ConfigParam
@@ -255,7 +256,8 @@ class IpapMessageParser:
                     template.get_template_id()))
 
         else:
-            ipap_template_container.add_template(template)
+            # the template may be borrowed from a message, it is detached to outlive it.
+            ipap_template_container.add_template(template.detach())
 
     @staticmethod
     def parse_type(s_type: str) -> ObjectType:
@@ -299,6 +301,16 @@ class IpapMessageParser:
         else:
             raise ValueError("invalid object type, it does not represent a valid auctioning object type")
 
+    def get_field_type(self, eno: int, ftype: int) -> str:
+        """
+        Gets the data type name of a field, given to IpapMessage.extract_records to read the values of the records.
+
+        :param eno: enterprise number
+        :param ftype: field type
+        :return: data type name, e.g. 'UINT32'
+        """
+        return self.field_def_manager.get_field_by_code(eno, ftype)['type'].name
+
     def get_domain(self) -> int:
         """
         Get the domaid id used by the ipapmessage.The domain id corresponds to the agent identifier.
@@ -321,13 +333,43 @@ class IpapMessageParser:
 
             # ipap_field_value.print_value()
 
-            ipap_field = template.get_field(ipap_field_key.get_eno(), ipap_field_key.get_ftype())
+            ipap_field = self.field_container.get_field(ipap_field_key.get_eno(), ipap_field_key.get_ftype())
             config_param = ConfigParam(name=f_item['key'],
                                        p_type=f_item['type'],
                                        value=ipap_field.write_value(ipap_field_value))
             config_params[config_param.name] = config_param
         return config_params
 
+    @staticmethod
+    def read_record_values(values: dict) -> dict:
+        """
+        Reads a data record decoded by IpapMessage.extract_records and IpapTemplateCodec.decode
+
+        :param values: (type, value) by field name
+        :return: config values
+        """
+        config_params = {}
+        for name, (p_type, value) in values.items():
+            if isinstance(value, str):
+                config_params[name] = ConfigParam(name=name, p_type=p_type, value=value)
+            else:
+                # numbers are kept typed, their text is created when it is requested.
+                config_params[name] = ConfigParam(name=name, p_type=p_type, typed_value=value)
+        return config_params
+
+    @staticmethod
+    def include_non_mandatory_values(codec: IpapTemplateCodec, config_params: dict, values: dict):
+        """
+        Includes non mandatory fields in the values of a record
+
+        :param codec: codec of the record's template
+        :param config_params: params to include. We should check that are non mandatory fields.
+        :param values: values by field name where we want to include config params
+        """
+        for item in config_params.values():
+            if not codec.is_mandatory(item.name):
+                values[item.name] = item.get_typed_value()
+
     def get_misc_val(self, config_items: dict, item_name: str) -> str:
 
         if item_name in config_items:
@@ -410,6 +452,63 @@ class IpapMessageParser:
 
         return object_templates, object_data_records, templates_not_related
 
+    def split_records(self, ipap_message: IpapMessage) -> (dict, dict, dict):
+        """
+        parse the ipap message by splitting message data by object key ( Auctions, Bids, Allocations).
+        Data records are decoded in one pass, so they are returned as (template_id, values) tuples.
+
+        :param ipap_message: message to parse
+        :return: templates, records and templates not related with a record.
+        """
+        templates_included = {}
+        object_templates = {}
+        object_data_records = {}
+        templates_not_related = {}
+
+        for template_id, values in ipap_message.extract_records(field_type=self.get_field_type):
+            if template_id not in templates_included:
+                try:
+                    template = ipap_message.get_template_object(template_id)
+
+                except ValueError:
+                    raise ValueError("required template not included in the message")
+
+                templ_type = template.get_type()
+                key_fields = [(key_field.get_eno(), key_field.get_ftype())
+                              for key_field in template.get_template_type_key_field(templ_type)]
+                templates_included[template_id] = (template, template.get_object_type(templ_type), key_fields)
+
+            template, object_type, key_fields = templates_included[template_id]
+
+            # Obtain template keys
+            data_key = ''
+            for key_field in key_fields:
+                if key_field not in values:
+                    raise ValueError("error while reading data record - error: Field {0}.{1} given was not found "
+                                     "in data record".format(str(key_field[0]), str(key_field[1])))
+                data_key = data_key + str(values[key_field])
+
+            ipap_object_key = IpapObjectKey(object_type, data_key)
+
+            if ipap_object_key not in object_templates:
+                object_templates[ipap_object_key] = []
+
+            if template not in object_templates[ipap_object_key]:
+                object_templates[ipap_object_key].append(template)
+
+            if ipap_object_key not in object_data_records:
+                object_data_records[ipap_object_key] = []
+
+            object_data_records[ipap_object_key].append((template_id, values))
+
+        # Copy templates from message that are not related with a record data
+        templates = ipap_message.get_template_list()
+        for template_id in templates:
+            if template_id not in templates_included:
+                templates_not_related[template_id] = ipap_message.get_template_object(template_id)
+
+        return object_templates, object_data_records, templates_not_related
+
     def insert_string_field(self, field_name: str, value: str, record: IpapDataRecord):
         """
         Inserts a field value in the data record given as parameter
@@ -2,6 +2,8 @@ from abc import ABCMeta
 from abc import abstractmethod
 from datetime import datetime
 from foundation.field_value import FieldValue
+from foundation.bid_book import BidBook
+from foundation.random_stream import RandomStream
 
 from typing import Dict
 from enum import Enum
@@ -44,6 +46,7 @@ class Module(metaclass=ABCMeta):
 
         :param config_param_list: Configuration parameters list to
                                    be used on the module.
+        :return: parameters compiled for execute, or None to execute with the configuration parameters.
         """
         pass
 
@@ -55,14 +58,19 @@ class Module(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def execute(self, request_params: Dict[str, FieldValue], auction_key: str, start:datetime, stop:datetime, bids: dict) -> list:
+    def execute(self, request_params: Dict[str, FieldValue], auction_key: str, start:datetime, stop:datetime,
+                bids: dict, bid_book: BidBook=None, random_stream: RandomStream=None) -> list:
         """
         Executes the module (bidding process)
 
+        :param request_params: parameters returned by init_module, or the configuration parameters.
         :param auction_key: auction key
         :param start: start datetime
         :param stop: stop datetime
         :param bids: bids for the allocation process.
+        :param bid_book: bid book of the auction process or its columns, when given its active rows are the bids'
+                         elements.
+        :param random_stream: random stream of the auction period, modules drawing random numbers should use it.
         :return:
         """
         pass
@@ -91,6 +99,15 @@ class Module(metaclass=ABCMeta):
         """
         pass
 
+    def uses_bids(self) -> bool:
+        """
+        Tells whether or not execute reads the bids when it is given the bid book. When it does not, executions out
+        of the event loop give it an empty dictionary instead of building the bids from the book.
+
+        :return: True if execute reads the bids
+        """
+        return True
+
     def set_own_name(self, own_name:str):
         """
         Sets own name
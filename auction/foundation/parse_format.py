@@ -10,6 +10,9 @@ class ParseFormats:
     """
     Class for parse value in string to different types
     """
+    INTEGER_TYPES = {DataType.INT8, DataType.INT16, DataType.INT32, DataType.INT64,
+                     DataType.UINT8, DataType.UINT16, DataType.UINT32, DataType.UINT64}
+    FLOAT_TYPES = {DataType.FLOAT, DataType.DOUBLE}
 
     @staticmethod
     def parse_long(value: str) -> int:
@@ -218,6 +221,22 @@ class ParseFormats:
         else:
             raise ValueError("Unsupported type: {0}".format(c_type))
 
+    @staticmethod
+    def parse_typed(c_type: DataType, value: str):
+        """
+        Parses a value to the python type used for a given type
+
+        :param c_type: type of the value
+        :param value: value to parse
+        :return: int for integer types, float for float and double types, the value given otherwise.
+        """
+        if c_type in ParseFormats.INTEGER_TYPES:
+            return int(value)
+        elif c_type in ParseFormats.FLOAT_TYPES:
+            return float(value)
+        else:
+            return value
+
     @staticmethod
     def parse_item(c_type: DataType, value: str):
         """
@@ -0,0 +1,40 @@
+import hashlib
+import random
+from datetime import datetime
+
+import numpy as np
+
+
+class RandomStream:
+    """
+    Random numbers used by a module to execute an auction period. The stream is seeded from the seed of the
+    auction process, the auction key and the period start, so executing the period again with the same bids gives
+    the same allocations, in the event loop, in a worker process or when the period is replayed.
+
+    Attributes
+    ----------
+    seed: seed derived for the period.
+    random: python generator, used by uniform.
+    generator: numpy generator, used by the clearing kernels.
+    """
+
+    def __init__(self, seed: int, auction_key: str, start: datetime):
+        """
+        Creates the stream of a period
+
+        :param seed: seed of the auction process
+        :param auction_key: auction key
+        :param start: period start
+        """
+        text = "{0}:{1}:{2}".format(str(seed), auction_key, start.isoformat())
+        self.seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], 'big')
+        self.random = random.Random(self.seed)
+        self.generator = np.random.default_rng(self.seed)
+
+    def uniform(self) -> float:
+        """
+        Gets a sample of the uniform distribution in [0, 1)
+
+        :return: sample
+        """
+        return self.random.random()
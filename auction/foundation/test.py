@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from foundation.field_def_manager import FieldDefManager
 from foundation.field_def_manager import DataType
@@ -8,8 +9,13 @@ from foundation.module_loader import ModuleLoader
 from foundation.database_manager import DataBaseManager
 from foundation.config import Config
 from foundation.field_value import FieldValue
+from foundation.config_param import ConfigParam
+from foundation.bidding_object import BiddingObject
+from foundation.auctioning_object import AuctioningObjectType
+from foundation.bid_book import BidBook
 from foundation.specific_field_value import SpecificFieldValue
 from foundation.id_source import IdSource
+from foundation.control_frame_cache import ControlFrameCache
 
 from python_wrapper.ipap_template import ObjectType
 from python_wrapper.ipap_template import TemplateType
@@ -105,6 +111,128 @@ class SpecificFieldValueTest(unittest.TestCase):
         self.assertEqual(field_value.value, "asdasd")
 
 
+class ConfigParamTest(unittest.TestCase):
+
+    def test_typed_value(self):
+        config_param = ConfigParam(name="quantity", p_type=DataType.DOUBLE, value="10.5")
+        self.assertEqual(config_param.get_typed_value(), 10.5)
+
+        config_param.set_typed_value(11.5)
+        self.assertEqual(config_param.get_typed_value(), 11.5)
+        self.assertEqual(config_param.get_value(), "11.5")
+
+        config_param = ConfigParam(name="auctionid", p_type=DataType.UINT64, typed_value=3)
+        self.assertEqual(config_param.value, "3")
+
+        config_param.value = "4"
+        self.assertEqual(config_param.get_typed_value(), 4)
+
+
+class BidBookTest(unittest.TestCase):
+
+    @staticmethod
+    def create_bid(key: str, session: str, elements: list) -> BiddingObject:
+        bid_elements = {}
+        for i, (quantity, price) in enumerate(elements):
+            bid_elements['element{0}'.format(str(i))] = {
+                'quantity': ConfigParam(name="quantity", p_type=DataType.DOUBLE, typed_value=quantity),
+                'unitprice': ConfigParam(name="unitprice", p_type=DataType.DOUBLE, typed_value=price)}
+        bid = BiddingObject('1.1', key, AuctioningObjectType.BID, bid_elements, {})
+        bid.set_session(session)
+        return bid
+
+    def test_insert_remove(self):
+        bid_book = BidBook()
+        bid_book.insert(self.create_bid('1.bid1', 'session1', [(10, 0.5), (5, 0.3)]))
+        bid_book.insert(self.create_bid('1.bid2', 'session2', [(8, 0.4)]), active=True)
+        bid_book.insert(self.create_bid('1.bid3', 'session1', [(6, 0.2)]))
+        self.assertEqual(len(bid_book), 4)
+        self.assertFalse(bid_book.is_single_element())
+        self.assertEqual(list(bid_book.sessions), [0, 0, 1, 0])
+        self.assertEqual(list(bid_book.active), [0, 0, 1, 0])
+
+        with self.assertRaises(ValueError):
+            bid_book.insert(self.create_bid('1.bid2', 'session2', [(8, 0.4)]))
+
+        # the last rows take the place of the rows removed.
+        bid_book.remove('1.bid1')
+        self.assertEqual(len(bid_book), 2)
+        self.assertTrue(bid_book.is_single_element())
+        self.assertEqual(list(bid_book.prices), [0.4, 0.2])
+        self.assertEqual(list(bid_book.quantities), [8, 6])
+        self.assertEqual(list(bid_book.arrivals), [2, 3])
+        self.assertEqual([entry.bidding_object_key for entry in bid_book.entries], ['1.bid2', '1.bid3'])
+
+        bid_book.set_active('1.bid3', True)
+        bid_book.set_active('1.bid2', False)
+        self.assertEqual(list(bid_book.active), [0, 1])
+
+        bid_book.remove('1.bid2')
+        bid_book.remove('1.bid2')
+        self.assertEqual(len(bid_book), 1)
+        self.assertTrue('1.bid3' in bid_book)
+        self.assertEqual(bid_book.entries[0].session_id, 'session1')
+
+    def test_iter_rows(self):
+        bid_book = BidBook()
+        bid_book.insert(self.create_bid('1.bid1', 'session1', [(10, 0.3), (5, 0.5)]), active=True)
+        bid_book.insert(self.create_bid('1.bid2', 'session2', [(8, 0.4)]), active=True)
+        bid_book.insert(self.create_bid('1.bid3', 'session1', [(6, 0.3)]), active=True)
+        bid_book.insert(self.create_bid('1.bid4', 'session3', [(7, 0.6)]))
+
+        def iter_keys():
+            return [(bid_book.entries[row].bidding_object_key, bid_book.prices[row]) for row in bid_book.iter_rows()]
+
+        self.assertEqual(iter_keys(), [('1.bid1', 0.5), ('1.bid2', 0.4), ('1.bid1', 0.3), ('1.bid3', 0.3)])
+
+        bid_book.remove('1.bid1')
+        bid_book.set_active('1.bid4', True)
+        bid_book.insert(self.create_bid('1.bid5', 'session1', [(6, 0.4)]), active=True)
+        self.assertEqual(iter_keys(), [('1.bid4', 0.6), ('1.bid2', 0.4), ('1.bid5', 0.4), ('1.bid3', 0.3)])
+
+    def test_build_bids(self):
+        bid_book = BidBook()
+        bid_book.insert(self.create_bid('1.bid1', 'session1', [(10, 0.3), (5, 0.5)]), active=True)
+        bid_book.insert(self.create_bid('1.bid2', 'session2', [(8, 0.4)]))
+        bid_book.insert(self.create_bid('1.bid3', 'session1', [(6, 0.3)]), active=True)
+
+        bids = bid_book.build_bids()
+        self.assertEqual(list(bids.keys()), ['1.bid1', '1.bid3'])
+        bid = bids['1.bid1']
+        self.assertEqual(bid.get_parent_key(), '1.1')
+        self.assertEqual(bid.get_session(), 'session1')
+        self.assertEqual(list(bid.elements.keys()), ['element0', 'element1'])
+        self.assertEqual(bid.elements['element1']['quantity'].get_typed_value(), 5)
+        self.assertEqual(bid.elements['element1']['unitprice'].get_typed_value(), 0.5)
+
+    def test_columns(self):
+        bid_book = BidBook()
+        bid_book.insert(self.create_bid('1.bid1', 'session1', [(10, 0.3), (5, 0.5)]), active=True)
+        bid_book.insert(self.create_bid('1.bid2', 'session2', [(8, 0.4)]))
+        bid_book.insert(self.create_bid('1.bid3', 'session1', [(6, 0.3)]), active=True)
+        bid_book.insert(self.create_bid('1.bid4', 'session3', [(7, 0.6)]), active=True)
+        bid_book.remove('1.bid2')
+
+        # the columns are a copy, the book changes afterwards are not seen.
+        columns = bid_book.get_columns()
+        bid_book.insert(self.create_bid('1.bid5', 'session1', [(6, 0.9)]), active=True)
+        bid_book.remove('1.bid1')
+
+        columns = pickle.loads(pickle.dumps(columns))
+        self.assertEqual(len(columns), 4)
+        self.assertFalse(columns.is_single_element())
+        self.assertEqual([(columns.entries[row].bidding_object_key, columns.entries[row].element_name,
+                           columns.entries[row].session_id, columns.prices[row]) for row in columns.iter_rows()],
+                         [('1.bid4', 'element0', 'session3', 0.6), ('1.bid1', 'element1', 'session1', 0.5),
+                          ('1.bid1', 'element0', 'session1', 0.3), ('1.bid3', 'element0', 'session1', 0.3)])
+
+        bids = columns.build_bids()
+        self.assertEqual(list(bids.keys()), ['1.bid1', '1.bid3', '1.bid4'])
+        self.assertEqual(list(bids['1.bid1'].elements.keys()), ['element0', 'element1'])
+        self.assertEqual(bids['1.bid4'].get_session(), 'session3')
+        self.assertEqual(bids['1.bid4'].elements['element0']['quantity'].get_typed_value(), 7)
+
+
 class IpapMessageParserTest(unittest.TestCase):
 
     def setUp(self):
@@ -443,3 +571,25 @@ class SourceIdUniqueTest(unittest.TestCase):
 
         self.assertEqual(id4, 4)
         print(self.id_source.num)
+
+
+class ControlFrameCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.control_frame_cache = ControlFrameCache()
+
+    def test_get_frame(self):
+        frame = self.control_frame_cache.get_frame(10, False, True, False, 12, 34)
+        message = IpapMessage.from_buffer(frame)
+        self.assertEqual(message.get_ack(), True)
+        self.assertEqual(message.get_syn(), False)
+        self.assertEqual(message.get_seqno(), 12)
+        self.assertEqual(message.get_ackseqno(), 34)
+        self.assertEqual(message.get_domain(), 10)
+
+        # the frame cached is patched with new sequence numbers.
+        frame = self.control_frame_cache.get_frame(10, False, True, False, 13, 35)
+        message = IpapMessage.from_buffer(frame)
+        self.assertEqual(message.get_seqno(), 13)
+        self.assertEqual(message.get_ackseqno(), 35)
+        self.assertIn((False, True, False, 10), self.control_frame_cache.frames)
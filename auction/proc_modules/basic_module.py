@@ -1,17 +1,21 @@
 from foundation.module import Module
 from foundation.field_value import FieldValue
-from foundation.parse_format import ParseFormats
 from foundation.config_param import ConfigParam
 from foundation.bidding_object import BiddingObject
 from foundation.auction import AuctioningObjectType
+from foundation.bid_book import BidBook
+from foundation.random_stream import RandomStream
 
 from proc_modules.proc_module import ProcModule
-from proc_modules.proc_module import AllocProc
+from proc_modules.proc_module import AuctionParameters
+from proc_modules.clearing_kernels import BidArrays
+from proc_modules.clearing_kernels import uniform_price
+from proc_modules.clearing_kernels import materialize_allocations
 
 from datetime import datetime
 from utils.auction_utils import log
 from typing import Dict
-from collections import defaultdict
+from typing import Union
 
 
 class BasicModule(Module):
@@ -25,15 +29,18 @@ class BasicModule(Module):
         self.domain = 0
         self.proc_module = ProcModule()
 
-    def init_module(self, config_params: Dict[str, FieldValue]):
+    def init_module(self, config_params: Dict[str, FieldValue]) -> AuctionParameters:
         """
         Initializes the module
-        
+
         :param config_params: dictionary with the given configuration parameters
+        :return: parameters compiled, the auction process keeps them to execute the auction.
         """
         self.logger.debug('in init_module')
         self.config_params = config_params
-        self.domain = self.proc_module.get_param_value('domainid', config_params)
+        params = self.proc_module.compile_params(config_params)
+        self.domain = params.domainid
+        return params
 
     def destroy_module(self):
         """
@@ -42,16 +49,19 @@ class BasicModule(Module):
         """
         print('in destroy_module')
 
-    def execute(self, request_params: Dict[str, FieldValue], auction_key: str,
-                start: datetime, stop: datetime, bids: dict) -> list:
+    def execute(self, request_params: Union[AuctionParameters, Dict[str, FieldValue]], auction_key: str,
+                start: datetime, stop: datetime, bids: dict, bid_book: BidBook = None,
+                random_stream: RandomStream = None) -> list:
         """
         Executes the auction procedure for an specific auction.
 
-        :param request_params: request params included
+        :param request_params: auction parameters, as compiled by init_module or as field values
         :param auction_key: auction key identifying the auction
         :param start: start datetime
         :param stop: stop datetime
         :param bids: bidding objects included
+        :param bid_book: bid book of the auction process
+        :param random_stream: random stream of the auction period, not used as the mechanism is deterministic.
         :return:
         """
         self.logger.debug("bas module: start execute num bids:{0}".format(str(len(bids))))
@@ -60,8 +70,9 @@ class BasicModule(Module):
             self.logger.info("Bid key in auction process:{0}".format(bid_key))
 
         tot_demand = self.proc_module.calculate_requested_quantities(bids)
-        bandwidth_to_sell = self.proc_module.get_param_value('bandwidth', request_params)
-        reserve_price = self.proc_module.get_param_value('reserveprice', request_params)
+        params = self.proc_module.get_auction_params(request_params)
+        bandwidth_to_sell = params.bandwidth
+        reserve_price = params.reserveprice
 
         # Order bids classifying them by whether they compete on the low and high auction.
         bids_low_rct, bids_high_rct = self.proc_module.separate_bids(bids, 0.5)
@@ -70,66 +81,14 @@ class BasicModule(Module):
         nl = self.proc_module.calculate_requested_quantities(bids_low_rct)
         nh = self.proc_module.calculate_requested_quantities(bids_high_rct)
 
-        ordered_bids = defaultdict(list)
-        for bidding_object_key in bids:
-            bidding_object = bids[bidding_object_key]
-            elements = bidding_object.elements
-            for element_name in elements:
-                config_params = elements[element_name]
-                price = ParseFormats.parse_float(config_params["unitprice"].value)
-                quantity = ParseFormats.parse_float(config_params["quantity"].value)
-                alloc = AllocProc(bidding_object.get_parent_key(), bidding_object.get_key(),
-                                  element_name, bidding_object.get_session(), quantity, price)
-                ordered_bids[price].append(alloc)
-
-        qty_available = bandwidth_to_sell
-        sell_price = 0
-
-        self.logger.debug("bas module - qty available:{0}".format(qty_available))
-
-        sorted_prices = sorted(ordered_bids.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp = ordered_bids[price]
-
-            if price < reserve_price:
-                for i in range(0, len(alloc_temp)):
-                    alloc_temp[i].quantity = 0
-            else:
-                for i in range(0, len(alloc_temp)):
-                    if qty_available < alloc_temp[i].quantity:
-                        alloc_temp[i].quantity = qty_available
-                        if qty_available > 0:
-                            sell_price = price
-                            qty_available = 0
-                    else:
-                        qty_available = qty_available - alloc_temp[i].quantity
-                        sell_price = price
-
-        # There are more units available than requested
-        if qty_available > 0:
-            sell_price = reserve_price
-
-        self.logger.debug("bas module: after executing the auction")
-
-        allocations = {}
-
-        # Creates allocations
-        sorted_prices = sorted(ordered_bids.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp = ordered_bids[price]
-            for i in range(0, len(alloc_temp)):
-                key = self.proc_module.make_key(alloc_temp[i].auction_key, alloc_temp[i].bidding_object_key)
-                if key in allocations:
-                    self.proc_module.increment_quantity_allocation(allocations[alloc_temp[i].bidding_object_key],
-                                                       alloc_temp[i].quantity)
-                else:
-                    allocation = self.proc_module.create_allocation(self.domain, alloc_temp[i].session_id,
-                                                        alloc_temp[i].bidding_object_key,
-                                                        start, stop,
-                                                        alloc_temp[i].quantity,
-                                                        sell_price)
-
-                    allocations[key] = allocation
+        if bid_book is not None:
+            bid_arrays = BidArrays.from_bid_book(bid_book)
+        else:
+            bid_arrays = BidArrays(self.proc_module.sort_bids_by_price(bids))
+        allocated, sell_price, qty_available = uniform_price(bid_arrays.prices, bid_arrays.quantities,
+                                                             bandwidth_to_sell, reserve_price)
+        allocations = materialize_allocations(self.proc_module, self.domain, start, stop,
+                                              bid_arrays.allocs, allocated, sell_price)
 
         # Convert from the map to the final allocationDB result
         allocation_res = []
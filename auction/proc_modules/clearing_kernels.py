@@ -0,0 +1,278 @@
+"""
+Clearing kernels shared by the auction mechanisms.
+
+Bids are given as arrays of prices, quantities and owners (AllocProc) sorted by price in descending order, and
+auctions are cleared with array operations. Allocations are created once at the end by materialize_allocations.
+"""
+from datetime import datetime
+from typing import DefaultDict
+
+from foundation.bid_book import BidBook
+
+from proc_modules.proc_module import ProcModule
+from proc_modules.proc_module import RampSums
+
+import numpy as np
+
+
+class BidArrays:
+    """
+    Bids of an auction as arrays sorted by price in descending order, bids with the same price keep the order
+    they have in the list of their price.
+
+    attributes
+    ----------
+    allocs: list of AllocProc, the owner of every position.
+    prices: price used to order the bids, it can differ from the price bid when subsidies are applied.
+    quantities: quantities requested.
+    original_prices: prices bid.
+    """
+
+    def __init__(self, ordered_bids: DefaultDict[float, list]):
+        """
+        Creates the arrays
+
+        :param ordered_bids: allocation requests by price, as given by ProcModule.sort_bids_by_price
+        """
+        allocs = []
+        prices = []
+        for price, alloc_temp in ordered_bids.items():
+            allocs.extend(alloc_temp)
+            prices.extend([price] * len(alloc_temp))
+
+        prices = np.asarray(prices, dtype=float)
+        order = np.argsort(-prices, kind='stable')
+        self.allocs = [allocs[i] for i in order]
+        self.prices = prices[order]
+        self.quantities = np.array([alloc.quantity for alloc in self.allocs], dtype=float)
+        self.original_prices = np.array([alloc.original_price for alloc in self.allocs], dtype=float)
+
+    @classmethod
+    def from_bid_book(cls, bid_book: BidBook, discriminatory_price: float = 0, subsidy: float = 1):
+        """
+        Creates the arrays from the active rows of a bid book, the columns are read without parsing the bids and
+        rows are taken in the price order of the book. Bids with the same price are kept in arrival order, as they
+        are by ProcModule.sort_bids_by_price.
+
+        :param bid_book: bid book of the auction process
+        :param discriminatory_price: price to applies subsidies
+        :param subsidy: value by which we multiply prices lower than the discriminatory price
+        :return: bid arrays
+        """
+        book_prices = np.frombuffer(bid_book.prices)
+        if discriminatory_price > 0:
+            # subsidies change the price order of the book, so bids are sorted by the subsidized prices.
+            rows = np.flatnonzero(np.frombuffer(bid_book.active, dtype=np.int8))
+            prices = np.where(book_prices[rows] < float(discriminatory_price),
+                              book_prices[rows] * float(subsidy), book_prices[rows])
+            order = np.lexsort((np.frombuffer(bid_book.arrivals, dtype=np.int64)[rows], -prices))
+            rows = rows[order]
+            prices = prices[order]
+        else:
+            rows = np.fromiter(bid_book.iter_rows(), dtype=np.intp)
+            prices = book_prices[rows]
+
+        bid_arrays = cls.__new__(cls)
+        bid_arrays.allocs = [bid_book.entries[row] for row in rows.tolist()]
+        bid_arrays.prices = prices
+        bid_arrays.quantities = np.frombuffer(bid_book.quantities)[rows]
+        bid_arrays.original_prices = book_prices[rows]
+        return bid_arrays
+
+
+def over_reserve_price(prices, reserve_price: float):
+    """
+    Tells the bids with a price greater or equal to the reserve price. Prices are compared as floats, reserve
+    prices are compiled as decimals.
+
+    :param prices: price or prices of the bids
+    :param reserve_price: reserve price
+    :return: whether every bid competes in the auction.
+    """
+    return np.asarray(prices, dtype=float) >= float(reserve_price)
+
+
+def reserve_price_filter(prices, reserve_price: float) -> int:
+    """
+    Gets the number of bids with a price greater or equal to the reserve price.
+
+    :param prices: prices sorted in descending order
+    :param reserve_price: reserve price
+    :return: number of bids at the beginning of the arrays competing in the auction.
+    """
+    return int(np.count_nonzero(over_reserve_price(prices, reserve_price)))
+
+
+def uniform_price(prices, quantities, qty_available: float, reserve_price: float):
+    """
+    Clears a uniform price auction. Bids are served by price until the quantity available is sold, the
+    last bid served sets the price, and the reserve price is the price when there are units left.
+
+    :param prices: prices sorted in descending order
+    :param quantities: quantities requested
+    :param qty_available: quantity to sell
+    :param reserve_price: minimum price to sell
+    :return: quantities allocated, sell price and quantity not sold.
+    """
+    qty_available = float(qty_available)
+    nbr_bids = reserve_price_filter(prices, reserve_price)
+
+    requested = quantities[:nbr_bids]
+    remaining = np.maximum(qty_available - (np.cumsum(requested) - requested), 0)
+
+    allocated = np.zeros_like(quantities)
+    allocated[:nbr_bids] = np.minimum(requested, remaining)
+
+    served = np.flatnonzero((remaining >= requested) | (remaining > 0))
+    sell_price = float(prices[served[-1]]) if len(served) > 0 else 0
+
+    qty_left = max(qty_available - float(requested.sum()), 0)
+    if qty_left > 0:
+        sell_price = float(reserve_price)
+
+    return allocated, sell_price, qty_left
+
+
+def pay_as_bid(allocated, original_prices, max_price: float = None):
+    """
+    Gets the unit price of every bid when bids pay their price.
+
+    :param allocated: quantities allocated
+    :param original_prices: prices bid
+    :param max_price: when given, bids pay their price up to max_price, and bids not allocated get max_price.
+    :return: unit prices
+    """
+    if max_price is None:
+        return np.where(allocated > 0, original_prices, 0)
+    return np.where((allocated > 0) & (original_prices < max_price), original_prices, max_price)
+
+
+def progressive_second_price(prices, quantities, original_prices, tot_quantity: float):
+    """
+    Clears a progressive second price auction, see ProgressiveSecondPrice.calculate_compensated_allocations.
+    Bids are expected to belong to different bidding objects.
+
+    :param prices: prices sorted in descending order
+    :param quantities: quantities requested
+    :param original_prices: prices bid
+    :param tot_quantity: quantity to sell
+    :return: quantities allocated and the cost of every bid.
+    """
+    nbr_bids = len(prices)
+    if nbr_bids == 0:
+        return np.zeros(0), np.zeros(0)
+
+    # Bids with the same price form a level, quantities requested up to the end of every level.
+    new_level = np.concatenate(([True], prices[1:] != prices[:-1]))
+    starts = np.flatnonzero(new_level)
+    levels = np.cumsum(new_level) - 1
+    requested_up_to = np.cumsum(np.add.reduceat(quantities, starts))
+
+    available = float(tot_quantity) - requested_up_to[levels] + quantities
+    allocated = np.where(available > 0, np.minimum(quantities, available), 0)
+
+    lower = np.maximum(0, -available)
+    upper = lower + np.maximum(0, quantities - np.maximum(available, 0))
+
+    lower_list = lower.tolist()
+    upper_list = upper.tolist()
+    quantity_list = quantities.tolist()
+    price_list = original_prices.tolist()
+    lower_sums = RampSums(lower_list)
+    upper_sums = RampSums(upper_list)
+
+    # Bids are added from the lowest price, so the sums include the bids at the price or lower prices.
+    costs = np.zeros(nbr_bids)
+    bounds = starts.tolist() + [nbr_bids]
+    for level in range(len(starts) - 1, -1, -1):
+        for j in range(bounds[level], bounds[level + 1]):
+            lower_sums.add(lower_list[j], price_list[j])
+            upper_sums.add(upper_list[j], price_list[j])
+
+        for j in range(bounds[level], bounds[level + 1]):
+            costs[j] = lower_sums.ramp(quantity_list[j]) - upper_sums.ramp(quantity_list[j])
+
+    # the bid itself is not included in its cost.
+    costs -= original_prices * (np.maximum(0, quantities - lower) - np.maximum(0, quantities - upper))
+    return allocated, costs
+
+
+def unit_costs(allocated, costs):
+    """
+    Gets the price per unit of every bid from its cost, bids not allocated get zero.
+
+    :param allocated: quantities allocated
+    :param costs: cost of every bid
+    :return: unit prices
+    """
+    return np.divide(costs, allocated, out=np.zeros_like(costs), where=allocated > 0)
+
+
+def promoted_units(quantities, probability: float, generator=None):
+    """
+    Draws the units of every request passing from the high to the low auction. Every unit of a request passes
+    with the probability given, so the units passing follow a binomial distribution, drawn once per request.
+
+    :param quantities: quantities requested, only whole units can pass.
+    :param probability: probability of passing a unit
+    :param generator: numpy generator of the auction period, the global generator when it is not given.
+    :return: units passing by request
+    """
+    generator = np.random if generator is None else generator
+    units = np.floor(np.asarray(quantities, dtype=float)).astype(np.int64)
+    return generator.binomial(units, min(max(float(probability), 0.0), 1.0))
+
+
+def random_allocation(capacities, units: int, generator=None):
+    """
+    Allocates units to requests, every unit goes to a request chosen uniformly among the requests not fulfilled.
+
+    Units are drawn in batches: the units left are spread uniformly over the requests not fulfilled with a
+    multinomial draw, and units drawn for a request over its capacity are drawn again in the next batch. A unit
+    drawn for a fulfilled request is as a draw rejected, so the result follows the unit by unit allocation. Every
+    batch fulfills a request or allocates all the units left, so there are at most as many batches as requests.
+
+    :param capacities: whole units requested by every request
+    :param units: units to allocate
+    :param generator: numpy generator of the auction period, the global generator when it is not given.
+    :return: units allocated by request
+    """
+    generator = np.random if generator is None else generator
+    capacities = np.asarray(capacities, dtype=np.int64)
+    allocated = np.zeros_like(capacities)
+    units_left = min(int(units), int(capacities.sum()))
+    while units_left > 0:
+        pending = np.flatnonzero(allocated < capacities)
+        drawn = generator.multinomial(units_left, np.full(len(pending), 1.0 / len(pending)))
+        taken = np.minimum(drawn, capacities[pending] - allocated[pending])
+        allocated[pending] += taken
+        units_left -= int(taken.sum())
+    return allocated
+
+
+def materialize_allocations(proc_module: ProcModule, domain: int, start: datetime, stop: datetime,
+                            allocs: list, allocated, unit_prices) -> dict:
+    """
+    Creates the allocations of an auction cleared, quantities of bids with several elements are added.
+
+    :param proc_module: module creating allocations
+    :param domain: agent's domain
+    :param start: allocation's start
+    :param stop: allocation's stop
+    :param allocs: owner of every bid
+    :param allocated: quantities allocated
+    :param unit_prices: unit price of every bid, or the price for all of them.
+    :return: allocations by key
+    """
+    allocated = allocated.tolist()
+    unit_prices = np.broadcast_to(np.asarray(unit_prices, dtype=float), (len(allocs),)).tolist()
+
+    allocations = {}
+    for alloc, quantity, unit_price in zip(allocs, allocated, unit_prices):
+        key = proc_module.make_key(alloc.auction_key, alloc.bidding_object_key)
+        if key in allocations:
+            proc_module.increment_quantity_allocation(allocations[key], quantity)
+        else:
+            allocations[key] = proc_module.create_allocation(domain, alloc.session_id, alloc.bidding_object_key,
+                                                             start, stop, quantity, unit_price)
+    return allocations
@@ -6,13 +6,16 @@ from foundation.singleton import Singleton
 from foundation.parse_format import ParseFormats
 from foundation.field_def_manager import DataType
 from foundation.bidding_object import BiddingObject
+from foundation.bid_book import BidBook
 from foundation.auction import AuctioningObjectType
 
 import uuid
 from datetime import datetime
 from typing import Dict
 from typing import DefaultDict
+from typing import Union
 from collections import defaultdict
+from bisect import bisect_left
 
 
 class AllocProc:
@@ -26,8 +29,145 @@ class AllocProc:
         self.original_price = price
 
 
+class AllocationRecord:
+    """
+    Allocation created by a mechanism. Quantity and price are kept as numbers while the auction is executed, the
+    allocation becomes a BiddingObject by to_bidding_object when it is stored or sent to the agent.
+    """
+    __slots__ = ('domain', 'session_id', 'parent_key', 'start', 'stop', 'quantity', 'price', 'key')
+
+    def __init__(self, domain: int, session_id: str, parent_key: str, start: datetime, stop: datetime,
+                 quantity: float, price: float):
+        self.domain = domain
+        self.session_id = session_id
+        self.parent_key = parent_key
+        self.start = start
+        self.stop = stop
+        self.quantity = quantity
+        self.price = price
+        self.key = None
+
+    def get_parent_key(self) -> str:
+        return self.parent_key
+
+    def get_session(self) -> str:
+        return self.session_id
+
+    def get_key(self) -> str:
+        """
+        Gets the key of the allocation, it is generated the first time and kept by the bidding object.
+
+        :return: allocation key
+        """
+        if self.key is None:
+            self.key = str(self.domain) + '.' + ProcModule().get_bidding_object_id()
+        return self.key
+
+    def copy_for_period(self, start: datetime, stop: datetime):
+        """
+        Creates an allocation with the same quantity and price for another period, it gets a new key.
+
+        :param start: allocation's start
+        :param stop: allocation's stop
+        :return: allocation record
+        """
+        return AllocationRecord(self.domain, self.session_id, self.parent_key, start, stop, self.quantity, self.price)
+
+    def to_bidding_object(self) -> BiddingObject:
+        """
+        Creates the bidding object of the allocation
+
+        :return: allocation as bidding object
+        """
+        return ProcModule().materialize_allocation(self)
+
+
+class AuctionParameters:
+    """
+    Parameters of an auction with their typed values, compiled once by ProcModule.compile_params. Values are read
+    as attributes, e.g. params.bandwidth, and they can not be changed; parameters changed are compiled again.
+    """
+
+    def __init__(self, values: dict):
+        """
+        Creates the parameters
+
+        :param values: typed values by parameter name
+        """
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("auction parameters can not be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("auction parameters can not be changed")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__dict__
+
+    def get(self, name: str, default=None):
+        """
+        Gets the value of a parameter
+
+        :param name: name of the parameter
+        :param default: value returned when the auction does not have the parameter
+        :return: value of the parameter
+        """
+        return self.__dict__.get(name, default)
+
+
+class RampSums:
+    """
+    Fenwick tree over a set of points. Given x, it returns the sum of weight * max(0, x - point) for the points
+    added so far, in O(log n).
+    """
+
+    def __init__(self, points: list):
+        """
+        Creates the tree
+
+        :param points: points that can be added.
+        """
+        self.points = sorted(set(points))
+        self.weights = [0.0] * (len(self.points) + 1)
+        self.moments = [0.0] * (len(self.points) + 1)
+
+    def add(self, point: float, weight: float):
+        """
+        Adds a point
+
+        :param point: point to add, it must be one of the points given when the tree was created.
+        :param weight: weight of the point
+        """
+        i = bisect_left(self.points, point) + 1
+        while i < len(self.weights):
+            self.weights[i] += weight
+            self.moments[i] += weight * point
+            i += i & -i
+
+    def ramp(self, x: float) -> float:
+        """
+        Gets sum of weight * max(0, x - point) for the points added.
+
+        :param x: value to evaluate
+        """
+        weight = 0
+        moment = 0
+        i = bisect_left(self.points, x)
+        while i > 0:
+            weight += self.weights[i]
+            moment += self.moments[i]
+            i -= i & -i
+        return x * weight - moment
+
+
 class ProcModule(metaclass=Singleton):
 
+    # types of the parameters parsed by get_param_value
+    PARAM_TYPES = (DataType.DOUBLE, DataType.UINT32, DataType.STRING, DataType.UINT64, DataType.IPV4ADDR,
+                   DataType.IPV6ADDR, DataType.UINT8, DataType.FLOAT)
+
     def __init__(self):
         self.field_container = IpapFieldContainer()
         self.field_container.initialize_reverse()
@@ -61,6 +201,32 @@ class ProcModule(metaclass=Singleton):
         else:
             raise ValueError("Invalid type {0}".format(field_def['type'].lower()))
 
+    def compile_params(self, params: dict) -> AuctionParameters:
+        """
+        Parses the values of all the parameters of an auction, so the modules read them as attributes when they
+        execute the auction.
+
+        :param params: parameters as field values by name
+        :return: auction parameters
+        """
+        values = {}
+        for field_name in params:
+            # parameters of types without parser are left out, as get_param_value can not read them.
+            if self.field_def_manager.get_field(field_name)['type'] in self.PARAM_TYPES:
+                values[field_name] = self.get_param_value(field_name, params)
+        return AuctionParameters(values)
+
+    def get_auction_params(self, params: Union[AuctionParameters, dict]) -> AuctionParameters:
+        """
+        Gets the compiled parameters of an auction, parameters given as field values are compiled.
+
+        :param params: auction parameters, compiled or as field values by name
+        :return: auction parameters
+        """
+        if isinstance(params, AuctionParameters):
+            return params
+        return self.compile_params(params)
+
     def insert_field(self, field_def: dict, value: str, config_params: dict):
         """
         Inserts a new field in a config param dictionary
@@ -71,6 +237,16 @@ class ProcModule(metaclass=Singleton):
         field = ConfigParam(name=field_def['key'], p_type=field_def['type'], value=value)
         config_params[field.name] = field
 
+    def insert_typed_field(self, field_def: dict, value, config_params: dict):
+        """
+        Inserts a new field with a typed value in a config param dictionary, the text is created when requested.
+        :param field_def: field definition
+        :param value: value to be assigned to the field
+        :param config_params: dictinary being fill.
+        """
+        field = ConfigParam(name=field_def['key'], p_type=field_def['type'], typed_value=value)
+        config_params[field.name] = field
+
     def insert_string_field(self, field_name: str, value: str, config_params: dict):
         """
         Inserts a field value in the data record given as parameter
@@ -91,17 +267,7 @@ class ProcModule(metaclass=Singleton):
         :param config_params: dictionary where the field is going to be inserted.
         """
         field_def = self.field_def_manager.get_field(field_name)
-        field: IpapField = self.field_container.get_field(
-            int(field_def['eno']), int(field_def['ftype']))
-
-        if field.get_length() == 1:
-            self.insert_field(field_def, field.write_value(field.get_ipap_field_value_uint8(value)), config_params)
-        elif field.get_length() == 2:
-            self.insert_field(field_def, field.write_value(field.get_ipap_field_value_uint16(value)), config_params)
-        elif field.get_length() == 4:
-            self.insert_field(field_def, field.write_value(field.get_ipap_field_value_uint32(value)), config_params)
-        elif field.get_length() == 8:
-            self.insert_field(field_def, field.write_value(field.get_ipap_field_value_uint64(value)), config_params)
+        self.insert_typed_field(field_def, int(value), config_params)
 
     def insert_float_field(self, field_name: str, value: float, config_params: dict):
         """
@@ -112,9 +278,7 @@ class ProcModule(metaclass=Singleton):
         :param config_params: dictionary where the field is going to be inserted.
         """
         field_def = self.field_def_manager.get_field(field_name)
-        field: IpapField = self.field_container.get_field(
-            int(field_def['eno']), int(field_def['ftype']))
-        self.insert_field(field_def, field.write_value(field.get_ipap_field_value_float(value)), config_params)
+        self.insert_typed_field(field_def, float(value), config_params)
 
     def insert_double_field(self, field_name: str, value: float, config_params: dict):
         """
@@ -125,9 +289,7 @@ class ProcModule(metaclass=Singleton):
         :param config_params: dictionary where the field is going to be inserted.
         """
         field_def = self.field_def_manager.get_field(field_name)
-        field: IpapField = self.field_container.get_field(
-            int(field_def['eno']), int(field_def['ftype']))
-        self.insert_field(field_def, field.write_value(field.get_ipap_field_value_double(value)), config_params)
+        self.insert_typed_field(field_def, float(value), config_params)
 
     def insert_ipv4_field(self, field_name: str, value: str, config_params: dict):
         """
@@ -186,7 +348,7 @@ class ProcModule(metaclass=Singleton):
         return auction_key + '-' + bid_key
 
     def create_allocation(self, domain: int, session_id: str, parent_key: str, start: datetime,
-                          stop: datetime, quantity: float, price: float) -> BiddingObject:
+                          stop: datetime, quantity: float, price: float) -> AllocationRecord:
         """
         Creates a new allocation
 
@@ -197,6 +359,15 @@ class ProcModule(metaclass=Singleton):
         :param stop: allocation's stop
         :param quantity: quantity to assign
         :param price: price to pay
+        :return: allocation record, see materialize_allocation to get its bidding object.
+        """
+        return AllocationRecord(domain, session_id, parent_key, start, stop, float(quantity), float(price))
+
+    def materialize_allocation(self, allocation: AllocationRecord) -> BiddingObject:
+        """
+        Creates the bidding object of an allocation record
+
+        :param allocation: allocation record created by the mechanism
         :return: Bidding object
         """
         elements = dict()
@@ -205,8 +376,8 @@ class ProcModule(metaclass=Singleton):
         # Insert quantity ipap_field
         record_id = "record_1"
         self.insert_string_field("recordid", record_id, config_elements)
-        self.insert_float_field("quantity", quantity, config_elements)
-        self.insert_double_field("unitprice", price, config_elements)
+        self.insert_float_field("quantity", allocation.quantity, config_elements)
+        self.insert_double_field("unitprice", allocation.price, config_elements)
         elements[record_id] = config_elements
 
         # construct the interval with the allocation, based on start datetime
@@ -217,27 +388,30 @@ class ProcModule(metaclass=Singleton):
         config_options = dict()
 
         self.insert_string_field("recordid", option_id, config_elements)
-        self.insert_datetime_field("start", start, config_options)
-        self.insert_datetime_field("stop", stop, config_options)
+        self.insert_datetime_field("start", allocation.start, config_options)
+        self.insert_datetime_field("stop", allocation.stop, config_options)
         options[option_id] = config_options
 
-        bidding_object_id = self.get_bidding_object_id()
-        bidding_object_key = str(domain) + '.' + bidding_object_id
-        alloc = BiddingObject(parent_key, bidding_object_key, AuctioningObjectType.ALLOCATION, elements, options)
+        alloc = BiddingObject(allocation.get_parent_key(), allocation.get_key(), AuctioningObjectType.ALLOCATION,
+                              elements, options)
 
         # All objects must be inherit the session from the bid.
-        alloc.set_session(session_id)
+        alloc.set_session(allocation.get_session())
 
         return alloc
 
     @staticmethod
-    def increment_quantity_allocation(allocation: BiddingObject, quantity: float):
+    def increment_quantity_allocation(allocation: Union[AllocationRecord, BiddingObject], quantity: float):
         """
         Increments the quantity assigned to an allocation
 
         :param allocation: allocation to be incremented
         :param quantity: quantity to increment
         """
+        if isinstance(allocation, AllocationRecord):
+            allocation.quantity += quantity
+            return
+
         elements = allocation.elements
 
         # there is only one element
@@ -247,10 +421,9 @@ class ProcModule(metaclass=Singleton):
             # remove the field for updating quantities
             field: ConfigParam = config_dict.pop('quantity')
             # Insert again the field.
-            temp_qty = ParseFormats.parse_float(field.value)
+            temp_qty = float(field.get_typed_value())
             temp_qty += quantity
-            fvalue = str(temp_qty)
-            field.value = fvalue
+            field.set_typed_value(temp_qty)
             config_dict[field.name] = field
             updated = True
             break
@@ -259,12 +432,15 @@ class ProcModule(metaclass=Singleton):
             raise ValueError("Field quantity was not included in the allocation")
 
     @staticmethod
-    def get_allocation_quantity(bidding_object: BiddingObject) -> float:
+    def get_allocation_quantity(bidding_object: Union[AllocationRecord, BiddingObject]) -> float:
         """
 
         :param bidding_object:
         :return:
         """
+        if isinstance(bidding_object, AllocationRecord):
+            return bidding_object.quantity
+
         temp_qty = 0
         elements = bidding_object.elements
 
@@ -273,19 +449,23 @@ class ProcModule(metaclass=Singleton):
             config_dict = elements[element_name]
             # remove the field for updating quantities
             field: ConfigParam = config_dict['quantity']
-            temp_qty = ParseFormats.parse_float(field.value)
+            temp_qty = float(field.get_typed_value())
             break
 
         return temp_qty
 
     @staticmethod
-    def change_allocation_price(allocation: BiddingObject, price: float):
+    def change_allocation_price(allocation: Union[AllocationRecord, BiddingObject], price: float):
         """
         Change allocation price
 
         :param allocation: allocation to be incremented
         :param price: price to be assigned
         """
+        if isinstance(allocation, AllocationRecord):
+            allocation.price = float(price)
+            return
+
         elements = allocation.elements
 
         # there is only one element
@@ -295,8 +475,7 @@ class ProcModule(metaclass=Singleton):
             # remove the field for updating quantities
             field: ConfigParam = config_dict.pop('unitprice')
             # Insert again the field.
-            fvalue = str(price)
-            field.value = fvalue
+            field.set_typed_value(float(price))
             config_dict[field.name] = field
             updated = True
             break
@@ -305,19 +484,22 @@ class ProcModule(metaclass=Singleton):
             raise ValueError("Field price was not included in the allocation")
 
     @staticmethod
-    def get_bid_price(bidding_object: BiddingObject) -> float:
+    def get_bid_price(bidding_object: Union[AllocationRecord, BiddingObject]) -> float:
         """
         Gets the bid price from a bidding object
 
         :param bidding_object: bidding object from where to get the price
         :return: bid price
         """
+        if isinstance(bidding_object, AllocationRecord):
+            return bidding_object.price
+
         unit_price = -1
 
         elements = bidding_object.elements
         for element_name in elements:
             config_dict = elements[element_name]
-            unit_price = float(config_dict['unitprice'].value)
+            unit_price = float(config_dict['unitprice'].get_typed_value())
             break
         return unit_price
 
@@ -335,7 +517,7 @@ class ProcModule(metaclass=Singleton):
             elements = bidding_object.elements
             for element_name in elements:
                 config_dict = elements[element_name]
-                quantity = float(config_dict['quantity'].value)
+                quantity = float(config_dict['quantity'].get_typed_value())
                 sum_quantity = sum_quantity + quantity
 
         return sum_quantity
@@ -378,8 +560,8 @@ class ProcModule(metaclass=Singleton):
             elements = bidding_object.elements
             for element_name in elements:
                 config_params = elements[element_name]
-                price = ParseFormats.parse_float(config_params["unitprice"].value)
-                quantity = ParseFormats.parse_float(config_params["quantity"].value)
+                price = float(config_params["unitprice"].get_typed_value())
+                quantity = float(config_params["quantity"].get_typed_value())
                 alloc = AllocProc(bidding_object.get_parent_key(), bidding_object.get_key(),
                                   element_name, bidding_object.get_session(), quantity, price)
                 # applies the subsidy if it was given,
@@ -390,3 +572,29 @@ class ProcModule(metaclass=Singleton):
                 ordered_bids[price].append(alloc)
 
         return ordered_bids
+
+    @staticmethod
+    def sort_bid_book_by_price(bid_book: BidBook, discriminatory_price: float = 0,
+                               subsidy: float = 1) -> DefaultDict[float, list]:
+        """
+        sort the active bids of a bid book by price in descending order, following the price order of the book.
+
+        :param bid_book: bid book of the auction process
+        :param discriminatory_price  price to applies subsidies
+        :param subsidy: value by which we multiply prices in order to give subsidies
+        :return:
+        """
+        ordered_bids: DefaultDict[float, list] = defaultdict(list)
+        for row in bid_book.iter_rows():
+            entry = bid_book.entries[row]
+            price = bid_book.prices[row]
+            alloc = AllocProc(entry.auction_key, entry.bidding_object_key, entry.element_name,
+                              entry.session_id, bid_book.quantities[row], price)
+            # applies the subsidy if it was given,
+            if discriminatory_price > 0:
+                if price < discriminatory_price:
+                    price = price * subsidy
+
+            ordered_bids[price].append(alloc)
+
+        return ordered_bids
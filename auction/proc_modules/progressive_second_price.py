@@ -1,12 +1,21 @@
 from foundation.module import Module
 from foundation.field_value import FieldValue
 from foundation.module import ModuleInformation
+from foundation.bid_book import BidBook
+from foundation.random_stream import RandomStream
 
 from proc_modules.proc_module import ProcModule
+from proc_modules.proc_module import AuctionParameters
 from proc_modules.proc_module import AllocProc
+from proc_modules.proc_module import RampSums
+from proc_modules.clearing_kernels import BidArrays
+from proc_modules.clearing_kernels import progressive_second_price
+from proc_modules.clearing_kernels import unit_costs
+from proc_modules.clearing_kernels import materialize_allocations
 
 from utils.auction_utils import log
 from typing import Dict
+from typing import Union
 from typing import DefaultDict
 from datetime import datetime
 from math import ceil
@@ -23,15 +32,18 @@ class ProgressiveSecondPrice(Module):
         self.domain = 0
         self.proc_module = ProcModule()
 
-    def init_module(self, config_params: Dict[str, FieldValue]):
+    def init_module(self, config_params: Dict[str, FieldValue]) -> AuctionParameters:
         """
         Initializes the module
 
         :param config_params: dictionary with the given configuration parameters
+        :return: parameters compiled, the auction process keeps them to execute the auction.
         """
         self.logger.debug('in init_module')
         self.config_params = config_params
-        self.domain = self.proc_module.get_param_value('domainid', config_params)
+        params = self.proc_module.compile_params(config_params)
+        self.domain = params.domainid
+        return params
 
     def destroy_module(self):
         """
@@ -83,10 +95,107 @@ class ProgressiveSecondPrice(Module):
 
         return allocations
 
+    @staticmethod
+    def calculate_compensated_allocations(tot_quantity: float,
+                                          ordered_bids: DefaultDict[float, list]) -> Dict[str, AllocProc]:
+        """
+        Calculates the allocation quantity and cost to sell for each bid, c_i(s) in the paper, sorting the bids once.
+
+        Excluding a bid i with quantity q_i from the auction adds q_i to the quantity left for the bids at its
+        price and lower prices, bids at higher prices are not affected. A bid j with available quantity
+        s_j = Q - (quantity requested at prices higher or equal to p_j) + q_j is allocated clip(s_j, 0, q_j), so
+        excluding i it gets clip(s_j + q_i, 0, q_j) = clip(s_j, 0, q_j) + clip(q_i - lower_j, 0, upper_j - lower_j),
+        with lower_j = max(0, -s_j) and upper_j = lower_j + max(0, q_j - max(s_j, 0)).
+        The cost of i is the sum of p_j times that increment over the bids j at p_i or lower prices, which is
+        obtained from prefix sums of p_j and p_j * lower_j (p_j * upper_j) of those bids ordered by lower_j (upper_j).
+
+        Bids are expected to have one element, call calculate_allocations otherwise.
+
+        :param tot_quantity: available total quantity to sell. In the paper, it corresponds to Q
+        :param ordered_bids: list of bids for which we want to calculate the maximum available quantity.
+        :return: dictionary with the allocation of every bid, where original_price is its cost.
+        """
+        allocations = {}
+        levels = []
+        qty_acum = 0
+
+        sorted_prices = sorted(ordered_bids.keys(), reverse=True)
+        for price in sorted_prices:
+            alloc_temp = ordered_bids[price]
+
+            acum_price = 0
+            for alloc in alloc_temp:
+                acum_price += alloc.quantity
+
+            level = []
+            for alloc in alloc_temp:
+                available = tot_quantity - qty_acum - acum_price + alloc.quantity
+                if available > 0:
+                    alloc_qty = min(alloc.quantity, available)
+                else:
+                    alloc_qty = 0
+
+                allocations[alloc.bidding_object_key] = AllocProc(alloc.auction_key, alloc.bidding_object_key,
+                                                                  alloc.element_name, alloc.session_id, alloc_qty,
+                                                                  alloc.original_price)
+                lower = max(0, -available)
+                upper = lower + max(0, alloc.quantity - max(available, 0))
+                level.append((alloc.bidding_object_key, alloc.quantity, alloc.original_price, lower, upper))
+
+            levels.append(level)
+            qty_acum = qty_acum + acum_price
+
+        lower_sums = RampSums([bid[3] for level in levels for bid in level])
+        upper_sums = RampSums([bid[4] for level in levels for bid in level])
+
+        # Bids are added from the lowest price, so the sums include the bids at the price or lower prices.
+        for level in reversed(levels):
+            for bid_key, quantity, price, lower, upper in level:
+                lower_sums.add(lower, price)
+                upper_sums.add(upper, price)
+
+            for bid_key, quantity, price, lower, upper in level:
+                bid_cost = lower_sums.ramp(quantity) - upper_sums.ramp(quantity)
+                # the bid itself is not included in its cost.
+                bid_cost -= price * (max(0, quantity - lower) - max(0, quantity - upper))
+                allocations[bid_key].original_price = bid_cost
+
+        return allocations
+
+    @staticmethod
+    def is_single_element(ordered_bids: DefaultDict[float, list]) -> bool:
+        """
+        Checks whether or not every bid has one element
+
+        :param ordered_bids: allocation requests by price
+        :return: True if there is one allocation request by bid.
+        """
+        nbr_elements = 0
+        bid_keys = set()
+        for alloc_temp in ordered_bids.values():
+            nbr_elements += len(alloc_temp)
+            bid_keys.update(alloc.bidding_object_key for alloc in alloc_temp)
+        return nbr_elements == len(bid_keys)
+
     def calculate_allocations(self, tot_quantity: float, ordered_bids: DefaultDict[float, list])-> Dict[str, AllocProc]:
         """
         Calculates the allocation cost to sell for each bid. In the paper this corresponds to c_i(s)
 
+        :param tot_quantity: available total quantity to sell. In the paper, it corresponds to Q
+        :param ordered_bids: list of bids for which we want to calculate the maximum available quantity.
+        :return:
+        """
+        if self.is_single_element(ordered_bids):
+            return self.calculate_compensated_allocations(tot_quantity, ordered_bids)
+        else:
+            # Bids with several elements are excluded with all of them.
+            return self.calculate_allocations_by_exclusion(tot_quantity, ordered_bids)
+
+    def calculate_allocations_by_exclusion(self, tot_quantity: float,
+                                           ordered_bids: DefaultDict[float, list]) -> Dict[str, AllocProc]:
+        """
+        Calculates the allocation cost to sell for each bid by calculating the allocations without every bid.
+
         :param tot_quantity: available total quantity to sell. In the paper, it corresponds to Q
         :param ordered_bids: list of bids for which we want to calculate the maximum available quantity.
         :return:
@@ -139,24 +248,57 @@ class ProgressiveSecondPrice(Module):
 
         return list_allocs
 
-    def execute(self, request_params: Dict[str, FieldValue], auction_key: str,
-                start: datetime, stop: datetime, bids: dict) -> list:
+    def clear_bid_arrays(self, start: datetime, stop: datetime, tot_quantity: float, bid_arrays: BidArrays) -> list:
+        """
+        Executes the auction with the clearing kernels, bids are expected to have one element.
+
+        :param start: start datetime
+        :param stop: stop datetime
+        :param tot_quantity: available total quantity to sell.
+        :param bid_arrays: bids competing in the auction
+        :return: list of allocations
+        """
+        allocated, costs = progressive_second_price(bid_arrays.prices, bid_arrays.quantities,
+                                                    bid_arrays.original_prices, tot_quantity)
+        allocations = materialize_allocations(self.proc_module, self.domain, start, stop,
+                                              bid_arrays.allocs, allocated, unit_costs(allocated, costs))
+        return list(allocations.values())
+
+    def execute(self, request_params: Union[AuctionParameters, Dict[str, FieldValue]], auction_key: str,
+                start: datetime, stop: datetime, bids: dict, bid_book: BidBook = None,
+                random_stream: RandomStream = None) -> list:
         """
         Executes the auction procedure for an specific auction.
 
-        :param request_params: request params included
+        :param request_params: auction parameters, as compiled by init_module or as field values
         :param auction_key: auction key identifying the auction
         :param start: start datetime
         :param stop: stop datetime
         :param bids: bidding objects included
+        :param bid_book: bid book of the auction process
+        :param random_stream: random stream of the auction period, not used as the mechanism is deterministic.
         :return:
         """
-        self.logger.debug("progressive second price auction: start execute num bids:{0}".format(str(len(bids))))
+        if bid_book is not None:
+            self.logger.debug("progressive second price auction: start execute num bid elements:{0}".format(
+                str(len(bid_book))))
+        else:
+            self.logger.debug("progressive second price auction: start execute num bids:{0}".format(str(len(bids))))
 
-        bandwidth_to_sell = self.proc_module.get_param_value('bandwidth', request_params)
+        params = self.proc_module.get_auction_params(request_params)
+        bandwidth_to_sell = params.bandwidth
+
+        if bid_book is not None and bid_book.is_single_element():
+            return self.clear_bid_arrays(start, stop, bandwidth_to_sell, BidArrays.from_bid_book(bid_book))
 
         # sort bids from upper to lower values
-        ordered_bids = self.proc_module.sort_bids_by_price(bids)
+        if bid_book is not None:
+            ordered_bids = self.proc_module.sort_bid_book_by_price(bid_book)
+        else:
+            ordered_bids = self.proc_module.sort_bids_by_price(bids)
+
+        if self.is_single_element(ordered_bids):
+            return self.clear_bid_arrays(start, stop, bandwidth_to_sell, BidArrays(ordered_bids))
 
         # get allocations from the mechanism
         allocations = self.calculate_allocations(bandwidth_to_sell, ordered_bids)
@@ -164,6 +306,12 @@ class ProgressiveSecondPrice(Module):
         # create the final list of allocations and return it
         return self.create_allocations(start, stop, allocations)
 
+    def uses_bids(self) -> bool:
+        """
+        The bids are not read when the bid book is given.
+        """
+        return False
+
     def execute_user(self, request_params: Dict[str, FieldValue], auctions: dict,
                      start: datetime, stop: datetime) -> list:
         """
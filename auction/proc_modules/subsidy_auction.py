@@ -1,11 +1,19 @@
 from foundation.module import Module
 from foundation.field_value import FieldValue
 from foundation.module import ModuleInformation
+from foundation.bid_book import BidBook
+from foundation.random_stream import RandomStream
 
 from proc_modules.proc_module import ProcModule
+from proc_modules.proc_module import AuctionParameters
+from proc_modules.clearing_kernels import BidArrays
+from proc_modules.clearing_kernels import uniform_price
+from proc_modules.clearing_kernels import pay_as_bid
+from proc_modules.clearing_kernels import materialize_allocations
 
 from utils.auction_utils import log
 from typing import Dict
+from typing import Union
 from datetime import datetime
 
 
@@ -20,15 +28,18 @@ class SubsidyAuction(Module):
         self.domain = 0
         self.proc_module = ProcModule()
 
-    def init_module(self, config_params: Dict[str, FieldValue]):
+    def init_module(self, config_params: Dict[str, FieldValue]) -> AuctionParameters:
         """
         Initializes the module
 
         :param config_params: dictionary with the given configuration parameters
+        :return: parameters compiled, the auction process keeps them to execute the auction.
         """
         self.logger.debug('in init_module')
         self.config_params = config_params
-        self.domain = self.proc_module.get_param_value('domainid', config_params)
+        params = self.proc_module.compile_params(config_params)
+        self.domain = params.domainid
+        return params
 
     def destroy_module(self):
         """
@@ -37,24 +48,28 @@ class SubsidyAuction(Module):
         """
         print('in destroy_module')
 
-    def execute(self, request_params: Dict[str, FieldValue], auction_key: str,
-                start: datetime, stop: datetime, bids: dict) -> list:
+    def execute(self, request_params: Union[AuctionParameters, Dict[str, FieldValue]], auction_key: str,
+                start: datetime, stop: datetime, bids: dict, bid_book: BidBook = None,
+                random_stream: RandomStream = None) -> list:
         """
         Executes the auction procedure for an specific auction.
 
-        :param request_params: request params included
+        :param request_params: auction parameters, as compiled by init_module or as field values
         :param auction_key: auction key identifying the auction
         :param start: start datetime
         :param stop: stop datetime
         :param bids: bidding objects included
+        :param bid_book: bid book of the auction process
+        :param random_stream: random stream of the auction period, not used as the mechanism is deterministic.
         :return:
         """
         self.logger.debug("bas module: start execute num bids:{0}".format(str(len(bids))))
 
-        bandwidth_to_sell = self.proc_module.get_param_value('bandwidth', request_params)
-        reserve_price = self.proc_module.get_param_value('reserveprice', request_params)
-        subsidy = self.proc_module.get_param_value('subsidy', request_params)
-        discriminatory_price = self.proc_module.get_param_value('maxvalue01', request_params)
+        params = self.proc_module.get_auction_params(request_params)
+        bandwidth_to_sell = params.bandwidth
+        reserve_price = params.reserveprice
+        subsidy = params.subsidy
+        discriminatory_price = params.maxvalue01
 
         tot_demand = self.proc_module.calculate_requested_quantities(bids)
 
@@ -65,60 +80,16 @@ class SubsidyAuction(Module):
         nl = self.proc_module.calculate_requested_quantities(bids_low_rct)
         nh = self.proc_module.calculate_requested_quantities(bids_high_rct)
 
-        ordered_bids = self.proc_module.sort_bids_by_price(bids, discriminatory_price, subsidy)
-
-        qty_available = bandwidth_to_sell
-        sell_price = 0
-
-        self.logger.debug("subsidy auction module- qty available: {0}".format(qty_available))
-
-        sorted_prices = sorted(ordered_bids.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp = ordered_bids[price]
-
-            if price < reserve_price:
-                for i in range(0, len(alloc_temp)):
-                    alloc_temp[i].quantity = 0
-            else:
-                for i in range(0, len(alloc_temp)):
-                    if qty_available < alloc_temp[i].quantity:
-                        alloc_temp[i].quantity = qty_available
-                        if qty_available > 0:
-                            sell_price = price
-                            qty_available = 0
-                    else:
-                        qty_available = qty_available - alloc_temp[i].quantity
-                        sell_price = price
-
-        # There are more units available than requested
-        if qty_available > 0:
-            sell_price = reserve_price
-
-        self.logger.debug("subsidy auction module: after executing the auction for bids")
-
-        allocations = {}
-
-        # Creates allocations
-        sorted_prices = sorted(ordered_bids.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp = ordered_bids[price]
-            for i in range(0, len(alloc_temp)):
-                key = self.proc_module.make_key(alloc_temp[i].auction_key, alloc_temp[i].bidding_object_key)
-                if key in allocations:
-                    self.proc_module.increment_quantity_allocation(allocations[alloc_temp[i].bidding_object_key],
-                                                                   alloc_temp[i].quantity)
-                else:
-                    if alloc_temp[i].original_price < sell_price and alloc_temp[i].quantity > 0:
-                        set_price = alloc_temp[i].original_price
-                    else:
-                        set_price = sell_price
-
-                    allocation = self.proc_module.create_allocation(self.domain, alloc_temp[i].session_id,
-                                                        alloc_temp[i].bidding_object_key,
-                                                        start, stop,
-                                                        alloc_temp[i].quantity,
-                                                        set_price)
-                    allocations[key] = allocation
+        if bid_book is not None:
+            bid_arrays = BidArrays.from_bid_book(bid_book, discriminatory_price, subsidy)
+        else:
+            bid_arrays = BidArrays(self.proc_module.sort_bids_by_price(bids, discriminatory_price, subsidy))
+        allocated, sell_price, qty_available = uniform_price(bid_arrays.prices, bid_arrays.quantities,
+                                                             bandwidth_to_sell, reserve_price)
+        # subsidized bids pay their price when it is lower than the sell price.
+        unit_prices = pay_as_bid(allocated, bid_arrays.original_prices, sell_price)
+        allocations = materialize_allocations(self.proc_module, self.domain, start, stop,
+                                              bid_arrays.allocs, allocated, unit_prices)
 
         # Convert from the map to the final allocationDB result
         allocation_res = []
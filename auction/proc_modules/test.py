@@ -3,9 +3,48 @@ from foundation.bidding_object_manager import BiddingObjectManager
 from foundation.module_loader import ModuleLoader
 from foundation.config import Config
 from foundation.field_value import FieldValue
-
+from foundation.bidding_object import BiddingObject
+from foundation.auctioning_object import AuctioningObjectType
+from foundation.config_param import ConfigParam
+from foundation.config_param import DataType
+from foundation.bid_book import BidBook
+from proc_modules.proc_module import AllocProc
+from proc_modules.proc_module import AllocationRecord
+from proc_modules.proc_module import AuctionParameters
+from proc_modules.proc_module import ProcModule
+from proc_modules.progressive_second_price import ProgressiveSecondPrice
+from proc_modules.clearing_kernels import BidArrays
+from proc_modules.clearing_kernels import uniform_price
+from proc_modules.clearing_kernels import pay_as_bid
+from proc_modules.clearing_kernels import progressive_second_price
+from proc_modules.clearing_kernels import random_allocation
+from proc_modules.clearing_kernels import over_reserve_price
+import numpy as np
+
+from collections import defaultdict
+from decimal import Decimal
 from datetime import datetime
 from datetime import timedelta
+import random
+from math import floor
+
+
+def random_ordered_bids(rnd: random.Random):
+    """
+    Creates random bids ordered by price, as given to the progressive second price allocations.
+
+    :param rnd: random generator
+    :return: (bids by price, quantity to sell), the quantity is up to 1.2 times the quantity requested.
+    """
+    ordered_bids = defaultdict(list)
+    for j in range(0, rnd.randint(1, 40)):
+        price = rnd.choice([rnd.randint(1, 10) / 10, round(rnd.random(), 3)])
+        quantity = rnd.choice([rnd.randint(1, 10), round(rnd.uniform(0.1, 10), 2)])
+        ordered_bids[price].append(AllocProc("1.1", "bid{0}".format(str(j)), "element1", "session1",
+                                             quantity, price))
+
+    tot_demand = sum(alloc.quantity for alloc_temp in ordered_bids.values() for alloc in alloc_temp)
+    return ordered_bids, rnd.uniform(0, 1.2 * tot_demand)
 
 
 class SubsidyAuctionTest(unittest.TestCase):
@@ -168,7 +207,7 @@ class SubsidyAuctionTest(unittest.TestCase):
                 sell_price = module.proc_module.get_bid_price(allocation)
                 break
 
-            self.assertEqual(sell_price, 0.456)
+            self.assertAlmostEqual(sell_price, 0.456)
 
     def test_enough_quantities(self):
         print('in test_enough_quantities')
@@ -435,6 +474,60 @@ class BasicModuleTest(unittest.TestCase):
 
             self.assertEqual(sell_price, 0.15)
 
+    def test_allocation_record(self):
+        proc_module = ProcModule()
+        start = datetime.now()
+        stop = start + timedelta(seconds=100)
+
+        allocation = proc_module.create_allocation(1, "1001", "1.bid1", start, stop, 10, 0.5)
+        self.assertIsInstance(allocation, AllocationRecord)
+        proc_module.increment_quantity_allocation(allocation, 5)
+        proc_module.change_allocation_price(allocation, 0.25)
+        self.assertEqual(proc_module.get_allocation_quantity(allocation), 15)
+        self.assertEqual(proc_module.get_bid_price(allocation), 0.25)
+
+        bidding_object = allocation.to_bidding_object()
+        self.assertEqual(bidding_object.get_key(), allocation.get_key())
+        self.assertEqual(bidding_object.get_parent_key(), "1.bid1")
+        self.assertEqual(bidding_object.get_session(), "1001")
+        self.assertEqual(bidding_object.get_type(), AuctioningObjectType.ALLOCATION)
+        self.assertEqual(proc_module.get_allocation_quantity(bidding_object), 15)
+        self.assertEqual(proc_module.get_bid_price(bidding_object), 0.25)
+
+        # allocations are given again for the next period with a new key.
+        allocation_next = allocation.copy_for_period(stop, stop + timedelta(seconds=100))
+        self.assertNotEqual(allocation_next.get_key(), allocation.get_key())
+        self.assertEqual(proc_module.get_allocation_quantity(allocation_next), 15)
+        self.assertEqual(allocation_next.start, stop)
+
+    def test_compile_params(self):
+        proc_module = ProcModule()
+        params = {}
+        for name, value in [("bandwidth", "90"), ("reserveprice", "0.15"), ("domainid", "7")]:
+            field_value = FieldValue(name=name)
+            field_value.parse_field_value(value)
+            params[name] = field_value
+
+        auction_params = proc_module.compile_params(params)
+        self.assertIsInstance(auction_params, AuctionParameters)
+        self.assertEqual(auction_params.bandwidth, proc_module.get_param_value("bandwidth", params))
+        self.assertEqual(auction_params.reserveprice, proc_module.get_param_value("reserveprice", params))
+        self.assertEqual(auction_params.domainid, 7)
+        self.assertTrue("bandwidth" in auction_params)
+        self.assertEqual(auction_params.get("subsidy", 1), 1)
+
+        # compiled parameters are given as they are, and they can not be changed.
+        self.assertIs(proc_module.get_auction_params(auction_params), auction_params)
+        with self.assertRaises(AttributeError):
+            auction_params.bandwidth = 100
+
+        module = self.loader.get_module("basic_module")
+        if module:
+            self.assertEqual(module.init_module(params).domainid, 7)
+            allocations = module.execute(auction_params, "1.1", datetime.now(), datetime.now(), self.bids)
+            self.assertEqual(len(allocations), len(module.execute(params, "1.1", datetime.now(), datetime.now(),
+                                                                  self.bids)))
+
 
 class TwoAuctionPerfectInformationTest(unittest.TestCase):
 
@@ -813,6 +906,20 @@ class ProgressiveSecondPriceTest(unittest.TestCase):
             for alloc_key in allocations:
                 print(allocations[alloc_key].bidding_object_key, allocations[alloc_key].quantity)
 
+    def test_compensated_allocations(self):
+        module = self.loader.get_module("progressive_second_price")
+
+        if module:
+            rnd = random.Random(10)
+            for i in range(0, 200):
+                ordered_bids, tot_quantity = random_ordered_bids(rnd)
+                expected = module.calculate_allocations_by_exclusion(tot_quantity, ordered_bids)
+                allocations = module.calculate_compensated_allocations(tot_quantity, ordered_bids)
+                self.assertEqual(allocations.keys(), expected.keys())
+                for bid_key in expected:
+                    self.assertAlmostEqual(allocations[bid_key].quantity, expected[bid_key].quantity)
+                    self.assertAlmostEqual(allocations[bid_key].original_price, expected[bid_key].original_price)
+
     def test_not_enough_quantities(self):
         print('in test_not_enough_quantities')
         auction_key = "1.1"
@@ -878,10 +985,147 @@ class ProgressiveSecondPriceTest(unittest.TestCase):
             for allocation in allocations:
                 qty_allocated += module.proc_module.get_allocation_quantity(allocation)
 
-            self.assertEqual(qty_allocated, 73)
+            # the quantities requested add up to 73, the auction never sells more than the bandwidth.
+            self.assertEqual(qty_allocated, 45)
 
             # for allocation in allocations:
             #    sell_price = module.proc_module.get_bid_price(allocation)
             #    break
 
             # self.assertEqual(sell_price, 0.15)
+
+
+class ClearingKernelsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ordered_bids = defaultdict(list)
+        for i, (quantity, price) in enumerate([(10, 0.5), (5, 0.3), (8, 0.5), (6, 0.1)]):
+            self.ordered_bids[price].append(AllocProc("1.1", "bid{0}".format(str(i)), "element1", "session1",
+                                                      quantity, price))
+
+    def test_bid_arrays(self):
+        bid_arrays = BidArrays(self.ordered_bids)
+        self.assertEqual([alloc.bidding_object_key for alloc in bid_arrays.allocs], ["bid0", "bid2", "bid1", "bid3"])
+        self.assertEqual(bid_arrays.prices.tolist(), [0.5, 0.5, 0.3, 0.1])
+        self.assertEqual(bid_arrays.quantities.tolist(), [10, 8, 5, 6])
+
+    def test_uniform_price(self):
+        bid_arrays = BidArrays(self.ordered_bids)
+        allocated, sell_price, qty_left = uniform_price(bid_arrays.prices, bid_arrays.quantities, 20, 0.2)
+        self.assertEqual(allocated.tolist(), [10, 8, 2, 0])
+        self.assertEqual(sell_price, 0.3)
+        self.assertEqual(qty_left, 0)
+
+        allocated, sell_price, qty_left = uniform_price(bid_arrays.prices, bid_arrays.quantities, 30, 0.2)
+        self.assertEqual(allocated.tolist(), [10, 8, 5, 0])
+        self.assertEqual(sell_price, 0.2)
+        self.assertEqual(qty_left, 7)
+
+    def test_reserve_price(self):
+        # reserve prices are compiled as decimals, bids at the reserve price compete.
+        bid_arrays = BidArrays(self.ordered_bids)
+        allocated, sell_price, qty_left = uniform_price(bid_arrays.prices, bid_arrays.quantities, 30,
+                                                        Decimal('0.3'))
+        self.assertEqual(allocated.tolist(), [10, 8, 5, 0])
+        self.assertEqual(sell_price, 0.3)
+        self.assertEqual(over_reserve_price(bid_arrays.prices, Decimal('0.3')).tolist(), [True, True, True, False])
+        self.assertTrue(over_reserve_price(0.3, Decimal('0.3')))
+        self.assertFalse(over_reserve_price(0.1, Decimal('0.3')))
+
+    def test_pay_as_bid(self):
+        bid_arrays = BidArrays(self.ordered_bids)
+        allocated, sell_price, qty_left = uniform_price(bid_arrays.prices, bid_arrays.quantities, 20, 0.2)
+        self.assertEqual(pay_as_bid(allocated, bid_arrays.original_prices).tolist(), [0.5, 0.5, 0.3, 0])
+        self.assertEqual(pay_as_bid(allocated, bid_arrays.original_prices, 0.4).tolist(), [0.4, 0.4, 0.3, 0.4])
+
+    def test_progressive_second_price(self):
+        rnd = random.Random(10)
+        for i in range(0, 200):
+            ordered_bids, tot_quantity = random_ordered_bids(rnd)
+            expected = ProgressiveSecondPrice.calculate_compensated_allocations(tot_quantity, ordered_bids)
+            bid_arrays = BidArrays(ordered_bids)
+            allocated, costs = progressive_second_price(bid_arrays.prices, bid_arrays.quantities,
+                                                        bid_arrays.original_prices, tot_quantity)
+            for alloc, quantity, cost in zip(bid_arrays.allocs, allocated.tolist(), costs.tolist()):
+                self.assertAlmostEqual(quantity, expected[alloc.bidding_object_key].quantity)
+                self.assertAlmostEqual(cost, expected[alloc.bidding_object_key].original_price)
+
+    def test_random_allocation(self):
+        np.random.seed(10)
+        rnd = random.Random(10)
+        capacities = [1, 3, 10, 0, 2]
+        units = 8
+        nbr_samples = 4000
+
+        self.assertEqual(random_allocation(capacities, 100).tolist(), capacities)
+        self.assertEqual(random_allocation([], 5).tolist(), [])
+
+        # every unit goes to a request chosen uniformly among the requests not fulfilled.
+        totals = [0] * len(capacities)
+        totals_by_unit = [0] * len(capacities)
+        for i in range(0, nbr_samples):
+            allocated = random_allocation(capacities, units).tolist()
+            self.assertEqual(sum(allocated), units)
+            for j in range(0, len(capacities)):
+                self.assertLessEqual(allocated[j], capacities[j])
+                totals[j] += allocated[j]
+
+            pending = [j for j in range(0, len(capacities)) if capacities[j] > 0]
+            allocated = [0] * len(capacities)
+            for unit in range(0, units):
+                j = pending[floor(rnd.random() * len(pending))]
+                allocated[j] += 1
+                if allocated[j] == capacities[j]:
+                    pending.remove(j)
+            for j in range(0, len(capacities)):
+                totals_by_unit[j] += allocated[j]
+
+        for total, total_by_unit in zip(totals, totals_by_unit):
+            self.assertAlmostEqual(total / nbr_samples, total_by_unit / nbr_samples, delta=0.1)
+
+    def test_from_bid_book(self):
+        rnd = random.Random(10)
+        proc_module = ProcModule()
+        bid_book = BidBook()
+        bids = {}
+        for i in range(0, 300):
+            if bids and rnd.random() < 0.3:
+                bid_key = rnd.choice(list(bids.keys()))
+                bids.pop(bid_key)
+                bid_book.remove(bid_key)
+                continue
+
+            elements = {}
+            for j in range(0, rnd.randint(1, 3)):
+                elements['element{0}'.format(str(j))] = {
+                    'quantity': ConfigParam('quantity', DataType.DOUBLE, typed_value=float(rnd.randint(1, 10))),
+                    'unitprice': ConfigParam('unitprice', DataType.DOUBLE, typed_value=rnd.randint(1, 10) / 10)}
+            bid = BiddingObject('1.1', '1.bid{0}'.format(str(i)), AuctioningObjectType.BID, elements, {})
+            bid.set_session('session{0}'.format(str(rnd.randint(1, 5))))
+            bids[bid.get_key()] = bid
+            bid_book.insert(bid, True)
+
+        active_bids = {}
+        for bid_key in bids:
+            active = rnd.random() < 0.8
+            bid_book.set_active(bid_key, active)
+            if active:
+                active_bids[bid_key] = bids[bid_key]
+
+        for discriminatory_price, subsidy in [(0, 1), (0.5, 1.5)]:
+            expected = BidArrays(proc_module.sort_bids_by_price(active_bids, discriminatory_price, subsidy))
+            bid_arrays = BidArrays.from_bid_book(bid_book, discriminatory_price, subsidy)
+            self.assertEqual([(alloc.bidding_object_key, alloc.element_name) for alloc in bid_arrays.allocs],
+                             [(alloc.bidding_object_key, alloc.element_name) for alloc in expected.allocs])
+            self.assertEqual(bid_arrays.prices.tolist(), expected.prices.tolist())
+            self.assertEqual(bid_arrays.quantities.tolist(), expected.quantities.tolist())
+            self.assertEqual(bid_arrays.original_prices.tolist(), expected.original_prices.tolist())
+
+            ordered_bids = proc_module.sort_bid_book_by_price(bid_book, discriminatory_price, subsidy)
+            expected_bids = proc_module.sort_bids_by_price(active_bids, discriminatory_price, subsidy)
+            self.assertEqual(sorted(ordered_bids.keys()), sorted(expected_bids.keys()))
+            for price in expected_bids:
+                self.assertEqual([(alloc.bidding_object_key, alloc.element_name, alloc.quantity)
+                                  for alloc in ordered_bids[price]],
+                                 [(alloc.bidding_object_key, alloc.element_name, alloc.quantity)
+                                  for alloc in expected_bids[price]])
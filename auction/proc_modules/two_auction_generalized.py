@@ -4,23 +4,42 @@ from foundation.config_param import ConfigParam
 from foundation.bidding_object import BiddingObject
 from foundation.auction import AuctioningObjectType
 from foundation.module import ModuleInformation
-from foundation.parse_format import ParseFormats
+from foundation.bid_book import BidBook
+from foundation.config import Config
+from foundation.random_stream import RandomStream
 
 from proc_modules.proc_module import ProcModule
+from proc_modules.proc_module import AuctionParameters
 from proc_modules.proc_module import AllocProc
+from proc_modules.clearing_kernels import BidArrays
+from proc_modules.clearing_kernels import uniform_price
+from proc_modules.clearing_kernels import materialize_allocations
+from proc_modules.clearing_kernels import promoted_units
+from proc_modules.clearing_kernels import random_allocation
+from proc_modules.clearing_kernels import over_reserve_price
 from proc_modules.two_auction_mechanism_generalized import TwoAuctionMechanismGeneralized
 
 from math import floor
 from math import ceil
 import random
 from utils.auction_utils import log
-from typing import List
 from typing import Dict
+from typing import Union
 from typing import DefaultDict
 from datetime import datetime
 from collections import defaultdict
 
 
+# values of q tried for finding q*, from 0.2 in steps of 0.03 up to the first value over 1. They are added up
+# as they were when the values were tried one after the other.
+Q_VALUES = [0.2]
+while Q_VALUES[-1] <= 1.0:
+    Q_VALUES.append(Q_VALUES[-1] + 0.03)
+
+Q_STAR_LIMIT = 0.25
+Q_STAR_CACHE_SIZE = 1024
+
+
 class TwoAuctionGeneralized(Module):
 
     def __init__(self, module_name: str, module_file: str, module_handle, config_group: str):
@@ -31,16 +50,26 @@ class TwoAuctionGeneralized(Module):
         self.reserved_price = 0
         self.domain = 0
         self.proc_module = ProcModule()
+        self.q_star_cache = {}
+        self.q_star_index = {}
+
+        try:
+            self.q_star_tolerance = float(Config().get_config_param('AUMProcessor', 'QStarTolerance'))
+        except ValueError:
+            self.q_star_tolerance = 0.0001
 
-    def init_module(self, config_params: Dict[str, FieldValue]):
+    def init_module(self, config_params: Dict[str, FieldValue]) -> AuctionParameters:
         """
         Initializes the module
 
         :param config_params: dictionary with the given configuration parameters
+        :return: parameters compiled, the auction process keeps them to execute the auction.
         """
         self.logger.debug('in init_module')
         self.config_params = config_params
-        self.domain = self.proc_module.get_param_value('domainid', config_params)
+        params = self.proc_module.compile_params(config_params)
+        self.domain = params.domainid
+        return params
 
 
     def destroy_module(self):
@@ -51,17 +80,34 @@ class TwoAuctionGeneralized(Module):
         self.logger.debug('in destroy_module')
 
     @staticmethod
-    def get_probability() -> float:
+    def get_probability(random_stream: RandomStream = None) -> float:
         """
         Gets a uniform distribution sample for checking if a request should be promoted to
         the low auction
 
+        :param random_stream: random stream of the auction period, the global generator when it is not given.
         :return:
         """
-        return random.uniform(0, 1)
+        if random_stream is None:
+            return random.uniform(0, 1)
+        return random_stream.uniform()
+
+    def get_units_to_pass(self, quantities: list, q: float, random_stream: RandomStream = None) -> list:
+        """
+        Gets the units to pass from the high to the low auction for a list of quantities, every unit
+        passes with probability q.
+
+        :param quantities: quantities requested
+        :param q: probability of promoting a unit
+        :param random_stream: random stream of the auction period
+        :return: units to pass for every quantity.
+        """
+        generator = random_stream.generator if random_stream is not None else None
+        return promoted_units(quantities, q, generator).tolist()
 
     def create_request(self, bids_low: Dict[str, BiddingObject], bids_high: Dict[str, BiddingObject],
-                       q_star: float) -> (DefaultDict[int, list], DefaultDict[float, list], int, int):
+                       q_star: float, random_stream: RandomStream = None) \
+            -> (DefaultDict[int, list], DefaultDict[float, list], int, int):
         """
         Creates allocation requests for low and high auctions. It promotes some high auction bid into the
         low auction
@@ -70,6 +116,7 @@ class TwoAuctionGeneralized(Module):
         :param bids_low:    bids competing in the low auction
         :param bids_high:   bids competing in the high auction
         :param q_star:      probability of being promoted.
+        :param random_stream: random stream of the auction period
 
         :return: allocations request in the low and high auctions.
         """
@@ -88,8 +135,8 @@ class TwoAuctionGeneralized(Module):
             inserted = False
             for element_name in elements:
                 config_params = elements[element_name]
-                price = ParseFormats.parse_float(config_params["unitprice"].value)
-                quantity = ParseFormats.parse_float(config_params["quantity"].value)
+                price = float(config_params["unitprice"].get_typed_value())
+                quantity = float(config_params["quantity"].get_typed_value())
 
                 if quantity > 0:
                     alloc = AllocProc(bidding_object.get_parent_key(), bidding_object.get_key(),
@@ -104,6 +151,14 @@ class TwoAuctionGeneralized(Module):
 
         self.logger.debug("create requests after low budget bids {0}".format(str(len(low_auction_allocs))))
 
+        # draws the units passing to the low auction for all the high budget requests at once.
+        high_quantities = []
+        for bidding_object_key in bids_high:
+            elements = bids_high[bidding_object_key].elements
+            for element_name in elements:
+                high_quantities.append(float(elements[element_name]["quantity"].get_typed_value()))
+        units_to_pass_iter = iter(self.get_units_to_pass(high_quantities, q_star, random_stream))
+
         # go through all high budget bids and pass some of their units as low auction requests.
         high_auction_allocs: DefaultDict[float, list] = defaultdict(list)
         for bidding_object_key in bids_high:
@@ -113,12 +168,9 @@ class TwoAuctionGeneralized(Module):
             inserted = False
             for element_name in elements:
                 config_params = elements[element_name]
-                price = ParseFormats.parse_float(config_params["unitprice"].value)
-                quantity = ParseFormats.parse_float(config_params["quantity"].value)
-                units_to_pass = 0
-                for k in range(0, floor(quantity)):
-                    if self.get_probability() <= q_star:  # pass a unit.
-                        units_to_pass = units_to_pass + 1
+                price = float(config_params["unitprice"].get_typed_value())
+                quantity = float(config_params["quantity"].get_typed_value())
+                units_to_pass = next(units_to_pass_iter)
 
                 # quantities in the H auction.
                 alloc1 = AllocProc(bidding_object.get_parent_key(), bidding_object.get_key(),
@@ -162,145 +214,65 @@ class TwoAuctionGeneralized(Module):
         :param reserved_price:  minimum price for selling and to be used in the allocation.
         :return:
         """
-        sell_price = 0
-        allocations = {}
-
-        sorted_prices = sorted(bids_to_fulfill.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp = bids_to_fulfill[price]
-
-            if price < reserved_price:
-                for i in range(0, len(alloc_temp)):
-                    alloc_temp[i].quantity = 0
-            else:
-                for i in range(0, len(alloc_temp)):
-                    if qty_available < alloc_temp[i].quantity:
-                        alloc_temp[i].quantity = qty_available
-                        if qty_available > 0:
-                            sell_price = price
-                            qty_available = 0
-                    else:
-                        qty_available = qty_available - alloc_temp[i].quantity
-                        sell_price = price
-
-        # There are more units available than requested
-        if qty_available > 0:
-            sell_price = reserved_price
-
-        # Creates allocations
-        sorted_prices = sorted(bids_to_fulfill.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp: List[AllocProc] = bids_to_fulfill[price]
-            for i in range(0, len(alloc_temp)):
-                key = self.proc_module.make_key(alloc_temp[i].auction_key, alloc_temp[i].bidding_object_key)
-                if key in allocations:
-                    self.proc_module.increment_quantity_allocation(allocations[alloc_temp[i].bidding_object_key],
-                                                                   alloc_temp[i].quantity)
-                else:
-                    allocation = self.proc_module.create_allocation(self.domain,
-                                                                    alloc_temp[i].session_id,
-                                                                    alloc_temp[i].bidding_object_key,
-                                                                    start, stop,
-                                                                    alloc_temp[i].quantity,
-                                                                    sell_price)
-
-                    allocations[key] = allocation
-
+        bid_arrays = BidArrays(bids_to_fulfill)
+        allocated, sell_price, qty_left = uniform_price(bid_arrays.prices, bid_arrays.quantities,
+                                                        qty_available, reserved_price)
+        allocations = materialize_allocations(self.proc_module, self.domain, start, stop,
+                                              bid_arrays.allocs, allocated, sell_price)
         self.logger.debug("two auction module: after create allocations - # nbr created: {0}".format(len(allocations)))
         return allocations, sell_price
 
     def execute_auction_random_allocation(self, start: datetime, stop: datetime,
                                           bids_to_fulfill: DefaultDict[int, list],
-                                          qty_available: float, reserved_price: float) -> dict:
+                                          qty_available: float, reserved_price: float,
+                                          random_stream: RandomStream = None) -> dict:
         """
-        Creates allocations according with a random allocation.
+        Creates allocations according with a random allocation, units allocated to every bid are drawn at once
+        and allocations are created at the end.
 
         :param start:              datetime when the allocation will start
         :param stop:               datetime when the allocation will stop
         :param bids_to_fulfill:    allocation requests to be allocated
         :param qty_available:      quantity available to allocations
         :param reserved_price:     minimum price for selling and to be used in the allocation.
+        :param random_stream:      random stream of the auction period
 
         :return: dictionary with created allocations
         """
-        self.logger.debug("execute Action random allocation")
-
-        allocations = {}
-
-        # Create allocations with zero quantity for all bids.
-        sorted_indexes: List[int] = sorted(bids_to_fulfill.keys(), reverse=True)
-        for index in sorted_indexes:
-            self.logger.debug("execute action random allocation 1")
-            sorted_bids = bids_to_fulfill[index]
-            for bid_index in range(len(sorted_bids) - 1, -1, -1):
-                alloc_proc = sorted_bids[bid_index]
+        # Every bid gets an allocation, bids request the units of their elements with price over the reserve price.
+        requests = {}
+        quantities = {}
+        bid_keys = []
+        capacities = []
+        for index in sorted(bids_to_fulfill.keys(), reverse=True):
+            capacity = 0
+            for alloc_proc in reversed(bids_to_fulfill[index]):
                 key = self.proc_module.make_key(alloc_proc.auction_key, alloc_proc.bidding_object_key)
-                if key not in allocations:
-                    allocation = self.proc_module.create_allocation(self.domain,
-                                                                        alloc_proc.session_id,
-                                                                        alloc_proc.bidding_object_key,
-                                                                        start,
-                                                                        stop, 0, reserved_price)
+                requests.setdefault(key, alloc_proc)
+                quantities[key] = 0
+                if over_reserve_price(alloc_proc.original_price, reserved_price):
+                    capacity = capacity + ceil(alloc_proc.quantity)
+                    bid_key = key
 
-                    allocations[key] = allocation
+            if capacity > 0:
+                bid_keys.append(bid_key)
+                capacities.append(capacity)
 
-                # Remove the node if their price is less than the reserve price.
-                if alloc_proc.original_price < reserved_price:
-                    del sorted_bids[bid_index]
-
-            self.logger.debug("execute Action random allocation 2")
-
-            # Remove the bid if all their price elements were less than the reserved price.
-
-            if len(bids_to_fulfill[index]) == 0:
-                del bids_to_fulfill[index]
-
-            self.logger.debug("execute Action random allocation 3")
-
-        self.logger.info("nbr allocation so far: {0}".format(str(len(allocations))))
         self.logger.info("qty available: {0}".format(str(ceil(qty_available))))
-        # Allocates randomly the available quantities
-        indexes = list(bids_to_fulfill.keys())
-        for j in range(0, ceil(qty_available)):
-
-            prob = self.get_probability()
-            length = len(indexes)
-            main_index = floor(prob * length)
-            if len(indexes) == 0:
-                # All units have been assigned and there are no more bids.
-                break
-            else:
-                index = indexes[main_index]
-                # the unit is assigned to the first allocation proc for the bid.
-                bids_to_fulfill[index][0].quantity = bids_to_fulfill[index][0].quantity - 1
-                key = self.proc_module.make_key(bids_to_fulfill[index][0].auction_key,
-                                                bids_to_fulfill[index][0].bidding_object_key)
-
-                # Create or update the allocation
-                if key in allocations:
-                    self.proc_module.increment_quantity_allocation(allocations[key], 1)
-                else:
-                    allocation = self.proc_module.create_allocation(self.domain,
-                                                                    bids_to_fulfill[index][0].session_id,
-                                                                    bids_to_fulfill[index][0].bidding_object_key,
-                                                                    start,
-                                                                    stop, 1, reserved_price)
-                    allocations[key] = allocation
-
-                # Remove the node in case of no more units required.
-                if bids_to_fulfill[index][0].quantity == 0:
-                    bids = bids_to_fulfill[index]
-                    del bids[0]
-
-                    if len(bids_to_fulfill[index]) == 0:
-                        del bids_to_fulfill[index]
-                        del indexes[main_index]
-
-        self.logger.debug("execute Action random allocation")
+        generator = random_stream.generator if random_stream is not None else None
+        units = random_allocation(capacities, ceil(qty_available), generator)
+        for bid_key, bid_units in zip(bid_keys, units.tolist()):
+            quantities[bid_key] = quantities[bid_key] + bid_units
+
+        allocations = {}
+        for key, alloc_proc in requests.items():
+            allocations[key] = self.proc_module.create_allocation(self.domain, alloc_proc.session_id,
+                                                                  alloc_proc.bidding_object_key, start, stop,
+                                                                  quantities[key], reserved_price)
         return allocations
 
     def apply_mechanism(self, start: datetime, stop: datetime, allocations: Dict[str, BiddingObject],
-                        reserved_price: float, q: float):
+                        reserved_price: float, q: float, random_stream: RandomStream = None):
         """
         Apply the two auction mechanism for a set of bidding objects.
 
@@ -309,20 +281,19 @@ class TwoAuctionGeneralized(Module):
         :param allocations:  allocation request to allocate
         :param reserved_price: reserved price to be used for applying the mechanism.
         :param q:     probability of promoting a user competing in the high budget auction.
+        :param random_stream: random stream of the auction period
         :return:
         """
         self.logger.debug("starting ApplyMechanism Q: {0}".format(q))
         allocations2 = {}
 
-        for bidding_object_key in allocations:
-            alloc = allocations[bidding_object_key]
-            quantity = floor(self.proc_module.get_allocation_quantity(alloc))
-            units_to_pass = 0.0
-            for j in range(0, quantity):
-                prob = self.get_probability()
+        quantities = [floor(self.proc_module.get_allocation_quantity(allocations[bidding_object_key]))
+                      for bidding_object_key in allocations]
+        units = self.get_units_to_pass(quantities, q, random_stream)
 
-                if prob <= q:  # pass a unit.
-                    units_to_pass = units_to_pass + 1
+        for bidding_object_key, quantity, units_to_pass in zip(allocations, quantities, units):
+            alloc = allocations[bidding_object_key]
+            units_to_pass = float(units_to_pass)
 
             self.logger.debug("qty to pass: {0}".format(str(units_to_pass)))
             if units_to_pass > 0:
@@ -347,35 +318,137 @@ class TwoAuctionGeneralized(Module):
             allocations[key] = alloc
         self.logger.debug("ending ApplyMechanism")
 
-    def execute(self, request_params: Dict[str, FieldValue], auction_key: str,
-                start: datetime, stop: datetime, bids: dict) -> list:
+    @staticmethod
+    def get_mechanism() -> TwoAuctionMechanismGeneralized:
+        """
+        Gets the mechanism solving q* for a given q
+        """
+        return TwoAuctionMechanismGeneralized()
+
+    def get_q_star_key(self, nh: int, nl: int, bh: float, bl: float, kh: float, kl: float,
+                       rph: float, rpl: float) -> tuple:
+        """
+        Gets the key of the q* cache, values are rounded to the q* tolerance.
+
+        :return: key of the parameters given
+        """
+        return (nh, nl) + tuple(round(float(value) / self.q_star_tolerance) for value in (bh, bl, kh, kl, rph, rpl))
+
+    def find_q_star(self, auction_key: str, nh: int, nl: int, bh: float, bl: float, kh: float, kl: float,
+                    rph: float, rpl: float) -> (float, float):
+        """
+        Finds the probability of promoting a unit from the high to the low auction. It is the first q in Q_VALUES
+        giving a q* lower than Q_STAR_LIMIT, or the last q when none of them does.
+
+        q* decreases as q increases, so the first q is found by bisection starting from the q found in the
+        previous execution of the auction. When the q* solved do not decrease, the values are tried one after the
+        other from the first one. Solutions are cached by their parameters rounded to q_star_tolerance.
+
+        :param auction_key: auction being executed
+        :param nh: quantity requested in the high auction
+        :param nl: quantity requested in the low auction
+        :param bh: maximum value in the high auction
+        :param bl: maximum value in the low auction
+        :param kh: quantity to sell in the high auction
+        :param kl: quantity to sell in the low auction
+        :param rph: reserve price in the high auction
+        :param rpl: reserve price in the low auction
+        :return: q and the q* solved for it.
+        """
+        key = self.get_q_star_key(nh, nl, bh, bl, kh, kl, rph, rpl)
+        if key in self.q_star_cache:
+            index, q_star = self.q_star_cache[key]
+            self.q_star_index[auction_key] = index
+            self.logger.info("Q: {0} qStar: {1} (cached)".format(str(Q_VALUES[index]), str(q_star)))
+            return Q_VALUES[index], q_star
+
+        mechanism = self.get_mechanism()
+        solved = {}
+
+        def solve(pos: int) -> float:
+            if pos not in solved:
+                res, a, b = mechanism.zero_in(nh, nl, bh, bl, kh, kl, rph, rpl, Q_VALUES[pos], 0.01, 0.8)
+                solved[pos] = a
+                self.logger.info("Q: {0} qStar: {1}".format(str(Q_VALUES[pos]), str(a)))
+            return solved[pos]
+
+        def accepted(pos: int) -> bool:
+            return solve(pos) < Q_STAR_LIMIT
+
+        # brackets the first q accepted between low (not accepted) and high, growing the step from the warm start.
+        last = len(Q_VALUES) - 1
+        start = self.q_star_index.get(auction_key, 0)
+        step = 1
+        if accepted(start):
+            high = start
+            low = start - step
+            while low >= 0 and accepted(low):
+                high = low
+                step = step * 2
+                low = high - step
+            low = max(low, -1)
+        else:
+            low = start
+            high = start + step
+            while high < last and not accepted(high):
+                low = high
+                step = step * 2
+                high = low + step
+            high = min(high, last)
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            if accepted(middle):
+                high = middle
+            else:
+                low = middle
+
+        positions = sorted(solved)
+        if any(solved[pos] < solved[next_pos] for pos, next_pos in zip(positions, positions[1:])):
+            # the bisection does not hold when q* does not decrease, the first q accepted is searched linearly.
+            self.logger.warning("q* does not decrease with q, searching q linearly")
+            high = next((pos for pos in range(0, last + 1) if accepted(pos)), last)
+
+        q_star = solve(high)
+        if len(self.q_star_cache) >= Q_STAR_CACHE_SIZE:
+            self.q_star_cache.clear()
+        self.q_star_cache[key] = (high, q_star)
+        self.q_star_index[auction_key] = high
+        return Q_VALUES[high], q_star
+
+    def execute(self, request_params: Union[AuctionParameters, Dict[str, FieldValue]], auction_key: str,
+                start: datetime, stop: datetime, bids: dict, bid_book: BidBook = None,
+                random_stream: RandomStream = None) -> list:
         """
         Executes the auction procedure for an specific auction.
 
-        :param request_params: request params included
+        :param request_params: auction parameters, as compiled by init_module or as field values
         :param auction_key: auction key identifying the auction
         :param start: start datetime
         :param stop: stop datetime
         :param bids: bidding objects included
+        :param bid_book: bid book of the auction process, not used as bids are separated by budget.
+        :param random_stream: random stream of the auction period, the global generators are used without it.
         :return:
         """
 
         self.logger.info("two auction generalized module: start execute {0}".format(len(bids)))
 
-        bandwidth_to_sell_low = self.proc_module.get_param_value('bandwidth01', request_params)
-        bandwidth_to_sell_high = self.proc_module.get_param_value('bandwidth02', request_params)
+        params = self.proc_module.get_auction_params(request_params)
+        bandwidth_to_sell_low = params.bandwidth01
+        bandwidth_to_sell_high = params.bandwidth02
 
         self.logger.info('bandwidth_to_sell_low:{0} - bandwidth_to_sell_high:{1}'.format(str(bandwidth_to_sell_low),
                                                                                          str(bandwidth_to_sell_high)))
 
-        reserve_price_low: float = self.proc_module.get_param_value('reserveprice01', request_params)
-        reserve_price_high: float = self.proc_module.get_param_value('reserveprice02', request_params)
+        reserve_price_low: float = params.reserveprice01
+        reserve_price_high: float = params.reserveprice02
 
         self.logger.info('reserve_price_low: {0} - reserve_price_high:{1}'.format(str(reserve_price_low),
                                                                                   str(reserve_price_high)))
 
-        bl = self.proc_module.get_param_value('maxvalue01', request_params)
-        bh = self.proc_module.get_param_value('maxvalue02', request_params)
+        bl = params.maxvalue01
+        bh = params.maxvalue02
 
         tot_demand = self.proc_module.calculate_requested_quantities(bids)
 
@@ -402,65 +475,38 @@ class TwoAuctionGeneralized(Module):
             self.logger.info("Number of quantities requested low:{0} high:{1}".format(str(nl), str(nh)))
 
             q_star = 0
-            q = 0.2
+            q = Q_VALUES[0]
 
             self.logger.info("Starting the execution of the mechanism")
 
             if nl > 0 and nh > 0:
 
                 # Find the probability of changing from the high budget to low budget auction.
-                mechanism = TwoAuctionMechanismGeneralized()
-                a = 0.01
-                b = 0.8
-
                 message = "nh:{0} nl:{1} bh:{2} bl:{3} bandwidth_to_sell_high:{4}".format(str(nh), str(nl),
                                                                                           str(bh), str(bl),
                                                                                           str(bandwidth_to_sell_high))
                 message = message + " bandwidth_to_sell_low:{0} reserve_price_high:{1} reserve_price_low:{2}".format(
                     str(bandwidth_to_sell_low), str(reserve_price_high), str(reserve_price_low))
-
-                message = message + " q:{0} a:{1} b:{2}".format(str(q), str(a), str(b))
                 self.logger.info(message)
 
-                res, a, b = mechanism.zero_in(nh, nl, bh, bl, bandwidth_to_sell_high,
-                                              bandwidth_to_sell_low, reserve_price_high, reserve_price_low, q, a, b)
-                q_star = a
-
-                while (q_star >= 0.25) and (q <= 1.0):
-                    q = q + 0.03
-                    a = 0.01
-                    b = 0.8
-
-                    message = "nh:{0} nl:{1} bh:{2} bl:{3} bandwidth_to_sell_high:{4}".format(str(nh), str(nl),
-                                                                                              str(bh), str(bl),
-                                                                                              str(
-                                                                                                  bandwidth_to_sell_high))
-                    message = message + " bandwidth_to_sell_low:{0} reserve_price_high:{1} reserve_price_low:{2}".format(
-                        str(bandwidth_to_sell_low), str(reserve_price_high), str(reserve_price_low))
-
-                    message = message + " q:{0} a:{1} b:{2}".format(str(q), str(a), str(b))
-                    self.logger.info(message)
-
-                    res, a, b = mechanism.zero_in(nh, nl, bh, bl, bandwidth_to_sell_high,
-                                                  bandwidth_to_sell_low, reserve_price_high, reserve_price_low, q, a, b)
-
-                    q_star = a
-
-                    self.logger.info("Q: {0} qStar: {1}".format(str(q), str(q_star)))
+                q, q_star = self.find_q_star(auction_key, nh, nl, bh, bl, bandwidth_to_sell_high,
+                                             bandwidth_to_sell_low, reserve_price_high, reserve_price_low)
 
             self.logger.info("Finished the execution of the mechanism q_start {0}".format(str(q_star)))
 
             self.logger.info("bids_low {0} - bids_high {1}".format(len(bids_low), len(bids_high)))
 
             # Create requests for both auctions, it passes the users from an auction to the other.
-            low_auction_allocs, high_auction_allocs, nl, nh = self.create_request(bids_low, bids_high, q_star)
+            low_auction_allocs, high_auction_allocs, nl, nh = self.create_request(bids_low, bids_high, q_star,
+                                                                                  random_stream)
 
             self.logger.info("low auctions_allocs {0} - high_auction_allocs {1}".format(len(low_auction_allocs),
                                                                                         len(high_auction_allocs)))
             # Execute auctions.
 
             allocations_low = self.execute_auction_random_allocation(start, stop, low_auction_allocs,
-                                                                     bandwidth_to_sell_low, reserve_price_low)
+                                                                     bandwidth_to_sell_low, reserve_price_low,
+                                                                     random_stream)
 
             allocations_high, reserve_price_high = self.execute_auction(start, stop, high_auction_allocs,
                                                                         bandwidth_to_sell_high, reserve_price_high)
@@ -495,7 +541,7 @@ class TwoAuctionGeneralized(Module):
 
             if q > 0:
                 # change bids from the high budget to low budget auction.
-                self.apply_mechanism(start, stop, allocations_high, reserve_price_low, q)
+                self.apply_mechanism(start, stop, allocations_high, reserve_price_low, q, random_stream)
 
             # Convert from the map to the final returning vector
             allocation_res = []
@@ -517,7 +563,7 @@ class TwoAuctionGeneralized(Module):
 
             # All bids get units and pay the reserved price of the L Auction
             bids_low = {}
-            low_auction_allocs, high_auction_allocs, nl, nh = self.create_request(bids_low, bids, 0)
+            low_auction_allocs, high_auction_allocs, nl, nh = self.create_request(bids_low, bids, 0, random_stream)
 
             allocations, reserve_price_low = self.execute_auction(start, stop, high_auction_allocs,
                                                                   bandwidth_to_sell_low + bandwidth_to_sell_high,
@@ -3,9 +3,14 @@ from foundation.bidding_object_manager import BiddingObjectManager
 from foundation.module_loader import ModuleLoader
 from foundation.config import Config
 from foundation.field_value import FieldValue
+from foundation.random_stream import RandomStream
+from proc_modules.two_auction_generalized import TwoAuctionGeneralized
+import numpy as np
 
 from datetime import datetime
 from datetime import timedelta
+from math import comb
+import random
 
 
 class TwoAuctionGeneralizedTest(unittest.TestCase):
@@ -234,4 +239,160 @@ class TwoAuctionGeneralizedTest(unittest.TestCase):
                 qty_allocates.append(qty)
 
             print(sell_prices)
-            print(qty_allocates)
\ No newline at end of file
+            print(qty_allocates)
+
+
+class UnitPromotionTest(unittest.TestCase):
+    """
+    Compares the units promoted to the low auction against promoting every unit with its own uniform draw.
+    """
+
+    def setUp(self):
+        Config('auction_server.yaml')
+        self.module = TwoAuctionGeneralized("two_auction_generalized", "two_auction_generalized.py",
+                                            None, "AUMProcessor")
+        random.seed(10)
+        np.random.seed(10)
+
+    @staticmethod
+    def get_units_to_pass_by_unit(rnd: random.Random, quantities: list, q: float) -> list:
+        units_to_pass = []
+        for quantity in quantities:
+            units = 0
+            for k in range(0, int(quantity)):
+                if rnd.uniform(0, 1) <= q:
+                    units = units + 1
+            units_to_pass.append(units)
+        return units_to_pass
+
+    def test_promoted_units_distribution(self):
+        quantity = 10
+        q = 0.3
+        nbr_samples = 5000
+        units = self.module.get_units_to_pass([quantity] * nbr_samples, q)
+        units_by_unit = self.get_units_to_pass_by_unit(random.Random(20), [quantity] * nbr_samples, q)
+
+        # counts by number of units, values from 8 units are merged as they are not frequent.
+        counts = [0] * 9
+        counts_by_unit = [0] * 9
+        for value, value_by_unit in zip(units, units_by_unit):
+            counts[min(value, 8)] += 1
+            counts_by_unit[min(value_by_unit, 8)] += 1
+
+        # chi square homogeneity test, critical value for 8 degrees of freedom and alpha 0.001.
+        chi_square = sum((a - b) ** 2 / (a + b) for a, b in zip(counts, counts_by_unit) if a + b > 0)
+        self.assertLess(chi_square, 26.12)
+
+        # chi square goodness of fit against the binomial distribution.
+        expected = [nbr_samples * comb(quantity, k) * q ** k * (1 - q) ** (quantity - k) for k in range(0, 8)]
+        expected.append(nbr_samples - sum(expected))
+        chi_square = sum((count - value) ** 2 / value for count, value in zip(counts, expected))
+        self.assertLess(chi_square, 26.12)
+
+    def test_promoted_units_large_quantities(self):
+        q = 0.3
+        quantities = [1000.5] * 2000
+        units = self.module.get_units_to_pass(quantities, q)
+        mean = sum(units) / len(units)
+        variance = sum((value - mean) ** 2 for value in units) / (len(units) - 1)
+        self.assertAlmostEqual(mean, 1000 * q, delta=4 * (1000 * q * (1 - q) / len(units)) ** 0.5)
+        self.assertAlmostEqual(variance, 1000 * q * (1 - q), delta=0.15 * 1000 * q * (1 - q))
+
+        self.assertEqual(self.module.get_units_to_pass([5, 0.5, 3], 0), [0, 0, 0])
+        self.assertEqual(self.module.get_units_to_pass([5, 0.5, 3], 1), [5, 0, 3])
+
+    def test_random_stream(self):
+        start = datetime(2019, 1, 1, 10, 0, 0)
+        quantities = [10] * 100
+
+        # streams of the same period give the same units, whatever was drawn before.
+        units = self.module.get_units_to_pass(quantities, 0.3, RandomStream(5, '1.1', start))
+        random.random()
+        units_again = self.module.get_units_to_pass(quantities, 0.3, RandomStream(5, '1.1', start))
+        self.assertEqual(units, units_again)
+
+        units_next = self.module.get_units_to_pass(quantities, 0.3,
+                                                   RandomStream(5, '1.1', start + timedelta(seconds=10)))
+        self.assertNotEqual(units, units_next)
+
+
+class QStarMechanism:
+    """
+    Mechanism with q* decreasing as q increases, q* = scale / q.
+    """
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.calls = 0
+
+    def zero_in(self, nh: int, nl: int, bh: float, bl: float, kh: float, kl: float, rph: float, rpl: float,
+                q: float, x: float, y: float) -> (int, float, float):
+        self.calls = self.calls + 1
+        return 0, self.scale / q, y
+
+
+class QStarPeakMechanism(QStarMechanism):
+    """
+    Mechanism with q* lower than the limit for the lowest and the highest q, and growing for q in between.
+    """
+
+    def zero_in(self, nh: int, nl: int, bh: float, bl: float, kh: float, kl: float, rph: float, rpl: float,
+                q: float, x: float, y: float) -> (int, float, float):
+        self.calls = self.calls + 1
+        if q < 0.25 or q > 0.7:
+            return 0, self.scale, y
+        return 0, 0.3 + q - 0.25, y
+
+
+class QStarSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        Config('auction_server.yaml')
+        self.mechanism = QStarMechanism(0.1)
+        self.module = TwoAuctionGeneralized("two_auction_generalized", "two_auction_generalized.py",
+                                            None, "AUMProcessor")
+        self.module.get_mechanism = lambda: self.mechanism
+
+    def find_q_star_by_steps(self) -> (float, float):
+        q = 0.2
+        res, q_star, b = self.mechanism.zero_in(10, 10, 1, 0.5, 5, 5, 0.1, 0.1, q, 0.01, 0.8)
+        while (q_star >= 0.25) and (q <= 1.0):
+            q = q + 0.03
+            res, q_star, b = self.mechanism.zero_in(10, 10, 1, 0.5, 5, 5, 0.1, 0.1, q, 0.01, 0.8)
+        return q, q_star
+
+    def test_find_q_star(self):
+        for scale in [0.01, 0.05, 0.1, 0.15, 0.2, 0.22, 0.3]:
+            self.mechanism.scale = scale
+            expected_q, expected = self.find_q_star_by_steps()
+            self.module.q_star_cache.clear()
+            q, q_star = self.module.find_q_star("1.1", 10, 10, 1, 0.5, 5, 5, 0.1, 0.1)
+            self.assertEqual(q, expected_q)
+            self.assertAlmostEqual(q_star, expected, delta=self.module.q_star_tolerance)
+
+    def test_cache_and_warm_start(self):
+        q, q_star = self.module.find_q_star("1.1", 10, 10, 1, 0.5, 5, 5, 0.1, 0.1)
+        self.assertLess(self.mechanism.calls, 10)
+
+        # parameters equal up to the tolerance are not solved again.
+        self.mechanism.calls = 0
+        self.assertEqual(self.module.find_q_star("1.1", 10, 10, 1, 0.5, 5, 5, 0.1, 0.1 + 1e-6), (q, q_star))
+        self.assertEqual(self.mechanism.calls, 0)
+
+        # the search starts from the q found in the previous execution.
+        self.mechanism.scale = 0.101
+        q, q_star = self.module.find_q_star("1.1", 10, 10, 1, 0.5, 6, 5, 0.1, 0.1)
+        self.assertEqual(self.mechanism.calls, 2)
+        expected_q, expected = self.find_q_star_by_steps()
+        self.assertEqual(q, expected_q)
+        self.assertAlmostEqual(q_star, expected, delta=self.module.q_star_tolerance)
+
+    def test_not_decreasing(self):
+        # the search starts from a high q, the bisection would stop at the q after the peak.
+        self.mechanism = QStarPeakMechanism(0.1)
+        self.module.q_star_index["1.1"] = 20
+        q, q_star = self.module.find_q_star("1.1", 10, 10, 1, 0.5, 5, 5, 0.1, 0.1)
+        expected_q, expected = self.find_q_star_by_steps()
+        self.assertEqual(expected_q, 0.2)
+        self.assertEqual(q, expected_q)
+        self.assertAlmostEqual(q_star, expected, delta=self.module.q_star_tolerance)
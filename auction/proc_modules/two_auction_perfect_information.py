@@ -2,18 +2,23 @@ from foundation.module import Module
 from foundation.field_value import FieldValue
 from foundation.config_param import ConfigParam
 from foundation.bidding_object import BiddingObject
-from foundation.parse_format import ParseFormats
 from foundation.module import ModuleInformation
+from foundation.bid_book import BidBook
+from foundation.random_stream import RandomStream
 
 from utils.auction_utils import log
 
 from proc_modules.proc_module import ProcModule
+from proc_modules.proc_module import AuctionParameters
 from proc_modules.proc_module import AllocProc
+from proc_modules.clearing_kernels import BidArrays
+from proc_modules.clearing_kernels import uniform_price
+from proc_modules.clearing_kernels import materialize_allocations
 
 from math import ceil
 
-from typing import List
 from typing import Dict
+from typing import Union
 from typing import DefaultDict
 from datetime import datetime
 from collections import defaultdict
@@ -30,15 +35,18 @@ class TwoAuctionPerfectInformation(Module):
         self.domain = 0
         self.proc_module = ProcModule()
 
-    def init_module(self, config_params: Dict[str, FieldValue]):
+    def init_module(self, config_params: Dict[str, FieldValue]) -> AuctionParameters:
         """
         Initializes the module
 
         :param config_params: dictionary with the given configuration parameters
+        :return: parameters compiled, the auction process keeps them to execute the auction.
         """
         self.logger.debug('in init_module')
         self.config_params = config_params
-        self.domain = self.proc_module.get_param_value('domainid', config_params)
+        params = self.proc_module.compile_params(config_params)
+        self.domain = params.domainid
+        return params
 
 
     def destroy_module(self):
@@ -67,8 +75,8 @@ class TwoAuctionPerfectInformation(Module):
             elements = bidding_object.elements
             for element_name in elements:
                 config_params = elements[element_name]
-                price = ParseFormats.parse_float(config_params["unitprice"].value)
-                quantity = ParseFormats.parse_float(config_params["quantity"].value)
+                price = float(config_params["unitprice"].get_typed_value())
+                quantity = float(config_params["quantity"].get_typed_value())
 
                 alloc = AllocProc(bidding_object.get_parent_key(), bidding_object.get_key(),
                                   element_name, bidding_object.get_session(), quantity, price)
@@ -90,79 +98,44 @@ class TwoAuctionPerfectInformation(Module):
         :param reserved_price:  minimum price for selling and to be used in the allocation.
         :return:
         """
-        sell_price = 0
-        allocations = {}
-
-        sorted_prices = sorted(bids_to_fulfill.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp = bids_to_fulfill[price]
-
-            if price < reserved_price:
-                for i in range(0, len(alloc_temp)):
-                    alloc_temp[i].quantity = 0
-            else:
-                for i in range(0, len(alloc_temp)):
-                    if qty_available < alloc_temp[i].quantity:
-                        alloc_temp[i].quantity = qty_available
-                        if qty_available > 0:
-                            sell_price = price
-                            qty_available = 0
-                    else:
-                        qty_available = qty_available - alloc_temp[i].quantity
-                        sell_price = price
-
-        # There are more units available than requested
-        if qty_available > 0:
-            sell_price = reserved_price
-
-        # Creates allocations
-        sorted_prices = sorted(bids_to_fulfill.keys(), reverse=True)
-        for price in sorted_prices:
-            alloc_temp: List[AllocProc] = bids_to_fulfill[price]
-            for i in range(0, len(alloc_temp)):
-                key = self.proc_module.make_key(alloc_temp[i].auction_key, alloc_temp[i].bidding_object_key)
-                if key in allocations:
-                    self.proc_module.increment_quantity_allocation(allocations[alloc_temp[i].bidding_object_key],
-                                                                   alloc_temp[i].quantity)
-                else:
-                    allocation = self.proc_module.create_allocation(self.domain,
-                                                                    alloc_temp[i].session_id,
-                                                                    alloc_temp[i].bidding_object_key,
-                                                                    start, stop,
-                                                                    alloc_temp[i].quantity,
-                                                                    sell_price)
-
-                    allocations[key] = allocation
-
+        bid_arrays = BidArrays(bids_to_fulfill)
+        allocated, sell_price, qty_left = uniform_price(bid_arrays.prices, bid_arrays.quantities,
+                                                        qty_available, reserved_price)
+        allocations = materialize_allocations(self.proc_module, self.domain, start, stop,
+                                              bid_arrays.allocs, allocated, sell_price)
         self.logger.debug("two auction module: after create allocations - # nbr created: {0}".format(len(allocations)))
         return allocations, sell_price
 
-    def execute(self, request_params: Dict[str, FieldValue], auction_key: str,
-                start: datetime, stop: datetime, bids: dict) -> list:
+    def execute(self, request_params: Union[AuctionParameters, Dict[str, FieldValue]], auction_key: str,
+                start: datetime, stop: datetime, bids: dict, bid_book: BidBook = None,
+                random_stream: RandomStream = None) -> list:
         """
         Executes the auction procedure for an specific auction.
 
-        :param request_params: request params included
+        :param request_params: auction parameters, as compiled by init_module or as field values
         :param auction_key: auction key identifying the auction
         :param start: start datetime
         :param stop: stop datetime
         :param bids: bidding objects included
+        :param bid_book: bid book of the auction process, not used as bids are separated by budget.
+        :param random_stream: random stream of the auction period, not used as the mechanism is deterministic.
         :return:
         """
         self.logger.debug("bas module: start execute num bids:{0}".format(str(len(bids))))
-        bandwidth_to_sell_low = self.proc_module.get_param_value('bandwidth01', request_params)
-        bandwidth_to_sell_high = self.proc_module.get_param_value('bandwidth02', request_params)
+        params = self.proc_module.get_auction_params(request_params)
+        bandwidth_to_sell_low = params.bandwidth01
+        bandwidth_to_sell_high = params.bandwidth02
 
         self.logger.debug('bandwidth_to_sell_low:{0} - bandwidth_to_sell_high:{1}'.format(str(bandwidth_to_sell_low),
                                                                                           str(bandwidth_to_sell_high)))
 
-        reserve_price_low: float = self.proc_module.get_param_value('reserveprice01', request_params)
-        reserve_price_high: float = self.proc_module.get_param_value('reserveprice02', request_params)
+        reserve_price_low: float = params.reserveprice01
+        reserve_price_high: float = params.reserveprice02
 
         self.logger.debug('reserve_price_low: {0} - reserve_price_high:{1}'.format(str(reserve_price_low),
                                                                                    str(reserve_price_high)))
 
-        bl = self.proc_module.get_param_value('maxvalue01', request_params)
+        bl = params.maxvalue01
 
         bids_low, bids_high = self.proc_module.separate_bids(bids, bl)
 
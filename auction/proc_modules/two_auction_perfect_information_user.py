@@ -3,6 +3,8 @@ from foundation.auction import AuctioningObjectType
 from foundation.bidding_object import BiddingObject
 from foundation.field_value import FieldValue
 from foundation.module import ModuleInformation
+from foundation.bid_book import BidBook
+from foundation.random_stream import RandomStream
 
 from proc_modules.proc_module import ProcModule
 
@@ -80,7 +82,8 @@ class TwoAuctionPerfectInformationUser(Module):
         pass
 
     def execute(self, request_params: Dict[str, FieldValue], auction_key: str,
-                start: datetime, stop: datetime, bids: dict) -> list:
+                start: datetime, stop: datetime, bids: dict, bid_book: BidBook = None,
+                random_stream: RandomStream = None) -> list:
         return []
 
     def execute_user(self, request_params: Dict[str, FieldValue], auctions: dict,
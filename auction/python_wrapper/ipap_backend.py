@@ -0,0 +1,18 @@
+import os
+
+# Backend used to encode and decode ipap messages:
+#   native: libipap.so through ctypes (default)
+#   python: pure python codec in python_wrapper.ipap_codec, libipap.so is not required. Its messages are
+#           only wire compatible with libipap when the fixture recorded from it is present, see
+#           ipap_codec.is_wire_compatible.
+#
+# It is read from the environment because the wrappers are bound when they are imported,
+# before the agents load their configuration file.
+NATIVE_BACKEND = 'native'
+PYTHON_BACKEND = 'python'
+
+IPAP_BACKEND = os.environ.get('IPAP_BACKEND', NATIVE_BACKEND).lower()
+
+if IPAP_BACKEND not in [NATIVE_BACKEND, PYTHON_BACKEND]:
+    raise ValueError("Invalid ipap backend {0}, valid backends are: {1}, {2}".format(
+        IPAP_BACKEND, NATIVE_BACKEND, PYTHON_BACKEND))
@@ -0,0 +1,1181 @@
+"""
+Pure python IPAP codec.
+
+It gives the same public interface as the libipap wrappers (IpapValueField, IpapFieldKey, IpapField,
+IpapFieldContainer, IpapTemplate, IpapDataRecord, IpapMessage and template containers), encoding messages
+with struct. It is used instead of libipap.so when IPAP_BACKEND=python (see ipap_backend).
+
+Message layout:
+
+    header        version (16) | flags (16) | length (32) | export time (32) | seqno (32) | ackseqno (32) |
+                  domain (32)
+    set           set id (16) | length (16) | records
+    template      template id (16) | template type (16) | field count (16) | field specifiers
+    field spec    ftype (16, enterprise bit set when eno != 0) | length (16) | [eno (32)]
+    data record   field values in template order. Variable length values are prefixed by their length
+                  with one byte, or 255 followed by two bytes when they are longer than 254 bytes.
+
+Templates go in sets with id 2, data records in sets whose id is their template id. Header, set and
+template fields are always in network order, field values in network order when encode network is set.
+
+The header is not the IPFIX (RFC 7011) one, which has no flags and acknowledge number and 16 bit version and
+length; set ids, template records and field specifiers follow IPFIX.
+
+The fields defined by libipap and its template tables are taken from the library when it can be loaded, and
+otherwise from the tables recorded from it, see ipap_native. The encoded messages recorded with them check this
+codec byte for byte against the library. When neither is available the codec falls back on the tables written
+in this module and the layout above, which were not checked against libipap: messages are only known to be read
+by this codec, see is_wire_compatible. Record the fixture with ipap_native.record() on a host with libipap.so.
+
+Field definitions come from the field definition file, they are set with set_field_definitions.
+"""
+import ipaddress
+import time
+from copy import copy
+from struct import Struct
+from struct import error as StructError
+
+from python_wrapper.ipap_template_types import TemplateType
+from python_wrapper.ipap_template_types import UnknownField
+from python_wrapper.ipap_template_types import ObjectType
+from python_wrapper.ipap_template_codec import IpapTemplateCodec
+from python_wrapper.ipap_float32 import float32_value
+
+# Value codings, as in libipfix.
+IPAP_CODING_INT = 1
+IPAP_CODING_UINT = 2
+IPAP_CODING_BYTES = 3
+IPAP_CODING_STRING = 4
+IPAP_CODING_FLOAT = 5
+IPAP_CODING_NTP = 6
+IPAP_CODING_IPADDR = 7
+
+IPAP_FT_VARLEN = 65535
+IPAP_ENTERPRISE_BIT = 0x8000
+IPAP_TEMPLATE_SET_ID = 2
+IPAP_MIN_TEMPLATE_ID = 256
+IPAP_MAX_SET_LENGTH = 65535
+
+IPAP_FLAG_SYN = 0x0001
+IPAP_FLAG_ACK = 0x0002
+IPAP_FLAG_FIN = 0x0004
+
+HEADER = Struct('!HHIIIII')
+SET_HEADER = Struct('!HH')
+TEMPLATE_HEADER = Struct('!HHH')
+FIELD_SPECIFIER = Struct('!HH')
+ENTERPRISE_NUMBER = Struct('!I')
+VARLEN_SHORT = Struct('!B')
+VARLEN_LONG = Struct('!BH')
+
+# struct format of numeric values by coding and length.
+_NUMERIC_FORMATS = {
+    (IPAP_CODING_INT, 1): 'b', (IPAP_CODING_INT, 2): 'h', (IPAP_CODING_INT, 4): 'i', (IPAP_CODING_INT, 8): 'q',
+    (IPAP_CODING_UINT, 1): 'B', (IPAP_CODING_UINT, 2): 'H', (IPAP_CODING_UINT, 4): 'I', (IPAP_CODING_UINT, 8): 'Q',
+    (IPAP_CODING_FLOAT, 4): 'f', (IPAP_CODING_FLOAT, 8): 'd',
+}
+
+# Coding and length of the fields defined in the field definition file by data type name.
+_FIELD_CODINGS = {
+    'CHAR': (IPAP_CODING_UINT, 1), 'BINARY': (IPAP_CODING_BYTES, 1),
+    'INT8': (IPAP_CODING_INT, 1), 'INT16': (IPAP_CODING_INT, 2),
+    'INT32': (IPAP_CODING_INT, 4), 'INT64': (IPAP_CODING_INT, 8),
+    'UINT8': (IPAP_CODING_UINT, 1), 'UINT16': (IPAP_CODING_UINT, 2),
+    'UINT32': (IPAP_CODING_UINT, 4), 'UINT64': (IPAP_CODING_UINT, 8),
+    'FLOAT': (IPAP_CODING_FLOAT, 4), 'DOUBLE': (IPAP_CODING_FLOAT, 8),
+    'IPV4ADDR': (IPAP_CODING_IPADDR, 4), 'IPV6ADDR': (IPAP_CODING_IPADDR, 16),
+    'STRING': (IPAP_CODING_STRING, IPAP_FT_VARLEN),
+}
+
+# Fields libipap defines itself, out of the field definition file. They are used with the tables below when
+# neither libipap.so nor the tables recorded from it are available.
+_BUILTIN_FIELDS = [
+    (0, 30, 8, IPAP_CODING_UINT, b'endMilliSeconds', b'endMilliSeconds', b''),
+]
+
+# Mandatory fields by template type.
+_MANDATORY_FIELDS = {
+    TemplateType.IPAP_SETID_AUCTION_TEMPLATE: ['auctionid', 'recordid', 'status', 'ipversion', 'dstipv6', 'dstipv4',
+                                               'dstauctionport', 'resourceid', 'start', 'stop', 'interval',
+                                               'templatelist'],
+    TemplateType.IPAP_OPTNS_AUCTION_TEMPLATE: ['auctionid', 'recordid', 'algoritmname'],
+    TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid', 'recordid', 'status',
+                                                  'biddingobjecttype'],
+    TemplateType.IPAP_OPTNS_BID_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid', 'recordid', 'start', 'stop'],
+    TemplateType.IPAP_SETID_ASK_OBJECT_TEMPLATE: ['recordid', 'resourceid'],
+    TemplateType.IPAP_OPTNS_ASK_OBJECT_TEMPLATE: ['recordid', 'resourceid', 'start', 'stop', 'interval', 'ipversion',
+                                                  'srcipv6', 'srcipv4', 'srcauctionport'],
+    TemplateType.IPAP_SETID_ALLOC_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid', 'recordid', 'status',
+                                                    'biddingobjecttype'],
+    TemplateType.IPAP_OPTNS_ALLOC_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid', 'recordid', 'start', 'stop'],
+}
+
+# Fields identifying the object a record belongs to by template type.
+_KEY_FIELDS = {
+    TemplateType.IPAP_SETID_AUCTION_TEMPLATE: ['auctionid'],
+    TemplateType.IPAP_OPTNS_AUCTION_TEMPLATE: ['auctionid'],
+    TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid'],
+    TemplateType.IPAP_OPTNS_BID_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid'],
+    TemplateType.IPAP_SETID_ASK_OBJECT_TEMPLATE: ['resourceid'],
+    TemplateType.IPAP_OPTNS_ASK_OBJECT_TEMPLATE: ['resourceid'],
+    TemplateType.IPAP_SETID_ALLOC_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid'],
+    TemplateType.IPAP_OPTNS_ALLOC_OBJECT_TEMPLATE: ['auctionid', 'biddingobjectid'],
+}
+
+# Data and options template types by object type.
+_OBJECT_TEMPLATE_TYPES = {
+    ObjectType.IPAP_AUCTION: [TemplateType.IPAP_SETID_AUCTION_TEMPLATE, TemplateType.IPAP_OPTNS_AUCTION_TEMPLATE],
+    ObjectType.IPAP_BID: [TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE, TemplateType.IPAP_OPTNS_BID_OBJECT_TEMPLATE],
+    ObjectType.IPAP_ASK: [TemplateType.IPAP_SETID_ASK_OBJECT_TEMPLATE, TemplateType.IPAP_OPTNS_ASK_OBJECT_TEMPLATE],
+    ObjectType.IPAP_ALLOCATION: [TemplateType.IPAP_SETID_ALLOC_OBJECT_TEMPLATE,
+                                 TemplateType.IPAP_OPTNS_ALLOC_OBJECT_TEMPLATE],
+}
+
+
+# Function giving the field definitions by name, as FieldDefManager.get_field_defs.
+_field_definitions = None
+
+
+def set_field_definitions(field_definitions):
+    """
+    Sets where the codec takes the fields defined in the field definition file from.
+
+    :param field_definitions: function without parameters giving the field definitions by name, every one with
+                              its eno, ftype, name and type, whose name is the name of its data type.
+    """
+    global _field_definitions
+    _field_definitions = field_definitions
+
+
+def get_field_definitions() -> dict:
+    """
+    Gets the fields defined in the field definition file, see set_field_definitions.
+
+    :return: field definitions by name
+    """
+    if _field_definitions is None:
+        raise ValueError('The field definitions were not set, see set_field_definitions')
+    return _field_definitions()
+
+
+def _get_default_tables() -> dict:
+    """
+    Gets the tables written in this module, in the format of ipap_native.read_tables.
+    """
+    field_definitions = get_field_definitions()
+
+    def get_codes(field_names: list) -> list:
+        return [(field_definitions[name]['eno'], field_definitions[name]['ftype']) for name in field_names]
+
+    fields = {}
+    for key, field_def in field_definitions.items():
+        coding, length = _FIELD_CODINGS.get(field_def['type'].name, (IPAP_CODING_BYTES, IPAP_FT_VARLEN))
+        # the first definition wins when two share the same code.
+        fields.setdefault((field_def['eno'], field_def['ftype']),
+                          (field_def['eno'], field_def['ftype'], length, coding, field_def['name'].encode('utf-8'),
+                           key.encode('utf-8'), field_def['name'].encode('utf-8')))
+    for field in _BUILTIN_FIELDS:
+        fields[(field[0], field[1])] = field
+
+    return {'fields': list(fields.values()),
+            'mandatory_fields': {templ_type: get_codes(names) for templ_type, names in _MANDATORY_FIELDS.items()},
+            'key_fields': {templ_type: get_codes(names) for templ_type, names in _KEY_FIELDS.items()},
+            'object_template_types': {object_type: list(templ_types)
+                                      for object_type, templ_types in _OBJECT_TEMPLATE_TYPES.items()}}
+
+
+_tables = None
+_wire_compatible = False
+
+
+def get_tables() -> dict:
+    """
+    Gets the fields defined by libipap and its template tables, they are loaded the first time.
+
+    :return: tables, see ipap_native.read_tables
+    """
+    global _tables, _wire_compatible
+    if _tables is None:
+        # imported here, ipap_native uses the codings of this module.
+        from python_wrapper.ipap_native import load_tables
+
+        _tables = load_tables(get_field_definitions())
+        _wire_compatible = _tables is not None
+        if _tables is None:
+            _tables = _get_default_tables()
+    return _tables
+
+
+def is_wire_compatible() -> bool:
+    """
+    Tells whether the codec was checked against libipap, which happens when its tables come from libipap.so or
+    from the fixture recorded from it. Otherwise its messages may not be read by agents using libipap.
+
+    :return: True when the messages of the codec can be exchanged with libipap.
+    """
+    get_tables()
+    return _wire_compatible
+
+
+def _skip_records(buffer, pos: int, end: int, field_lengths: list):
+    """
+    Checks that a data set holds whole records of its template, their values are not read.
+
+    :param buffer: encoded message
+    :param pos: position of the first record
+    :param end: end of the set
+    :param field_lengths: lengths of the template fields, IPAP_FT_VARLEN for variable length fields.
+    """
+    if not field_lengths:
+        raise ValueError("Not a Ipap Message")
+
+    while pos < end:
+        for field_length in field_lengths:
+            if field_length == IPAP_FT_VARLEN:
+                field_length = buffer[pos]
+                pos = pos + 1
+                if field_length == 255:
+                    _, field_length = VARLEN_LONG.unpack_from(buffer, pos - 1)
+                    pos = pos + 2
+            pos = pos + field_length
+        if pos > end:
+            raise ValueError("Not a Ipap Message")
+
+
+def read_header(value) -> (int, int, int, int, list):
+    """
+    Reads the header of an encoded message and the type of its templates, record values are not decoded.
+    Sets are checked to hold whole templates of known fields and whole records, as when the message is decoded.
+
+    :param value: encoded message as str, bytes, bytearray or memoryview
+    :return: flags, seqno, ackseqno, domain and the list of template types.
+    """
+    if isinstance(value, str):
+        # text frames carry one character per byte.
+        value = value.encode('latin-1')
+
+    buffer = memoryview(value).cast('B')
+    try:
+        version, flags, length, export_time, seqno, ackseqno, domain_id = HEADER.unpack_from(buffer, 0)
+        if version != IpapMessage.IPAP_VERSION or length != len(buffer):
+            raise ValueError("Not a Ipap Message")
+
+        template_types = []
+        template_field_lengths = {}
+        pos = HEADER.size
+        while pos < length:
+            set_id, set_length = SET_HEADER.unpack_from(buffer, pos)
+            end = pos + set_length
+            if set_length <= SET_HEADER.size or end > length or \
+                    (set_id != IPAP_TEMPLATE_SET_ID and set_id < IPAP_MIN_TEMPLATE_ID):
+                raise ValueError("Not a Ipap Message")
+
+            pos = pos + SET_HEADER.size
+            set_buffer = buffer[:end]
+            if set_id == IPAP_TEMPLATE_SET_ID:
+                while pos < end:
+                    template_id, template_type, nfields = TEMPLATE_HEADER.unpack_from(set_buffer, pos)
+                    template_types.append(TemplateType(template_type))
+                    pos = pos + TEMPLATE_HEADER.size
+                    field_lengths = template_field_lengths[template_id] = []
+                    for i in range(0, nfields):
+                        ftype, field_length = FIELD_SPECIFIER.unpack_from(set_buffer, pos)
+                        pos = pos + FIELD_SPECIFIER.size
+                        eno = 0
+                        if ftype & IPAP_ENTERPRISE_BIT:
+                            ftype = ftype & ~IPAP_ENTERPRISE_BIT
+                            eno, = ENTERPRISE_NUMBER.unpack_from(set_buffer, pos)
+                            pos = pos + ENTERPRISE_NUMBER.size
+                        # fields are checked to be known, as when they are decoded.
+                        _get_field_container().get_field(eno, ftype)
+                        field_lengths.append(field_length)
+                if pos > end:
+                    raise ValueError("Not a Ipap Message")
+            else:
+                _skip_records(set_buffer, pos, end, template_field_lengths[set_id])
+            pos = end
+
+    except (StructError, IndexError, KeyError):
+        raise ValueError("Not a Ipap Message")
+
+    return flags, seqno, ackseqno, domain_id, template_types
+
+
+class IpapValueField:
+    """
+    Value of a field. Numbers are kept as python numbers, strings and addresses as bytes.
+    """
+
+    def __init__(self, obj=None):
+        self.value = None
+        self.length = 0
+
+    def set_value_uint8(self, value: int):
+        self.value = value & 0xFF
+        self.length = 1
+
+    def set_value_uint16(self, value: int):
+        self.value = value & 0xFFFF
+        self.length = 2
+
+    def set_value_uint32(self, value: int):
+        self.value = value & 0xFFFFFFFF
+        self.length = 4
+
+    def set_value_uint64(self, value: int):
+        self.value = value & 0xFFFFFFFFFFFFFFFF
+        self.length = 8
+
+    def set_value_float32(self, value):
+        self.value = float(value)
+        self.length = 4
+
+    def set_value_double(self, value):
+        self.value = float(value)
+        self.length = 8
+
+    def set_value_vchar(self, value: bytes, lenght: int):
+        self.value = bytes(value[:lenght])
+        self.length = lenght
+
+    def get_value_uint8(self):
+        return self.value
+
+    def get_value_uint16(self):
+        return self.value
+
+    def get_value_uint32(self):
+        return self.value
+
+    def get_value_uint64(self):
+        return self.value
+
+    def get_value_float(self):
+        return self.value
+
+    def get_value_double(self):
+        return self.value
+
+    def get_value_vchar(self):
+        return self.value
+
+    def get_lenght(self):
+        return self.length
+
+    def print_value(self):
+        print(self.value)
+        return 0
+
+
+class IpapFieldKey:
+
+    def __init__(self, eno=0, ftype=0, obj=None):
+        """
+
+        :param obj:  not used, kept for compatibility with the native wrapper.
+        :param eno:    enterprise number of type int
+        :param ftype:  field type of type int.
+        """
+        self.eno = eno
+        self.ftype = ftype
+
+    def get_eno(self) -> int:
+        return self.eno
+
+    def get_ftype(self) -> int:
+        return self.ftype
+
+    def get_key(self) -> str:
+        return str(self.eno) + '-' + str(self.ftype)
+
+
+class IpapField:
+
+    def __init__(self, obj=None):
+        self.eno = 0
+        self.ftype = 0
+        self.length = 0
+        self.coding = 0
+        self.name = b''
+        self.xml_name = b''
+        self.documentation = b''
+
+    def set_field_type(self, eno: int, ftype: int, lenght: int, coding: int,
+                       name: bytes, xml_name: bytes, documentation: bytes):
+        self.eno = eno
+        self.ftype = ftype
+        self.length = lenght
+        self.coding = coding
+        self.name = name
+        self.xml_name = xml_name
+        self.documentation = documentation
+
+    def get_eno(self) -> int:
+        return self.eno
+
+    def get_type(self) -> int:
+        return self.ftype
+
+    def get_length(self) -> int:
+        return self.length
+
+    def get_field_name(self):
+        return self.name
+
+    def get_xml_name(self):
+        return self.xml_name
+
+    def get_documentation(self):
+        return self.documentation
+
+    def _new_value(self, value, length: int) -> IpapValueField:
+        field_value = IpapValueField()
+        field_value.value = value
+        field_value.length = length
+        return field_value
+
+    def get_ipap_field_value_uint8(self, value: int):
+        return self._new_value(value & 0xFF, 1)
+
+    def get_ipap_field_value_uint16(self, value: int):
+        return self._new_value(value & 0xFFFF, 2)
+
+    def get_ipap_field_value_uint32(self, value: int):
+        return self._new_value(value & 0xFFFFFFFF, 4)
+
+    def get_ipap_field_value_uint64(self, value: int):
+        return self._new_value(value & 0xFFFFFFFFFFFFFFFF, 8)
+
+    def get_ipap_field_value_float(self, value: float):
+        return self._new_value(float(value), 4)
+
+    def get_ipap_field_value_double(self, value: float):
+        return self._new_value(float(value), 8)
+
+    def get_ipap_field_value_string(self, value: bytes) -> IpapValueField:
+        return self._new_value(bytes(value), len(value))
+
+    def get_ipap_field_value_ipv6(self, value: bytes):
+        try:
+            return self._new_value(ipaddress.IPv6Address(value.decode('ascii')).packed, 16)
+        except ValueError:
+            raise ValueError('Field value could not be created')
+
+    def get_ipap_field_value_ipv4(self, value: bytes):
+        try:
+            return self._new_value(ipaddress.IPv4Address(value.decode('ascii')).packed, 4)
+        except ValueError:
+            raise ValueError('Field value could not be created')
+
+    def num_characters(self, value: IpapValueField) -> int:
+        return len(self.write_value(value))
+
+    def write_value(self, value: IpapValueField) -> str:
+        val = value.value
+        if self.coding in [IPAP_CODING_INT, IPAP_CODING_UINT, IPAP_CODING_NTP]:
+            return str(val)
+        elif self.coding == IPAP_CODING_FLOAT:
+            return repr(float32_value(val) if self.length == 4 else val)
+        elif self.coding == IPAP_CODING_STRING:
+            return val.decode('utf-8')
+        elif self.coding == IPAP_CODING_IPADDR:
+            return str(ipaddress.ip_address(val))
+        else:
+            return '0x' + val.hex()
+
+    def parse(self, value: str) -> IpapValueField:
+        try:
+            if self.coding in [IPAP_CODING_INT, IPAP_CODING_UINT, IPAP_CODING_NTP]:
+                return self._new_value(int(value), self.length)
+            elif self.coding == IPAP_CODING_FLOAT:
+                return self._new_value(float(value), self.length)
+            elif self.coding == IPAP_CODING_STRING:
+                bvalue = value.encode('utf-8')
+                return self._new_value(bvalue, len(bvalue))
+            elif self.coding == IPAP_CODING_IPADDR:
+                packed = ipaddress.ip_address(value).packed
+                return self._new_value(packed, len(packed))
+            else:
+                bvalue = bytes.fromhex(value[2:] if value.startswith('0x') else value)
+                return self._new_value(bvalue, len(bvalue))
+        except ValueError:
+            raise ValueError('Field value could not be parsed')
+
+    def to_python(self, value: IpapValueField):
+        """
+        Gets the value as a python value: int, float and str for numbers and strings,
+        the text written for the field otherwise.
+        """
+        if self.coding == IPAP_CODING_FLOAT and self.length == 4:
+            return float32_value(value.value)
+        elif self.coding in [IPAP_CODING_INT, IPAP_CODING_UINT, IPAP_CODING_FLOAT]:
+            return value.value
+        elif self.coding == IPAP_CODING_STRING:
+            return value.value.decode('utf-8')
+        else:
+            return self.write_value(value)
+
+    def destroy(self):
+        pass
+
+
+# Field handles shared by every container, by (eno, ftype).
+_INTERNED_FIELDS = {}
+
+
+class IpapFieldContainer:
+    """
+    Fields that can be used in messages, taken from the field definition file.
+    """
+
+    def __init__(self):
+        self.fields = None
+
+    @staticmethod
+    def _load_fields():
+        # Fields are shared by every container.
+        if not _INTERNED_FIELDS:
+            for eno, ftype, length, coding, name, xml_name, documentation in get_tables()['fields']:
+                field = IpapField()
+                field.set_field_type(eno, ftype, length, coding, name, xml_name, documentation)
+                _INTERNED_FIELDS[(eno, ftype)] = field
+        return _INTERNED_FIELDS
+
+    def initialize_forward(self):
+        if self.fields is None:
+            self.fields = self._load_fields()
+
+    def initialize_reverse(self):
+        if self.fields is None:
+            self.fields = self._load_fields()
+
+    def get_field(self, eno: int, ftype: int) -> IpapField:
+        if self.fields is not None and (eno, ftype) in self.fields:
+            return self.fields[(eno, ftype)]
+        else:
+            raise ValueError('Field {0}.{1} not found'.format(str(eno), str(ftype)))
+
+    def get_field_by_name(self, field_name: str) -> IpapField:
+        """
+        Gets a field by its name in the field definition file.
+
+        :param field_name: field name
+        :return: the field
+        """
+        field_definitions = get_field_definitions()
+        if field_name not in field_definitions:
+            raise ValueError("The field name {0} is not found in the field definition".format(field_name))
+        return self.get_field(field_definitions[field_name]['eno'], field_definitions[field_name]['ftype'])
+
+
+def _get_field_container() -> IpapFieldContainer:
+    """
+    Gets the field container shared by templates and messages.
+    """
+    global _field_container
+    if _field_container is None:
+        _field_container = IpapFieldContainer()
+        _field_container.initialize_forward()
+        _field_container.initialize_reverse()
+    return _field_container
+
+
+_field_container = None
+
+
+def _get_field_keys(table: str, temp_type: TemplateType) -> list:
+    field_codes = get_tables()[table]
+    if temp_type not in field_codes:
+        raise ValueError('Invalid template type {0}'.format(str(temp_type)))
+    return [IpapFieldKey(eno, ftype) for eno, ftype in field_codes[temp_type]]
+
+
+class IpapTemplate:
+
+    def __init__(self, obj=None):
+        self.template_id = 0
+        self.template_type = TemplateType.IPAP_INVALID_TEMPLATE
+        self.max_fields = 0
+        self.fields = []
+        self.field_lengths = []
+        self.layouts = {}
+
+    def set_id(self, id_template: int):
+        self.template_id = id_template
+
+    def get_template_id(self) -> int:
+        return self.template_id
+
+    def set_max_fields(self, max_fields: int):
+        self.max_fields = max_fields
+
+    def set_type(self, templ_type: TemplateType):
+        self.template_type = templ_type
+
+    def get_template_type_mandatory_field(self, temp_type: TemplateType) -> list:
+        return _get_field_keys('mandatory_fields', temp_type)
+
+    def get_template_type_key_field(self, temp_type: TemplateType) -> list:
+        return _get_field_keys('key_fields', temp_type)
+
+    def add_field(self, field_size: int, unknow_field: UnknownField, encode_network: bool, field: IpapField):
+        self.fields.append(field)
+        self.field_lengths.append(field_size)
+        self.layouts = {}
+
+    def get_layout(self, order: str) -> list:
+        """
+        Gets how the records of the template are packed. Consecutive fixed length fields are packed
+        with one struct, variable length fields one by one.
+
+        :param order: byte order of the values, '!' or '='
+        :return: list of (struct, keys, lengths), struct is None for a variable length field.
+        """
+        if order not in self.layouts:
+            layout = []
+            formats, keys, lengths = [], [], []
+            for field, length in zip(self.fields, self.field_lengths):
+                key = (field.eno, field.ftype)
+                if length == IPAP_FT_VARLEN:
+                    if keys:
+                        layout.append((Struct(order + ''.join(formats)), keys, lengths))
+                        formats, keys, lengths = [], [], []
+                    layout.append((None, [key], None))
+                else:
+                    formats.append(_NUMERIC_FORMATS.get((field.coding, length), str(length) + 's'))
+                    keys.append(key)
+                    lengths.append(length)
+            if keys:
+                layout.append((Struct(order + ''.join(formats)), keys, lengths))
+            self.layouts[order] = layout
+        return self.layouts[order]
+
+    def get_type(self) -> TemplateType:
+        return self.template_type
+
+    def get_object_type(self, template_type: TemplateType) -> ObjectType:
+        for object_type, template_types in get_tables()['object_template_types'].items():
+            if template_type in template_types:
+                return object_type
+        return ObjectType.IPAP_INVALID
+
+    def get_object_template_types(self, object_type: ObjectType):
+        object_template_types = get_tables()['object_template_types']
+        if object_type not in object_template_types:
+            raise ValueError('Object type requested but not found')
+        return list(object_template_types[object_type])
+
+    def get_fields(self) -> list:
+        return list(self.fields)
+
+    def get_field(self, eno: int, ftype: int) -> IpapField:
+        for field in self.fields:
+            if field.get_eno() == eno and field.get_type() == ftype:
+                return field
+        raise ValueError('Field with eno {0} and ftype {1} was not found'.format(str(eno), str(ftype)))
+
+    def __eq__(self, other):
+        return hasattr(other, 'fields') and self.template_id == other.template_id \
+               and self.template_type == other.template_type \
+               and self.field_lengths == other.field_lengths \
+               and [(field.get_eno(), field.get_type()) for field in self.fields] == \
+                   [(field.get_eno(), field.get_type()) for field in other.fields]
+
+    def get_num_fields(self) -> int:
+        return len(self.fields)
+
+    def compile(self, field_def) -> IpapTemplateCodec:
+        """
+        Compiles the template into an encoder and decoder of its records.
+
+        :param field_def: function giving the field definition of an (eno, ftype) code, see IpapTemplateCodec.
+        :return: codec for the records of the template
+        """
+        return IpapTemplateCodec(self, field_def)
+
+    @staticmethod
+    def get_data_template(object_type: ObjectType) -> TemplateType:
+        object_template_types = get_tables()['object_template_types']
+        if object_type in object_template_types:
+            return object_template_types[object_type][0]
+        else:
+            return TemplateType.IPAP_INVALID_TEMPLATE
+
+    @staticmethod
+    def get_opts_template(object_type: ObjectType) -> TemplateType:
+        object_template_types = get_tables()['object_template_types']
+        if object_type in object_template_types:
+            return object_template_types[object_type][1]
+        else:
+            return TemplateType.IPAP_INVALID_TEMPLATE
+
+    def copy(self):
+        """
+        Gets a copy of the template, fields are shared.
+        """
+        template = copy(self)
+        template.fields = list(self.fields)
+        template.field_lengths = list(self.field_lengths)
+        template.layouts = dict(self.layouts)
+        return template
+
+    def detach(self):
+        return self
+
+
+class IpapDataRecord:
+
+    def __init__(self, obj=None, templ_id=0):
+        self.template_id = templ_id
+        self.fields = {}
+
+    def get_template_id(self) -> int:
+        return self.template_id
+
+    def insert_field(self, eno: int, ftype: int, field_value: IpapValueField):
+        self.fields[(eno, ftype)] = field_value
+
+    def get_num_fields(self) -> int:
+        return len(self.fields)
+
+    def get_field_at_pos(self, pos: int) -> IpapFieldKey:
+        if 0 <= pos < len(self.fields):
+            eno, ftype = list(self.fields)[pos]
+            return IpapFieldKey(eno, ftype)
+        else:
+            raise ValueError("Field at pos {0} was not found in data record".format(str(pos)))
+
+    def get_field(self, eno: int, ftype: int) -> IpapValueField:
+        if (eno, ftype) in self.fields:
+            return self.fields[(eno, ftype)]
+        else:
+            raise ValueError("Field {0}.{1} given was not found in data record".format(str(eno), str(ftype)))
+
+    def get_field_length(self, eno: int, ftype: int):
+        return self.get_field(eno, ftype).get_lenght()
+
+    def clear(self):
+        self.fields = {}
+
+    def detach(self):
+        return self
+
+
+class IpapMessage:
+    IPAP_VERSION = 0x01
+
+    def __init__(self, domain_id: int, ipap_version: int, _encode_network: bool, value: str = None):
+        self.domain_id = domain_id
+        self.version = ipap_version
+        self.encode_network = _encode_network
+        self.syn = False
+        self.ack = False
+        self.fin = False
+        self.seqno = 0
+        self.ackseqno = 0
+        # export time written in the header, the current time when it is not set.
+        self.export_time = None
+        self.templates = {}
+        self.records = []
+        self.message = None
+        if value:
+            self._decode(value)
+
+    @classmethod
+    def from_buffer(cls, buffer, _encode_network: bool = True):
+        """
+        Creates a message from an encoded buffer.
+
+        :param buffer: encoded message as bytes, bytearray or memoryview
+        :param _encode_network: whether or not the message is encoded in network order
+        :return: the message decoded, raise ValueError if the buffer is not a valid message.
+        """
+        return cls(0, cls.IPAP_VERSION, _encode_network, buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+    def detach(self, wrapper):
+        """
+        Templates and records are python objects, they stay usable after the message is released.
+        """
+        pass
+
+    def release(self):
+        """
+        Releases the templates and records of the message at once.
+        """
+        self.templates = {}
+        self.records = []
+        self.message = None
+
+    def _value_order(self) -> str:
+        return '!' if self.encode_network else '='
+
+    def new_data_template(self, nfields: int, template_type_id: TemplateType) -> int:
+        template = IpapTemplate()
+        template.set_id(max(self.templates, default=IPAP_MIN_TEMPLATE_ID - 1) + 1)
+        template.set_max_fields(nfields)
+        template.set_type(template_type_id)
+        self.templates[template.get_template_id()] = template
+        return template.get_template_id()
+
+    def add_field(self, templid: int, eno: int, type: int):
+        if templid not in self.templates:
+            raise ValueError("Invalid argument. The field was not included")
+        try:
+            field = _get_field_container().get_field(eno, type)
+        except ValueError:
+            raise ValueError("Invalid argument. The field was not included")
+        self.templates[templid].add_field(field.get_length(), UnknownField.KNOWN, self.encode_network, field)
+
+    def delete_template(self, templid: int):
+        self.templates.pop(templid, None)
+
+    def delete_all_templates(self):
+        self.templates = {}
+
+    def get_template_list(self) -> list:
+        return list(self.templates)
+
+    def get_template_object(self, templ_id: int) -> IpapTemplate:
+        if templ_id in self.templates:
+            return self.templates[templ_id]
+        else:
+            raise ValueError("Template with id:{} was not found".format(str(templ_id)))
+
+    def include_data(self, template_id: int, ipap_data_record: IpapDataRecord):
+        if template_id not in self.templates:
+            raise ValueError("An error occurs inserting the data record in message")
+        record = IpapDataRecord(templ_id=template_id)
+        record.fields = dict(ipap_data_record.fields)
+        self.records.append(record)
+
+    def get_data_record_size(self):
+        return len(self.records)
+
+    def get_data_record_at_pos(self, pos: int) -> IpapDataRecord:
+        if 0 <= pos < len(self.records):
+            return self.records[pos]
+        else:
+            raise ValueError("Data record at pos {0} was not found".format(str(pos)))
+
+    def extract_records(self, template_id: int = None, columnar: bool = False, field_type=None):
+        """
+        Decodes the data records of the message in one pass.
+
+        :param template_id: template of the records to decode, all the records are decoded when not given.
+        :param columnar: whether or not to return values by field instead of by record.
+        :param field_type: not used, values are read with the coding of their field.
+        :return: list of (template_id, values) tuples, where values is a dictionary keyed by (eno, ftype).
+                 When columnar, a dictionary keyed by (eno, ftype) with the list of values of every record.
+        """
+        if columnar and template_id is None:
+            raise ValueError("A template id is required to extract records by field")
+
+        records = []
+        for record in self.records:
+            if template_id is not None and record.template_id != template_id:
+                continue
+
+            fields = self.get_template_object(record.template_id).fields
+            values = {}
+            for field in fields:
+                key = (field.eno, field.ftype)
+                if key in record.fields:
+                    values[key] = field.to_python(record.fields[key])
+            records.append((record.template_id, values))
+
+        if columnar:
+            columns = {}
+            if template_id in self.templates:
+                for field in self.templates[template_id].fields:
+                    key = (field.eno, field.ftype)
+                    columns[key] = [values.get(key) for _, values in records]
+            return columns
+
+        return records
+
+    def set_syn(self, syn: bool):
+        self.syn = syn
+
+    def get_syn(self) -> bool:
+        return self.syn
+
+    def set_ack(self, ack: bool):
+        self.ack = ack
+
+    def get_ack(self) -> bool:
+        return self.ack
+
+    def set_fin(self, fin: bool):
+        self.fin = fin
+
+    def get_fin(self):
+        return self.fin
+
+    def get_seqno(self) -> int:
+        return self.seqno
+
+    def set_seqno(self, seq_no: int):
+        self.seqno = seq_no
+
+    def get_ackseqno(self) -> int:
+        return self.ackseqno
+
+    def set_ack_seq_no(self, ack_seq_no: int):
+        self.ackseqno = ack_seq_no
+
+    def _encode_template(self, template: IpapTemplate) -> bytes:
+        parts = [TEMPLATE_HEADER.pack(template.template_id, template.template_type.value, len(template.fields))]
+        for field, length in zip(template.fields, template.field_lengths):
+            if field.eno:
+                parts.append(FIELD_SPECIFIER.pack(field.ftype | IPAP_ENTERPRISE_BIT, length))
+                parts.append(ENTERPRISE_NUMBER.pack(field.eno))
+            else:
+                parts.append(FIELD_SPECIFIER.pack(field.ftype, length))
+        return b''.join(parts)
+
+    def _encode_record(self, template: IpapTemplate, record: IpapDataRecord) -> bytes:
+        parts = []
+        try:
+            for layout, keys, lengths in template.get_layout(self._value_order()):
+                if layout is None:
+                    value = record.fields[keys[0]].value
+                    if len(value) < 255:
+                        parts.append(VARLEN_SHORT.pack(len(value)))
+                    else:
+                        parts.append(VARLEN_LONG.pack(255, len(value)))
+                    parts.append(value)
+                else:
+                    parts.append(layout.pack(*[record.fields[key].value for key in keys]))
+
+        except KeyError as e:
+            raise ValueError("Field {0}.{1} given was not found in data record".format(str(e.args[0][0]),
+                                                                                      str(e.args[0][1])))
+        return b''.join(parts)
+
+    @staticmethod
+    def _encode_sets(set_id: int, encoded_records: list) -> list:
+        """
+        Puts encoded records in sets, a new set is started when the set would be too long.
+        """
+        sets = []
+        parts = []
+        length = SET_HEADER.size
+        for encoded in encoded_records:
+            if parts and length + len(encoded) > IPAP_MAX_SET_LENGTH:
+                sets.append(SET_HEADER.pack(set_id, length) + b''.join(parts))
+                parts = []
+                length = SET_HEADER.size
+            parts.append(encoded)
+            length = length + len(encoded)
+        if parts:
+            sets.append(SET_HEADER.pack(set_id, length) + b''.join(parts))
+        return sets
+
+    def output(self):
+        sets = self._encode_sets(IPAP_TEMPLATE_SET_ID,
+                                 [self._encode_template(template) for template in self.templates.values()])
+
+        # Records are put in one set for every run of records of the same template, so the order is kept.
+        pos = 0
+        while pos < len(self.records):
+            template_id = self.records[pos].template_id
+            template = self.get_template_object(template_id)
+            encoded_records = []
+            while pos < len(self.records) and self.records[pos].template_id == template_id:
+                encoded_records.append(self._encode_record(template, self.records[pos]))
+                pos = pos + 1
+            sets.extend(self._encode_sets(template_id, encoded_records))
+
+        flags = (IPAP_FLAG_SYN if self.syn else 0) | (IPAP_FLAG_ACK if self.ack else 0) | \
+                (IPAP_FLAG_FIN if self.fin else 0)
+        body = b''.join(sets)
+        export_time = int(time.time()) if self.export_time is None else self.export_time
+        self.message = HEADER.pack(self.version, flags, HEADER.size + len(body), export_time,
+                                   self.seqno, self.ackseqno, self.domain_id) + body
+
+    def _decode_template(self, buffer, pos: int) -> int:
+        template_id, template_type, nfields = TEMPLATE_HEADER.unpack_from(buffer, pos)
+        pos = pos + TEMPLATE_HEADER.size
+        template = IpapTemplate()
+        template.set_id(template_id)
+        template.set_type(TemplateType(template_type))
+        template.set_max_fields(nfields)
+        for i in range(0, nfields):
+            ftype, length = FIELD_SPECIFIER.unpack_from(buffer, pos)
+            pos = pos + FIELD_SPECIFIER.size
+            eno = 0
+            if ftype & IPAP_ENTERPRISE_BIT:
+                ftype = ftype & ~IPAP_ENTERPRISE_BIT
+                eno, = ENTERPRISE_NUMBER.unpack_from(buffer, pos)
+                pos = pos + ENTERPRISE_NUMBER.size
+            template.add_field(length, UnknownField.KNOWN, self.encode_network,
+                               _get_field_container().get_field(eno, ftype))
+        self.templates[template_id] = template
+        return pos
+
+    def _decode_record(self, buffer, pos: int, template: IpapTemplate) -> int:
+        record = IpapDataRecord(templ_id=template.template_id)
+        for layout, keys, lengths in template.get_layout(self._value_order()):
+            if layout is None:
+                length = buffer[pos]
+                pos = pos + 1
+                if length == 255:
+                    _, length = VARLEN_LONG.unpack_from(buffer, pos - 1)
+                    pos = pos + 2
+                if pos + length > len(buffer):
+                    raise ValueError("Not a Ipap Message")
+                values = [bytes(buffer[pos:pos + length])]
+                lengths = [length]
+                pos = pos + length
+            else:
+                values = layout.unpack_from(buffer, pos)
+                pos = pos + layout.size
+
+            for key, value, length in zip(keys, values, lengths):
+                field_value = IpapValueField()
+                field_value.value = value
+                field_value.length = length
+                record.fields[key] = field_value
+        self.records.append(record)
+        return pos
+
+    def _decode(self, value):
+        if isinstance(value, str):
+            # text frames carry one character per byte.
+            value = value.encode('latin-1')
+
+        buffer = memoryview(value).cast('B')
+        try:
+            version, flags, length, export_time, seqno, ackseqno, domain_id = HEADER.unpack_from(buffer, 0)
+            if version != self.IPAP_VERSION or length != len(buffer):
+                raise ValueError("Not a Ipap Message")
+
+            self.version = version
+            self.syn = bool(flags & IPAP_FLAG_SYN)
+            self.ack = bool(flags & IPAP_FLAG_ACK)
+            self.fin = bool(flags & IPAP_FLAG_FIN)
+            self.seqno = seqno
+            self.ackseqno = ackseqno
+            self.domain_id = domain_id
+            self.export_time = export_time
+
+            pos = HEADER.size
+            while pos < length:
+                set_id, set_length = SET_HEADER.unpack_from(buffer, pos)
+                end = pos + set_length
+                if set_length <= SET_HEADER.size or end > length:
+                    raise ValueError("Not a Ipap Message")
+
+                pos = pos + SET_HEADER.size
+                set_buffer = buffer[:end]
+                if set_id == IPAP_TEMPLATE_SET_ID:
+                    while pos < end:
+                        pos = self._decode_template(set_buffer, pos)
+                elif set_id >= IPAP_MIN_TEMPLATE_ID:
+                    template = self.get_template_object(set_id)
+                    while pos < end:
+                        pos = self._decode_record(set_buffer, pos, template)
+                else:
+                    raise ValueError("Not a Ipap Message")
+
+        except (StructError, IndexError, KeyError):
+            raise ValueError("Not a Ipap Message")
+
+        self.message = bytes(buffer)
+
+    def get_message_bytes(self) -> bytes:
+        """
+        Gets the encoded message as bytes.
+
+        :return: encoded message
+        """
+        self.output()
+        return self.message
+
+    def get_message(self) -> str:
+        """
+        Gets the encoded message as text, one character per byte. Used for text websocket frames.
+
+        :return: encoded message
+        """
+        return self.get_message_bytes().decode('latin-1')
+
+    def get_domain(self) -> int:
+        return self.domain_id
+
+    def make_template(self, template: IpapTemplate):
+        self.templates[template.get_template_id()] = template.copy()
+
+    def get_types(self):
+        # imported here, the native wrapper module imports this one when the python backend is used.
+        from python_wrapper.ipap_message import get_message_type
+
+        return get_message_type([template.get_type() for template in self.templates.values()])
+
+
+class IpapTemplateContainer:
+
+    def __init__(self):
+        self.templates = {}
+        self.codecs = {}
+
+    def add_template(self, template: IpapTemplate):
+        self.templates[template.get_template_id()] = template.detach()
+        self.codecs.pop(template.get_template_id(), None)
+
+    def delete_all_templates(self):
+        self.templates = {}
+        self.codecs = {}
+
+    def delete_template(self, templid: int):
+        self.templates.pop(templid, None)
+        self.codecs.pop(templid, None)
+
+    def exists_template(self, templid: int) -> bool:
+        return templid in self.templates
+
+    def get_num_templates(self) -> int:
+        return len(self.templates)
+
+    def get_template(self, templid: int) -> IpapTemplate:
+        if templid in self.templates:
+            return self.templates[templid]
+        else:
+            raise ValueError('Template {0} not found'.format(str(templid)))
+
+    def get_codec(self, templid: int, field_def) -> IpapTemplateCodec:
+        """
+        Gets the compiled encoder and decoder of a template, templates are compiled once.
+
+        :param templid: template id
+        :param field_def: function giving the field definition of an (eno, ftype) code, see IpapTemplateCodec.
+        :return: codec for the records of the template
+        """
+        codec = self.codecs.get(templid)
+        if codec is None:
+            codec = self.codecs[templid] = self.get_template(templid).compile(field_def)
+        return codec
+
+
+class IpapTemplateContainerSingleton(IpapTemplateContainer):
+    """
+    Template container shared by the whole process.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            IpapTemplateContainer.__init__(cls._instance)
+        return cls._instance
+
+    def __init__(self):
+        # initialized once, by __new__.
+        pass
@@ -1,25 +1,53 @@
+from python_wrapper.ipap_lib import lib
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import PYTHON_BACKEND
 from python_wrapper.ipap_field import IpapField
-from ctypes import cdll
-from ctypes import c_int
-lib = cdll.LoadLibrary('libipap.so')
+from foundation.field_def_manager import FieldDefManager
+
+
+# Field handles shared by every container, by (eno, ftype). Native containers are never destroyed, so the fields
+# they own live as long as the process.
+_INTERNED_FIELDS = {}
 
 
 class IpapFieldContainer:
 
     def __init__(self):
         self.obj = lib.ipap_field_container_new()
+        self.initialized = False
+        self.field_def_manager = FieldDefManager()
 
     def initialize_forward(self):
         lib.ipap_field_container_initialize_forward(self.obj)
+        self.initialized = True
 
     def initialize_reverse(self):
         lib.ipap_field_container_initialize_reverse(self.obj)
+        self.initialized = True
 
     def get_field(self, eno: int, ftype: int) -> IpapField:
-        obj = lib.ipap_field_container_get_field_pointer(self.obj, c_int(eno), c_int(ftype))
+        field = _INTERNED_FIELDS.get((eno, ftype)) if self.initialized else None
+        if field is not None:
+            return field
+
+        obj = lib.ipap_field_container_get_field_pointer(self.obj, eno, ftype)
 
         if obj:  # not null
             field = IpapField(obj)
+            _INTERNED_FIELDS[(eno, ftype)] = field
             return field
         else:
             raise ValueError('Field {0}.{1} not found'.format(str(eno), str(ftype)))
+
+    def get_field_by_name(self, field_name: str) -> IpapField:
+        """
+        Gets a field by its name in the field definition file.
+
+        :param field_name: field name
+        :return: the field
+        """
+        field_def = self.field_def_manager.get_field(field_name)
+        return self.get_field(field_def['eno'], field_def['ftype'])
+
+if IPAP_BACKEND == PYTHON_BACKEND:
+    from python_wrapper.ipap_codec import IpapFieldContainer
@@ -1,6 +1,7 @@
-from ctypes import cdll
-from ctypes import c_int
-lib = cdll.LoadLibrary('libipap.so')
+from python_wrapper.ipap_lib import lib
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import PYTHON_BACKEND
+
 
 class IpapFieldKey:
 
@@ -14,7 +15,7 @@ class IpapFieldKey:
         if obj:
             self.obj = obj
         else:
-            self.obj = lib.ipap_field_key_new(c_int(eno), c_int(ftype))
+            self.obj = lib.ipap_field_key_new(eno, ftype)
 
     def get_eno(self) -> int:
         return lib.ipap_field_key_get_eno(self.obj)
@@ -31,3 +32,7 @@ class IpapFieldKey:
 
     def destroy(self):
         lib.ipap_field_key_destroy(self.obj)
+
+
+if IPAP_BACKEND == PYTHON_BACKEND:
+    from python_wrapper.ipap_codec import IpapFieldKey
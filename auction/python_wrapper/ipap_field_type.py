@@ -2,9 +2,7 @@ from ctypes import c_size_t
 from ctypes import c_int
 from ctypes import c_double
 from ctypes import c_char_p
-from ctypes import cdll
 from ctypes import Structure
-lib = cdll.LoadLibrary('libipap.so')
 
 
 class IpapFieldType(Structure):
@@ -0,0 +1,19 @@
+from struct import Struct
+
+FLOAT32 = Struct('=f')
+
+
+def float32_value(value: float) -> float:
+    """
+    Gets the shortest decimal stored as the same 32 bit float, so float fields read from a message give the
+    value they were written with, e.g. 0.1 instead of 0.10000000149011612.
+
+    :param value: value of a 32 bit float field
+    :return: shortest value with the same 32 bit float
+    """
+    packed = FLOAT32.pack(value)
+    for digits in range(1, 10):
+        shortest = float('{0:.{1}g}'.format(value, digits))
+        if FLOAT32.pack(shortest) == packed:
+            return shortest
+    return value
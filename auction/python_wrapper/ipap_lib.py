@@ -0,0 +1,170 @@
+from ctypes import cdll
+from ctypes import c_bool
+from ctypes import c_char_p
+from ctypes import c_double
+from ctypes import c_float
+from ctypes import c_int
+from ctypes import c_size_t
+from ctypes import c_ubyte
+from ctypes import c_uint8
+from ctypes import c_uint16
+from ctypes import c_uint32
+from ctypes import c_uint64
+from ctypes import c_void_p
+from ctypes import POINTER
+
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import NATIVE_BACKEND
+
+# The library is loaded only once for all wrappers, so the prototypes declared below are shared by all of them.
+# It is not loaded when the messages are handled by the python codec.
+if IPAP_BACKEND == NATIVE_BACKEND:
+    lib = cdll.LoadLibrary('libipap.so')
+else:
+    lib = None
+
+# function name: (argtypes, restype). Objects are passed and returned as opaque pointers (c_void_p).
+PROTOTYPES = {
+    # ipap_field
+    'ipap_field_new': ([], c_void_p),
+    'ipap_field_destroy': ([c_void_p], None),
+    'ipap_field_set_field_type': ([c_void_p, c_int, c_int, c_size_t, c_int, c_char_p, c_char_p, c_char_p], None),
+    'ipap_field_get_eno': ([c_void_p], c_int),
+    'ipap_field_get_type': ([c_void_p], c_int),
+    'ipap_field_get_length': ([c_void_p], c_int),
+    'ipap_field_get_field_name': ([c_void_p], c_char_p),
+    'ipap_field_get_xml_name': ([c_void_p], c_char_p),
+    'ipap_field_get_documentation': ([c_void_p], c_char_p),
+    'ipap_field_get_ipap_value_field_uint8': ([c_void_p, c_uint8], c_void_p),
+    'ipap_field_get_ipap_value_field_uint16': ([c_void_p, c_uint16], c_void_p),
+    'ipap_field_get_ipap_value_field_uint32': ([c_void_p, c_uint32], c_void_p),
+    'ipap_field_get_ipap_value_field_uint64': ([c_void_p, c_uint64], c_void_p),
+    'ipap_field_get_ipap_value_field_float': ([c_void_p, c_float], c_void_p),
+    'ipap_field_get_ipap_value_field_double': ([c_void_p, c_double], c_void_p),
+    'ipap_field_get_ipap_value_field_string': ([c_void_p, c_char_p, c_int], c_void_p),
+    'ipap_field_get_ipap_value_field_ipv4': ([c_void_p, c_char_p, c_int], c_void_p),
+    'ipap_field_get_ipap_value_field_ipv6': ([c_void_p, c_char_p, c_int], c_void_p),
+    'ipap_field_number_characters': ([c_void_p, c_void_p], c_int),
+    'ipap_field_write_value': ([c_void_p, c_void_p, c_char_p, c_int], c_char_p),
+    'ipap_field_parse': ([c_void_p, c_char_p], c_void_p),
+
+    # ipap_field_key
+    'ipap_field_key_new': ([c_int, c_int], c_void_p),
+    'ipap_field_key_destroy': ([c_void_p], None),
+    'ipap_field_key_get_eno': ([c_void_p], c_int),
+    'ipap_field_key_get_ftype': ([c_void_p], c_int),
+
+    # ipap_field_container
+    'ipap_field_container_new': ([], c_void_p),
+    'ipap_field_container_initialize_forward': ([c_void_p], None),
+    'ipap_field_container_initialize_reverse': ([c_void_p], None),
+    'ipap_field_container_get_field_pointer': ([c_void_p, c_int, c_int], c_void_p),
+
+    # ipap_value_field
+    'ipap_value_field_new': ([], c_void_p),
+    'ipap_value_field_set_value_int8': ([c_void_p, c_uint8], None),
+    'ipap_value_field_set_value_int16': ([c_void_p, c_uint16], None),
+    'ipap_value_field_set_value_int32': ([c_void_p, c_uint32], None),
+    'ipap_value_field_set_value_int64': ([c_void_p, c_uint64], None),
+    'ipap_value_field_set_value_float32': ([c_void_p, c_float], None),
+    'ipap_value_field_set_value_float64': ([c_void_p, c_double], None),
+    'ipap_value_field_set_value_vchar': ([c_void_p, c_char_p, c_int], None),
+    'ipap_value_field_get_value_int8': ([c_void_p], c_uint8),
+    'ipap_value_field_get_value_int16': ([c_void_p], c_uint16),
+    'ipap_value_field_get_value_int32': ([c_void_p], c_uint32),
+    'ipap_value_field_get_value_int64': ([c_void_p], c_uint64),
+    'ipap_value_field_get_value_float': ([c_void_p], c_float),
+    'ipap_value_field_get_value_double': ([c_void_p], c_double),
+    'ipap_value_field_get_value_vchar': ([c_void_p], c_char_p),
+    'ipap_value_field_get_length': ([c_void_p], c_int),
+    'ipap_value_field_print': ([c_void_p], c_int),
+
+    # ipap_data_record
+    'ipap_data_record_new': ([c_uint16], c_void_p),
+    'ipap_data_record_destroy': ([c_void_p], None),
+    'ipap_data_record_get_template_id': ([c_void_p], c_uint16),
+    'ipap_data_record_insert_field': ([c_void_p, c_int, c_int, c_void_p], None),
+    'ipap_data_record_get_num_fields': ([c_void_p], c_int),
+    'ipap_data_record_get_field_at_pos': ([c_void_p, c_int], c_void_p),
+    'ipap_data_record_get_field': ([c_void_p, c_int, c_int], c_void_p),
+    'ipap_data_record_get_length': ([c_void_p, c_int, c_int], c_int),
+    'ipap_data_record_clear': ([c_void_p], None),
+
+    # ipap_template
+    'ipap_template_new': ([], c_void_p),
+    'ipap_template_destroy': ([c_void_p], None),
+    'ipap_template_set_id': ([c_void_p, c_uint16], None),
+    'ipap_template_get_template_id': ([c_void_p], c_uint16),
+    'ipap_template_set_maxfields': ([c_void_p, c_int], None),
+    'ipap_template_set_type': ([c_void_p, c_int], None),
+    'ipap_template_get_type': ([c_void_p], c_int),
+    'ipap_template_get_template_type_mandatory_field_size': ([c_void_p, c_int], c_int),
+    'ipap_template_get_template_type_mandatory_field': ([c_void_p, c_int, c_int], c_void_p),
+    'ipap_template_get_template_type_keys_size': ([c_void_p, c_int], c_int),
+    'ipap_template_get_template_type_key': ([c_void_p, c_int, c_int], c_void_p),
+    'ipap_template_add_field': ([c_void_p, c_uint16, c_uint8, c_int, c_void_p], None),
+    'ipap_template_get_object_type': ([c_void_p, c_uint8], c_int),
+    'ipap_template_get_object_template_types_size': ([c_void_p, c_uint8], c_int),
+    'ipap_template_get_object_template_types_at_pos': ([c_void_p, c_int, c_int], c_int),
+    'ipap_template_get_numfields': ([c_void_p], c_int),
+    'ipap_template_get_field_by_pos': ([c_void_p, c_int], c_void_p),
+    'ipap_template_get_field': ([c_void_p, c_int, c_int], c_void_p),
+    'ipap_template_is_equal': ([c_void_p, c_void_p], c_bool),
+
+    # ipap_template_container
+    'ipap_template_container_new': ([], c_void_p),
+    'ipap_template_container_destroy': ([c_void_p], None),
+    'ipap_template_container_add_template': ([c_void_p, c_void_p], None),
+    'ipap_template_container_delete_all_templates': ([c_void_p], None),
+    'ipap_template_container_delete_template': ([c_void_p, c_uint16], None),
+    'ipap_template_container_exists_template': ([c_void_p, c_uint16], c_bool),
+    'ipap_template_container_get_num_templates': ([c_void_p], c_int),
+    'ipap_template_container_get_template': ([c_void_p, c_uint16], c_void_p),
+
+    # ipap_message
+    'ipap_message_new': ([c_int, c_int, c_bool], c_void_p),
+    'ipap_message_new_message': ([c_void_p, c_int, c_bool], c_void_p),
+    'ipap_message_destroy': ([c_void_p], None),
+    'ipap_message_new_data_template': ([c_void_p, c_int, c_int], c_int),
+    'ipap_message_add_field': ([c_void_p, c_uint16, c_uint32, c_uint16], c_int),
+    'ipap_message_delete_template': ([c_void_p, c_uint16], None),
+    'ipap_message_delete_all_templates': ([c_void_p], None),
+    'ipap_message_get_template_list_size': ([c_void_p], c_int),
+    'ipap_message_get_template_at_pos': ([c_void_p, c_int], c_int),
+    'ipap_message_get_template_object': ([c_void_p, c_uint16], c_void_p),
+    'ipap_message_include_data': ([c_void_p, c_uint16, c_void_p], c_int),
+    'ipap_message_get_data_record_size': ([c_void_p], c_int),
+    'ipap_message_get_data_record_at_pos': ([c_void_p, c_int], c_void_p),
+    'ipap_message_set_syn': ([c_void_p, c_bool], None),
+    'ipap_message_get_syn': ([c_void_p], c_bool),
+    'ipap_message_set_ack': ([c_void_p, c_bool], None),
+    'ipap_message_get_ack': ([c_void_p], c_bool),
+    'ipap_message_set_fin': ([c_void_p, c_bool], None),
+    'ipap_message_get_fin': ([c_void_p], c_bool),
+    'ipap_message_get_seqno': ([c_void_p], c_uint32),
+    'ipap_message_set_seqno': ([c_void_p, c_uint32], None),
+    'ipap_message_get_ackseqno': ([c_void_p], c_uint32),
+    'ipap_message_set_ackseqno': ([c_void_p, c_uint32], None),
+    'ipap_message_output': ([c_void_p], None),
+    'ipap_message_get_message': ([c_void_p], POINTER(c_ubyte)),
+    'ipap_message_get_message_length': ([c_void_p], c_int),
+    'ipap_message_get_domain': ([c_void_p], c_int),
+    'ipap_message_make_template': ([c_void_p, c_void_p], None),
+}
+
+
+def declare_prototypes(library, prototypes: dict):
+    """
+    Declares argument and return types for the functions of a library.
+
+    :param library: library loaded with ctypes
+    :param prototypes: dictionary function name: (argtypes, restype)
+    """
+    for function_name, (argtypes, restype) in prototypes.items():
+        function = getattr(library, function_name)
+        function.argtypes = argtypes
+        function.restype = restype
+
+
+if lib is not None:
+    declare_prototypes(lib, PROTOTYPES)
@@ -1,16 +1,62 @@
-from ctypes import cdll
 from ctypes import c_uint16
-from ctypes import c_uint32
-from ctypes import c_int
-from ctypes import c_bool
-from ctypes import POINTER
 from ctypes import c_ubyte
-
+from ctypes import create_string_buffer
+from ctypes import sizeof
+from ctypes import string_at
+from functools import partial
+
+from python_wrapper.ipap_lib import lib
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import PYTHON_BACKEND
 from python_wrapper.ipap_template import IpapTemplate
 from python_wrapper.ipap_template import TemplateType
 from python_wrapper.ipap_data_record import IpapDataRecord
+from python_wrapper.ipap_float32 import float32_value
+
+
+def _signed(reader, bits: int):
+    """
+    Builds a reader for a signed integer from the reader of the unsigned integer with the same length.
+    """
+    def read_signed(value_obj) -> int:
+        value = reader(value_obj)
+        return value - (1 << bits) if value >> (bits - 1) else value
+    return read_signed
+
+
+def _read_string(value_obj) -> str:
+    # we restrict to length to remove the ending null character.
+    lenght = lib.ipap_value_field_get_length(value_obj)
+    return lib.ipap_value_field_get_value_vchar(value_obj)[:lenght].decode('utf-8')
+
+
+def _write_value(field_obj, value_obj) -> str:
+    result = create_string_buffer(lib.ipap_field_number_characters(field_obj, value_obj) + 1)
+    lib.ipap_field_write_value(field_obj, value_obj, result, sizeof(result))
+    return result.value.decode('utf-8')
+
 
-lib = cdll.LoadLibrary('libipap.so')
+def _read_float(value_obj) -> float:
+    # values are given with the text they were written with, not with the digits of the 32 bit float.
+    return float32_value(lib.ipap_value_field_get_value_float(value_obj))
+
+
+# Readers from a native value field to a python value by data type name. Other types are read as text.
+_VALUE_READERS = {}
+if lib is not None:
+    _VALUE_READERS.update({
+        'UINT8': lib.ipap_value_field_get_value_int8,
+        'UINT16': lib.ipap_value_field_get_value_int16,
+        'UINT32': lib.ipap_value_field_get_value_int32,
+        'UINT64': lib.ipap_value_field_get_value_int64,
+        'INT8': _signed(lib.ipap_value_field_get_value_int8, 8),
+        'INT16': _signed(lib.ipap_value_field_get_value_int16, 16),
+        'INT32': _signed(lib.ipap_value_field_get_value_int32, 32),
+        'INT64': _signed(lib.ipap_value_field_get_value_int64, 64),
+        'FLOAT': _read_float,
+        'DOUBLE': lib.ipap_value_field_get_value_double,
+        'STRING': _read_string,
+    })
 
 
 class IpapMessageType:
@@ -53,34 +99,169 @@ class IpapMessageType:
                'bidding object message:' + str(self.bidding_object_message) + \
                'allocation:' + str(self.allocation_message)
 
+# Kind of message given by the type of the templates included.
+_MESSAGE_TYPE_SETTERS = {
+    TemplateType.IPAP_SETID_ASK_OBJECT_TEMPLATE: IpapMessageType.set_ask_message,
+    TemplateType.IPAP_OPTNS_ASK_OBJECT_TEMPLATE: IpapMessageType.set_ask_message,
+    TemplateType.IPAP_SETID_AUCTION_TEMPLATE: IpapMessageType.set_auction_message,
+    TemplateType.IPAP_OPTNS_AUCTION_TEMPLATE: IpapMessageType.set_auction_message,
+    TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE: IpapMessageType.set_bidding_message,
+    TemplateType.IPAP_OPTNS_BID_OBJECT_TEMPLATE: IpapMessageType.set_bidding_message,
+    TemplateType.IPAP_SETID_ALLOC_OBJECT_TEMPLATE: IpapMessageType.set_allocation_message,
+    TemplateType.IPAP_OPTNS_ALLOC_OBJECT_TEMPLATE: IpapMessageType.set_allocation_message,
+}
+
+
+def get_message_type(template_types: list) -> IpapMessageType:
+    """
+    Gets the kind of message from the types of the templates it includes.
+
+    :param template_types: template types included in the message
+    :return: message type
+    """
+    ipap_message_type = IpapMessageType()
+    for template_type in template_types:
+        if template_type in _MESSAGE_TYPE_SETTERS:
+            _MESSAGE_TYPE_SETTERS[template_type](ipap_message_type, True)
+    return ipap_message_type
+
+
 class IpapMessage:
+    """
+    Ipap message.
+
+    The message can be used as a context manager, e.g. ``with IpapMessage.from_buffer(buffer) as message:``.
+    Templates and records taken from the message inside the block are borrowed from it: they are not destroyed
+    one by one, all of them are released together with the message when the block exits. Objects that must be
+    used after the block are kept with their detach() method, the message is then destroyed once they are gone.
+    """
     IPAP_VERSION = 0x01
 
     def __init__(self, domain_id: int, ipap_version: int, _encode_network: bool, value: str = None):
+        self.borrowed = None
+        self.detached = False
         if value:
-            array_unsigned_char = c_ubyte * len(value)
-            mes = array_unsigned_char()
-            for i in range(0, len(value)):
-                mes[i] = ord(value[i])
-
-            obj = lib.ipap_message_new_message(mes, c_int(len(value)), c_bool(_encode_network))
-            if obj:
-                self.obj = obj
+            self.obj = self._new_message(value, _encode_network)
+        else:
+            self.obj = lib.ipap_message_new(domain_id, ipap_version, _encode_network)
+
+    @staticmethod
+    def _new_message(value, _encode_network: bool):
+        """
+        Creates the native message from an encoded buffer.
+
+        bytes are handed to the library as they are, writable buffers (bytearray, writable memoryview)
+        are wrapped by a ctypes array that shares their memory, so there is no copy made in python.
+
+        :param value: encoded message as str, bytes, bytearray or memoryview
+        :param _encode_network: whether or not the message is encoded in network order
+        :return: pointer to the native message
+        """
+        if isinstance(value, str):
+            # text frames carry one character per byte.
+            value = value.encode('latin-1')
+
+        elif isinstance(value, memoryview):
+            if value.readonly:
+                if isinstance(value.obj, bytes) and value.nbytes == len(value.obj):
+                    value = value.obj
+                else:
+                    value = value.tobytes()
             else:
-                raise ValueError("Not a Ipap Message")
+                value = (c_ubyte * value.nbytes).from_buffer(value)
+
+        elif isinstance(value, bytearray):
+            value = (c_ubyte * len(value)).from_buffer(value)
+
+        obj = lib.ipap_message_new_message(value, len(value), _encode_network)
+        if obj:
+            return obj
         else:
-            self.obj = lib.ipap_message_new(c_int(domain_id), c_int(ipap_version), c_bool(_encode_network))
+            raise ValueError("Not a Ipap Message")
+
+    @classmethod
+    def from_buffer(cls, buffer, _encode_network: bool = True):
+        """
+        Creates a message from an encoded buffer without copying it byte by byte.
+
+        :param buffer: encoded message as bytes, bytearray or memoryview
+        :param _encode_network: whether or not the message is encoded in network order
+        :return: the message decoded, raise ValueError if the buffer is not a valid message.
+        """
+        message = cls.__new__(cls)
+        message.obj = None
+        message.borrowed = None
+        message.detached = False
+        message.obj = cls._new_message(buffer, _encode_network)
+        return message
+
+    def __enter__(self):
+        self.borrowed = {}
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+    def _borrow(self, key, create):
+        """
+        Gets the wrapper of an object owned by the message. Inside a with block the wrapper is borrowed and
+        kept by the message, so the same wrapper is given every time the object is requested.
+
+        :param key: key of the object within the message
+        :param create: function creating the wrapper, it receives whether or not the wrapper owns the object.
+        :return: the wrapper
+        """
+        if self.borrowed is None:
+            return create(True)
+
+        wrapper = self.borrowed.get(key)
+        if wrapper is None:
+            wrapper = self.borrowed[key] = create(False)
+            wrapper.arena = self
+        return wrapper
+
+    def detach(self, wrapper):
+        """
+        Detaches a borrowed object, so it can be used after the message is released. The object keeps a
+        reference to the message, the native message is destroyed when the message and the objects
+        detached from it are not used anymore.
+
+        :param wrapper: template or data record borrowed from the message
+        """
+        if self.borrowed is not None:
+            for key, borrowed in list(self.borrowed.items()):
+                if borrowed is wrapper:
+                    del self.borrowed[key]
+                    self.detached = True
+
+    def release(self):
+        """
+        Releases the objects borrowed from the message and the native message, they must not be used after.
+        When some of them were detached, the native message is released once they are gone.
+        """
+        if self.borrowed is None:
+            return
+
+        for wrapper in self.borrowed.values():
+            wrapper.obj = None
+            wrapper.arena = None
+        self.borrowed = None
+
+        if self.obj and not self.detached:
+            lib.ipap_message_destroy(self.obj)
+            self.obj = None
 
     def new_data_template(self, nfields: int, template_type_id: TemplateType) -> c_uint16:
-        return lib.ipap_message_new_data_template(self.obj, c_int(nfields), c_int(template_type_id.value))
+        return lib.ipap_message_new_data_template(self.obj, nfields, template_type_id.value)
 
     def add_field(self, templid: int, eno: int, type: int):
-        val = lib.ipap_message_add_field(self.obj, c_uint16(templid), c_uint32(eno), c_uint16(type))
+        val = lib.ipap_message_add_field(self.obj, templid, eno, type)
         if val < 0:
             raise ValueError("Invalid argument. The field was not included")
 
     def delete_template(self, templid: int):
-        lib.ipap_message_delete_template(self.obj, c_uint16(templid))
+        lib.ipap_message_delete_template(self.obj, templid)
 
     def delete_all_templates(self):
         lib.ipap_message_delete_all_templates(self.obj)
@@ -90,7 +271,7 @@ class IpapMessage:
         list_return = []
 
         for i in range(0, size):
-            templ_id = lib.ipap_message_get_template_at_pos(self.obj, c_int(i))
+            templ_id = lib.ipap_message_get_template_at_pos(self.obj, i)
 
             if templ_id >= 0:  # not invalid
                 list_return.append(templ_id)
@@ -99,15 +280,14 @@ class IpapMessage:
         return list_return
 
     def get_template_object(self, templ_id: int) -> IpapTemplate:
-        obj = lib.ipap_message_get_template_object(self.obj, c_uint16(templ_id))
+        obj = lib.ipap_message_get_template_object(self.obj, templ_id)
         if obj:  # not null
-            template = IpapTemplate(obj)
-            return template
+            return self._borrow(('template', obj), lambda owner: IpapTemplate(obj, owner=owner))
         else:
             raise ValueError("Template with id:{} was not found".format(str(templ_id)))
 
     def include_data(self, template_id: int, ipap_data_record: IpapDataRecord):
-        ret = lib.ipap_message_include_data(self.obj, c_uint16(template_id), ipap_data_record.obj)
+        ret = lib.ipap_message_include_data(self.obj, template_id, ipap_data_record.obj)
         if ret < 0:
             raise ValueError("An error occurs inserting the data record in message")
 
@@ -115,65 +295,138 @@ class IpapMessage:
         return lib.ipap_message_get_data_record_size(self.obj)
 
     def get_data_record_at_pos(self, pos: int) -> IpapDataRecord:
-        obj = lib.ipap_message_get_data_record_at_pos(self.obj, c_int(pos))
+        obj = lib.ipap_message_get_data_record_at_pos(self.obj, pos)
         if obj:  # not null
-            return IpapDataRecord(obj=obj)
+            return self._borrow(('record', obj), lambda owner: IpapDataRecord(obj=obj, owner=owner))
         else:
             raise ValueError("Data record at pos {0} was not found".format(str(int)))
 
+    def _get_record_decoder(self, template_id: int, field_type=None) -> list:
+        """
+        Gets the fields of a template with the reader for their values.
+
+        :param template_id: template identifier
+        :param field_type: function giving the data type name of a field by eno and ftype
+        :return: list of ((eno, ftype), eno, ftype, reader)
+        """
+        template_obj = lib.ipap_message_get_template_object(self.obj, template_id)
+        if not template_obj:
+            raise ValueError("Template with id:{} was not found".format(str(template_id)))
+
+        decoder = []
+        for pos in range(0, lib.ipap_template_get_numfields(template_obj)):
+            field_obj = lib.ipap_template_get_field_by_pos(template_obj, pos)
+            eno = lib.ipap_field_get_eno(field_obj)
+            ftype = lib.ipap_field_get_type(field_obj)
+            try:
+                reader = _VALUE_READERS.get(field_type(eno, ftype)) if field_type is not None else None
+            except ValueError:
+                reader = None
+
+            if reader is None:
+                reader = partial(_write_value, field_obj)
+            decoder.append(((eno, ftype), eno, ftype, reader))
+        return decoder
+
+    def extract_records(self, template_id: int = None, columnar: bool = False, field_type=None):
+        """
+        Decodes the data records of the message in one pass.
+
+        Values are read straight from the native records following the fields of their template, without
+        creating wrapper objects per field. Numbers and strings are given as python int, float and str,
+        other types as the text written by the library.
+
+        :param template_id: template of the records to decode, all the records are decoded when not given.
+        :param columnar: whether or not to return values by field instead of by record.
+        :param field_type: function giving the data type name (e.g. 'UINT32') of a field by eno and ftype, it
+                           raises ValueError for unknown fields. Without it, values are read as text.
+        :return: list of (template_id, values) tuples, where values is a dictionary keyed by (eno, ftype).
+                 When columnar, a dictionary keyed by (eno, ftype) with the list of values of every record.
+        """
+        if columnar and template_id is None:
+            raise ValueError("A template id is required to extract records by field")
+
+        get_field = lib.ipap_data_record_get_field
+        decoders = {}
+        records = []
+        for pos in range(0, lib.ipap_message_get_data_record_size(self.obj)):
+            record_obj = lib.ipap_message_get_data_record_at_pos(self.obj, pos)
+            record_template_id = lib.ipap_data_record_get_template_id(record_obj)
+            if template_id is not None and record_template_id != template_id:
+                continue
+
+            decoder = decoders.get(record_template_id)
+            if decoder is None:
+                decoder = decoders[record_template_id] = self._get_record_decoder(record_template_id, field_type)
+
+            values = {}
+            for key, eno, ftype, reader in decoder:
+                value_obj = get_field(record_obj, eno, ftype)
+                if value_obj:
+                    values[key] = reader(value_obj)
+            records.append((record_template_id, values))
+
+        if columnar:
+            columns = {}
+            for key, _, _, _ in decoders.get(template_id, []):
+                columns[key] = [values.get(key) for _, values in records]
+            return columns
+
+        return records
+
     def set_syn(self, syn: bool):
-        lib.ipap_message_set_syn(self.obj, c_bool(syn))
+        lib.ipap_message_set_syn(self.obj, syn)
 
     def get_syn(self) -> bool:
         return lib.ipap_message_get_syn(self.obj)
 
     def set_ack(self, ack: bool):
-        lib.ipap_message_set_ack(self.obj, c_bool(ack))
+        lib.ipap_message_set_ack(self.obj, ack)
 
     def get_ack(self) -> bool:
         return lib.ipap_message_get_ack(self.obj)
 
     def set_fin(self, fin: bool):
-        lib.ipap_message_set_fin(self.obj, c_bool(fin))
+        lib.ipap_message_set_fin(self.obj, fin)
 
     def get_fin(self):
         return lib.ipap_message_get_fin(self.obj)
 
     def get_seqno(self) -> int:
-        get_value_uint32 = lib.ipap_message_get_seqno
-        get_value_uint32.restype = c_uint32
-
         return lib.ipap_message_get_seqno(self.obj)
 
     def set_seqno(self, seq_no: int):
-        lib.ipap_message_set_seqno(self.obj, c_uint32(seq_no))
+        lib.ipap_message_set_seqno(self.obj, seq_no)
 
     def get_ackseqno(self) -> int:
-        get_value_uint32 = lib.ipap_message_get_ackseqno
-        get_value_uint32.restype = c_uint32
-
         return lib.ipap_message_get_ackseqno(self.obj)
 
     def set_ack_seq_no(self, ack_seq_no: int):
-        lib.ipap_message_set_ackseqno(self.obj, c_uint32(ack_seq_no))
+        lib.ipap_message_set_ackseqno(self.obj, ack_seq_no)
 
     def output(self):
         lib.ipap_message_output(self.obj)
 
-    def get_message(self) -> str:
-        get_value_vchar = lib.ipap_message_get_message
-        get_value_vchar.restype = POINTER(c_ubyte)
+    def get_message_bytes(self) -> bytes:
+        """
+        Gets the encoded message as bytes, copied at once from the native buffer.
 
-        # we restrict to length to remove the ending null character.
+        :return: encoded message
+        """
         # Here we make sure that the message is the buffers.
         lib.ipap_message_output(self.obj)
 
         lenght = lib.ipap_message_get_message_length(self.obj)
         value = lib.ipap_message_get_message(self.obj)
+        return string_at(value, lenght)
+
+    def get_message(self) -> str:
+        """
+        Gets the encoded message as text, one character per byte. Used for text websocket frames.
 
-        ret_lst = [chr(value[x]) for x in range(0, lenght)]
-        ret = ''.join(ret_lst)
-        return ret
+        :return: encoded message
+        """
+        return self.get_message_bytes().decode('latin-1')
 
     def get_domain(self)-> int:
         return lib.ipap_message_get_domain(self.obj)
@@ -182,28 +435,18 @@ class IpapMessage:
         lib.ipap_message_make_template(self.obj, template.obj)
 
     def get_types(self) -> IpapMessageType:
-
-        ipap_message_type = IpapMessageType()
-        templates = self.get_template_list()
-        for template_id in templates:
-            template = self.get_template_object(template_id)
-            if template.get_type() in [TemplateType.IPAP_SETID_ASK_OBJECT_TEMPLATE,
-                                       TemplateType.IPAP_OPTNS_ASK_OBJECT_TEMPLATE]:
-                ipap_message_type.set_ask_message(True)
-
-            if template.get_type() in [TemplateType.IPAP_SETID_AUCTION_TEMPLATE,
-                                       TemplateType.IPAP_OPTNS_AUCTION_TEMPLATE]:
-                ipap_message_type.set_auction_message(True)
-
-            if template.get_type() in [TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE,
-                                       TemplateType.IPAP_OPTNS_BID_OBJECT_TEMPLATE]:
-                ipap_message_type.set_bidding_message(True)
-
-            if template.get_type() in [TemplateType.IPAP_SETID_ALLOC_OBJECT_TEMPLATE,
-                                       TemplateType.IPAP_OPTNS_ALLOC_OBJECT_TEMPLATE]:
-                ipap_message_type.set_allocation_message(True)
-        return ipap_message_type
+        # Template types are read straight from the native templates, no wrapper is created for them.
+        template_types = []
+        for template_id in self.get_template_list():
+            template_obj = lib.ipap_message_get_template_object(self.obj, template_id)
+            template_types.append(TemplateType(lib.ipap_template_get_type(template_obj)))
+        return get_message_type(template_types)
 
     def __del__(self):
         if self.obj:
             lib.ipap_message_destroy(self.obj)
+            self.obj = None
+
+
+if IPAP_BACKEND == PYTHON_BACKEND:
+    from python_wrapper.ipap_codec import IpapMessage
@@ -0,0 +1,88 @@
+from python_wrapper.ipap_message import IpapMessage
+from python_wrapper.ipap_message import IpapMessageType
+from python_wrapper.ipap_message import get_message_type
+from python_wrapper.ipap_codec import IPAP_FLAG_SYN
+from python_wrapper.ipap_codec import IPAP_FLAG_ACK
+from python_wrapper.ipap_codec import IPAP_FLAG_FIN
+from python_wrapper.ipap_codec import read_header
+
+
+class IpapMessageView:
+    """
+    Lazy view of an encoded message. It gives the header (syn, ack, fin, sequence numbers) and the kind of
+    message, templates and records are decoded the first time they are used.
+
+    Only the header and the templates are read to classify the message, with either backend. Sets are checked
+    to hold whole templates and records, so malformed messages are rejected when the view is created.
+
+    Any other method of IpapMessage is delegated to the decoded message, so the view can be used where
+    a message is expected. Used as a context manager, the message decoded inside the block is released
+    when the block exits (see IpapMessage.__enter__).
+    """
+
+    def __init__(self, buffer, _encode_network: bool = True):
+        """
+        Creates the view, raises ValueError if the buffer is not a valid message.
+
+        :param buffer: encoded message as str, bytes, bytearray or memoryview
+        :param _encode_network: whether or not the message is encoded in network order
+        """
+        self.buffer = buffer
+        self.encode_network = _encode_network
+        self.message = None
+        self.scoped = False
+        # flags, seqno, ackseqno, domain and template types, they stay readable once the message is released.
+        self.header = read_header(buffer)
+
+    def decode(self) -> IpapMessage:
+        """
+        Gets the message with templates and records decoded.
+
+        :return: ipap message
+        """
+        if self.message is None:
+            self.message = IpapMessage.from_buffer(self.buffer, self.encode_network)
+            if self.scoped:
+                self.message.__enter__()
+        return self.message
+
+    def __enter__(self):
+        self.scoped = True
+        if self.message is not None:
+            self.message.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.scoped = False
+        if self.message is not None:
+            self.message.__exit__(exc_type, exc_value, traceback)
+            self.message = None
+        return False
+
+    def is_decoded(self) -> bool:
+        return self.message is not None
+
+    def get_syn(self) -> bool:
+        return bool(self.header[0] & IPAP_FLAG_SYN)
+
+    def get_ack(self) -> bool:
+        return bool(self.header[0] & IPAP_FLAG_ACK)
+
+    def get_fin(self) -> bool:
+        return bool(self.header[0] & IPAP_FLAG_FIN)
+
+    def get_seqno(self) -> int:
+        return self.header[1]
+
+    def get_ackseqno(self) -> int:
+        return self.header[2]
+
+    def get_domain(self) -> int:
+        return self.header[3]
+
+    def get_types(self) -> IpapMessageType:
+        return get_message_type(self.header[4])
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined by the view.
+        return getattr(self.decode(), name)
@@ -0,0 +1,310 @@
+"""
+Fields and template tables of libipap, and messages encoded by it, used by the python codec.
+
+The tables are read from libipap.so when it can be loaded, otherwise from the fixture recorded from it. The
+fixture is written on a host with the library by:
+
+    IPAP_BACKEND=native python -m python_wrapper.ipap_native
+
+it also keeps the messages encoded by the library for a set of recipes, so the python codec is checked byte
+for byte against the library without it.
+"""
+import json
+import os
+from ctypes import cdll
+
+from python_wrapper.ipap_template_types import ObjectType
+from python_wrapper.ipap_template_types import TemplateType
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'libipap.json')
+
+# Field types probed for fields defined by the library, enterprise number 0.
+MAX_FIELD_TYPE = 1024
+
+# Length of variable length fields.
+IPAP_FT_VARLEN = 65535
+
+
+def load_library():
+    """
+    Loads libipap.so with the prototypes of the wrappers.
+
+    :return: the library, None when it can not be loaded.
+    """
+    from python_wrapper.ipap_lib import lib
+    from python_wrapper.ipap_lib import declare_prototypes
+    from python_wrapper.ipap_lib import PROTOTYPES
+
+    if lib is not None:
+        return lib
+
+    try:
+        library = cdll.LoadLibrary('libipap.so')
+    except OSError:
+        return None
+
+    declare_prototypes(library, PROTOTYPES)
+    return library
+
+
+def _get_coding(field_def_types: dict, eno: int, ftype: int, length: int) -> int:
+    from python_wrapper.ipap_codec import _FIELD_CODINGS
+    from python_wrapper.ipap_codec import IPAP_CODING_BYTES
+    from python_wrapper.ipap_codec import IPAP_CODING_STRING
+    from python_wrapper.ipap_codec import IPAP_CODING_UINT
+
+    if (eno, ftype) in field_def_types:
+        return _FIELD_CODINGS.get(field_def_types[(eno, ftype)], (IPAP_CODING_BYTES, length))[0]
+
+    # the library does not give the coding of its own fields, they are numbers or strings by their length.
+    return IPAP_CODING_STRING if length == IPAP_FT_VARLEN else IPAP_CODING_UINT
+
+
+def _get_field_codes(library, template_obj, size_function, field_function, templ_type: TemplateType) -> list:
+    field_codes = []
+    for pos in range(0, size_function(template_obj, templ_type.value)):
+        field_key_obj = field_function(template_obj, templ_type.value, pos)
+        field_codes.append((library.ipap_field_key_get_eno(field_key_obj),
+                            library.ipap_field_key_get_ftype(field_key_obj)))
+        library.ipap_field_key_destroy(field_key_obj)
+    return field_codes
+
+
+def read_tables(library, field_definitions: dict) -> dict:
+    """
+    Reads the fields and the template tables of the library.
+
+    :param library: libipap loaded by load_library
+    :param field_definitions: fields defined in the field definition file by name, they give the codings.
+    :return: dictionary with:
+             fields: list of (eno, ftype, length, coding, name, xml_name, documentation)
+             mandatory_fields: mandatory (eno, ftype) fields by template type
+             key_fields: key (eno, ftype) fields by template type
+             object_template_types: template types by object type, data template first.
+    """
+    field_def_types = {(field_def['eno'], field_def['ftype']): field_def['type'].name
+                       for field_def in field_definitions.values()}
+
+    container_obj = library.ipap_field_container_new()
+    library.ipap_field_container_initialize_forward(container_obj)
+    library.ipap_field_container_initialize_reverse(container_obj)
+
+    fields = []
+    codes = sorted(set([(0, ftype) for ftype in range(0, MAX_FIELD_TYPE)]) | set(field_def_types))
+    for eno, ftype in codes:
+        field_obj = library.ipap_field_container_get_field_pointer(container_obj, eno, ftype)
+        if not field_obj:
+            continue
+
+        length = library.ipap_field_get_length(field_obj)
+        fields.append((eno, ftype, length, _get_coding(field_def_types, eno, ftype, length),
+                       library.ipap_field_get_field_name(field_obj), library.ipap_field_get_xml_name(field_obj),
+                       library.ipap_field_get_documentation(field_obj)))
+
+    template_obj = library.ipap_template_new()
+    templ_types = [templ_type for templ_type in TemplateType if templ_type != TemplateType.IPAP_INVALID_TEMPLATE]
+    tables = {'fields': fields,
+              'mandatory_fields': {
+                  templ_type: _get_field_codes(library, template_obj,
+                                               library.ipap_template_get_template_type_mandatory_field_size,
+                                               library.ipap_template_get_template_type_mandatory_field,
+                                               templ_type) for templ_type in templ_types},
+              'key_fields': {
+                  templ_type: _get_field_codes(library, template_obj,
+                                               library.ipap_template_get_template_type_keys_size,
+                                               library.ipap_template_get_template_type_key,
+                                               templ_type) for templ_type in templ_types},
+              'object_template_types': {}}
+
+    for object_type in ObjectType:
+        if object_type in [ObjectType.IPAP_INVALID, ObjectType.IPAP_MAX_OBJECT_TYPE]:
+            continue
+
+        size = library.ipap_template_get_object_template_types_size(template_obj, object_type.value)
+        tables['object_template_types'][object_type] = [
+            TemplateType(library.ipap_template_get_object_template_types_at_pos(template_obj, object_type.value, pos))
+            for pos in range(0, size)]
+
+    library.ipap_template_destroy(template_obj)
+    return tables
+
+
+def dump_tables(tables: dict) -> dict:
+    """
+    Gets the tables in a form written as json.
+    """
+    def dump_text(value: bytes) -> str:
+        return value.decode('utf-8') if value else ''
+
+    return {'fields': [[eno, ftype, length, coding, dump_text(name), dump_text(xml_name), dump_text(documentation)]
+                       for eno, ftype, length, coding, name, xml_name, documentation in tables['fields']],
+            'mandatory_fields': {templ_type.name: [list(code) for code in codes]
+                                 for templ_type, codes in tables['mandatory_fields'].items()},
+            'key_fields': {templ_type.name: [list(code) for code in codes]
+                           for templ_type, codes in tables['key_fields'].items()},
+            'object_template_types': {object_type.name: [templ_type.name for templ_type in templ_types]
+                                      for object_type, templ_types in tables['object_template_types'].items()}}
+
+
+def parse_tables(values: dict) -> dict:
+    """
+    Gets the tables from their json form, see dump_tables.
+    """
+    return {'fields': [(eno, ftype, length, coding, name.encode('utf-8'), xml_name.encode('utf-8'),
+                        documentation.encode('utf-8'))
+                       for eno, ftype, length, coding, name, xml_name, documentation in values['fields']],
+            'mandatory_fields': {TemplateType[name]: [tuple(code) for code in codes]
+                                 for name, codes in values['mandatory_fields'].items()},
+            'key_fields': {TemplateType[name]: [tuple(code) for code in codes]
+                           for name, codes in values['key_fields'].items()},
+            'object_template_types': {ObjectType[name]: [TemplateType[templ_type] for templ_type in templ_types]
+                                      for name, templ_types in values['object_template_types'].items()}}
+
+
+def load_fixture(path: str = FIXTURE_PATH) -> dict:
+    """
+    Loads the fixture recorded from the library.
+
+    :param path: path of the fixture
+    :return: the fixture, None when it was not recorded.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as fixture_file:
+        return json.load(fixture_file)
+
+
+def load_tables(field_definitions: dict) -> dict:
+    """
+    Gets the tables of the library, from libipap.so when it can be loaded and otherwise from the fixture.
+
+    :param field_definitions: fields defined in the field definition file by name, see read_tables.
+    :return: tables, see read_tables. None when neither is available.
+    """
+    library = load_library()
+    if library is not None:
+        return read_tables(library, field_definitions)
+
+    fixture = load_fixture()
+    if fixture is not None:
+        return parse_tables(fixture['tables'])
+    return None
+
+
+def _get_sample_value(field: tuple, long_text: bool) -> str:
+    from python_wrapper.ipap_codec import IPAP_CODING_FLOAT
+    from python_wrapper.ipap_codec import IPAP_CODING_INT
+    from python_wrapper.ipap_codec import IPAP_CODING_IPADDR
+    from python_wrapper.ipap_codec import IPAP_CODING_NTP
+    from python_wrapper.ipap_codec import IPAP_CODING_STRING
+    from python_wrapper.ipap_codec import IPAP_CODING_UINT
+
+    eno, ftype, length, coding = field[:4]
+    if coding in [IPAP_CODING_UINT, IPAP_CODING_NTP]:
+        return str(ftype % (1 << min(8 * length, 16)))
+    elif coding == IPAP_CODING_INT:
+        return str(-ftype)
+    elif coding == IPAP_CODING_FLOAT:
+        return '0.1'
+    elif coding == IPAP_CODING_IPADDR:
+        return '10.0.0.1' if length == 4 else '2001:db8::1'
+    elif coding == IPAP_CODING_STRING:
+        # strings over 254 bytes are written with the three bytes length.
+        return 'field_{0}_{1}'.format(eno, ftype) * (30 if long_text else 1)
+    else:
+        return '0x0102'
+
+
+def get_recipes(tables: dict) -> list:
+    """
+    Gets the messages recorded from the library: one per object type, with its data and options templates
+    holding their mandatory fields and two records each. The auction data template has a field of every
+    field definition besides.
+
+    :param tables: tables of the library
+    :return: list of recipes, dictionaries with the domain, seqno, syn and the list of templates
+             (template type, fields, records), records are lists of values written as text.
+    """
+    fields = {(field[0], field[1]): field for field in tables['fields']}
+    recipes = []
+    for object_type, templ_types in sorted(tables['object_template_types'].items(), key=lambda item: item[0].value):
+        templates = []
+        for templ_type in templ_types:
+            codes = list(tables['mandatory_fields'][templ_type])
+            if templ_type == TemplateType.IPAP_SETID_AUCTION_TEMPLATE:
+                codes += [code for code in sorted(fields) if code not in codes]
+
+            records = []
+            for num_record in range(0, 2):
+                records.append([_get_sample_value(fields[code], num_record == 1) for code in codes])
+            templates.append({'type': templ_type.name, 'fields': [list(code) for code in codes],
+                              'records': records})
+
+        recipes.append({'name': object_type.name, 'domain': 1, 'seqno': 10 + object_type.value,
+                        'syn': object_type == ObjectType.IPAP_AUCTION, 'templates': templates})
+    return recipes
+
+
+def build_message(recipe: dict, message_class, record_class, field_container):
+    """
+    Builds the message of a recipe.
+
+    :param recipe: recipe, see get_recipes
+    :param message_class: message class of the backend
+    :param record_class: data record class of the backend
+    :param field_container: initialized field container of the backend
+    :return: message
+    """
+    ipap_message = message_class(recipe['domain'], message_class.IPAP_VERSION, True)
+    for template in recipe['templates']:
+        template_id = ipap_message.new_data_template(len(template['fields']), TemplateType[template['type']])
+        for eno, ftype in template['fields']:
+            ipap_message.add_field(template_id, eno, ftype)
+
+        for values in template['records']:
+            ipap_data_record = record_class(templ_id=template_id)
+            for (eno, ftype), value in zip(template['fields'], values):
+                ipap_data_record.insert_field(eno, ftype, field_container.get_field(eno, ftype).parse(value))
+            ipap_message.include_data(template_id, ipap_data_record)
+
+    ipap_message.set_syn(recipe['syn'])
+    ipap_message.set_seqno(recipe['seqno'])
+    return ipap_message
+
+
+def record(path: str = FIXTURE_PATH):
+    """
+    Records the tables of the library and the messages it encodes for every recipe, the native backend
+    has to be in use.
+
+    :param path: path of the fixture
+    """
+    from foundation.field_def_manager import FieldDefManager
+    from python_wrapper.ipap_data_record import IpapDataRecord
+    from python_wrapper.ipap_field_container import IpapFieldContainer
+    from python_wrapper.ipap_lib import lib
+    from python_wrapper.ipap_message import IpapMessage
+
+    if lib is None:
+        raise ValueError('The native backend is required to record the fixture')
+
+    field_container = IpapFieldContainer()
+    field_container.initialize_forward()
+    field_container.initialize_reverse()
+
+    tables = read_tables(lib, FieldDefManager().get_field_defs())
+    messages = []
+    for recipe in get_recipes(tables):
+        ipap_message = build_message(recipe, IpapMessage, IpapDataRecord, field_container)
+        messages.append({'recipe': recipe, 'message': ipap_message.get_message_bytes().hex(),
+                         'records': [[template_id, [[eno, ftype, value] for (eno, ftype), value in values.items()]]
+                                     for template_id, values in ipap_message.extract_records()]})
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as fixture_file:
+        json.dump({'tables': dump_tables(tables), 'messages': messages}, fixture_file, indent=1)
+
+
+if __name__ == '__main__':
+    record()
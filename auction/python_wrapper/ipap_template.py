@@ -1,62 +1,41 @@
-from ctypes import cdll
-from ctypes import c_int
-from ctypes import c_uint16
-from ctypes import c_uint8
+from python_wrapper.ipap_lib import lib
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import PYTHON_BACKEND
 from python_wrapper.ipap_field_key import IpapFieldKey
 from python_wrapper.ipap_field import IpapField
-from enum import Enum
-
-lib = cdll.LoadLibrary('libipap.so')
-
-
-class TemplateType(Enum):
-    IPAP_INVALID_TEMPLATE = -1
-    IPAP_SETID_AUCTION_TEMPLATE = 0
-    IPAP_OPTNS_AUCTION_TEMPLATE = 1
-    IPAP_SETID_BID_OBJECT_TEMPLATE = 2
-    IPAP_OPTNS_BID_OBJECT_TEMPLATE = 3
-    IPAP_SETID_ASK_OBJECT_TEMPLATE = 4
-    IPAP_OPTNS_ASK_OBJECT_TEMPLATE = 5
-    IPAP_SETID_ALLOC_OBJECT_TEMPLATE = 6
-    IPAP_OPTNS_ALLOC_OBJECT_TEMPLATE = 7
-
-
-class UnknownField(Enum):
-    KNOWN = 0
-    UNKNOWN = 1
-
-
-class ObjectType(Enum):
-    IPAP_INVALID = -1
-    IPAP_AUCTION = 0
-    IPAP_BID = 1
-    IPAP_ASK = 2
-    IPAP_ALLOCATION = 3
-    IPAP_MAX_OBJECT_TYPE = 4
+from python_wrapper.ipap_template_codec import IpapTemplateCodec
+from python_wrapper.ipap_template_types import TemplateType
+from python_wrapper.ipap_template_types import UnknownField
+from python_wrapper.ipap_template_types import ObjectType
 
 
 class IpapTemplate:
 
-    def __init__(self, obj=None):
+    def __init__(self, obj=None, owner: bool = True):
         if obj:
             self.obj = obj
+            self.owner = owner
         else:
             self.obj = lib.ipap_template_new()
+            self.owner = True
+
+        # Message the template is borrowed from, see IpapMessage.__enter__
+        self.arena = None
 
     def set_id(self, id_template: int):
-        return lib.ipap_template_set_id(self.obj, c_uint16(id_template))
+        return lib.ipap_template_set_id(self.obj, id_template)
 
     def get_template_id(self) -> int:
         return lib.ipap_template_get_template_id(self.obj)
 
     def set_max_fields(self, max_fields: int):
-        lib.ipap_template_set_maxfields(self.obj, c_int(max_fields))
+        lib.ipap_template_set_maxfields(self.obj, max_fields)
 
     def set_type(self, templ_type: TemplateType):
-        lib.ipap_template_set_type(self.obj, c_int(templ_type.value))
+        lib.ipap_template_set_type(self.obj, templ_type.value)
 
     def _get_template_type_mandatory_field_size(self, temp_type: TemplateType) -> int:
-        return lib.ipap_template_get_template_type_mandatory_field_size(self.obj, c_int(temp_type.value))
+        return lib.ipap_template_get_template_type_mandatory_field_size(self.obj, temp_type.value)
 
     def get_template_type_mandatory_field(self, temp_type: TemplateType) -> list:
         size = self._get_template_type_mandatory_field_size(temp_type)
@@ -66,7 +45,7 @@ class IpapTemplate:
         list_return = []
 
         for i in range(0, size):
-            obj = lib.ipap_template_get_template_type_mandatory_field(self.obj, c_int(temp_type.value), c_int(i))
+            obj = lib.ipap_template_get_template_type_mandatory_field(self.obj, temp_type.value, i)
             if obj:  # not null
                 field_key = IpapFieldKey(obj=obj)
                 list_return.append(field_key)
@@ -75,7 +54,7 @@ class IpapTemplate:
         return list_return
 
     def _get_template_type_key_size(self, temp_type: TemplateType) -> int:
-        return lib.ipap_template_get_template_type_keys_size(self.obj, c_int(temp_type.value))
+        return lib.ipap_template_get_template_type_keys_size(self.obj, temp_type.value)
 
     def get_template_type_key_field(self, temp_type: TemplateType) -> list:
         size = self._get_template_type_key_size(temp_type)
@@ -85,7 +64,7 @@ class IpapTemplate:
         list_return = []
 
         for i in range(0, size):
-            obj = lib.ipap_template_get_template_type_key(self.obj, c_int(temp_type.value), c_int(i))
+            obj = lib.ipap_template_get_template_type_key(self.obj, temp_type.value, i)
             if obj:  # not null
                 field_key = IpapFieldKey(obj=obj)
                 list_return.append(field_key)
@@ -99,21 +78,21 @@ class IpapTemplate:
         else:
             i_encode_network = 0
 
-        lib.ipap_template_add_field(self.obj, c_uint16(field_size),
-                                    c_uint8(unknow_field.value), c_int(i_encode_network), field.obj)
+        lib.ipap_template_add_field(self.obj, field_size,
+                                    unknow_field.value, i_encode_network, field.obj)
 
     def get_type(self) -> TemplateType:
         return TemplateType(lib.ipap_template_get_type(self.obj))
 
     def get_object_type(self, template_type: TemplateType) -> ObjectType:
-        object_type = lib.ipap_template_get_object_type(self.obj,c_uint8(template_type.value))
+        object_type = lib.ipap_template_get_object_type(self.obj,template_type.value)
         return ObjectType(object_type)
 
     def _get_object_template_types_size(self, object_type: ObjectType) -> int:
         if object_type == ObjectType.IPAP_INVALID:
             return -1
         else:
-            return lib.ipap_template_get_object_template_types_size(self.obj, c_uint8(object_type.value))
+            return lib.ipap_template_get_object_template_types_size(self.obj, object_type.value)
 
     def get_object_template_types(self, object_type: ObjectType):
         if object_type == ObjectType.IPAP_INVALID:
@@ -124,7 +103,7 @@ class IpapTemplate:
 
         for i in range(0, size):
             templ_type = TemplateType(lib.ipap_template_get_object_template_types_at_pos(
-                self.obj, c_int(object_type.value), c_int(i)))
+                self.obj, object_type.value, i))
 
             if templ_type == object_type.IPAP_INVALID:
                 raise ValueError('Object type requested but not found')
@@ -138,7 +117,7 @@ class IpapTemplate:
         list_return = []
 
         for i in range(0, size):
-            obj = lib.ipap_template_get_field_by_pos(self.obj, c_int(i))
+            obj = lib.ipap_template_get_field_by_pos(self.obj, i)
             if obj:  # not null
                 field = IpapField(obj=obj)
                 list_return.append(field)
@@ -147,7 +126,7 @@ class IpapTemplate:
         return list_return
 
     def get_field(self, eno: int, ftype: int) -> IpapField:
-        obj = lib.ipap_template_get_field(self.obj, c_int(eno), c_int(ftype))
+        obj = lib.ipap_template_get_field(self.obj, eno, ftype)
         if obj:  # not null
             field = IpapField(obj=obj)
             return field
@@ -160,6 +139,15 @@ class IpapTemplate:
     def get_num_fields(self) -> int:
         return lib.ipap_template_get_numfields(self.obj)
 
+    def compile(self, field_def) -> IpapTemplateCodec:
+        """
+        Compiles the template into an encoder and decoder of its records.
+
+        :param field_def: function giving the field definition of an (eno, ftype) code, see IpapTemplateCodec.
+        :return: codec for the records of the template
+        """
+        return IpapTemplateCodec(self, field_def)
+
     @staticmethod
     def get_data_template(object_type: ObjectType) -> TemplateType:
 
@@ -196,7 +184,20 @@ class IpapTemplate:
         else:
             return TemplateType.IPAP_INVALID_TEMPLATE
 
+    def detach(self):
+        """
+        Keeps the template usable after the message it was borrowed from is released.
+
+        :return: the template
+        """
+        if self.arena is not None:
+            self.arena.detach(self)
+        return self
+
     def __del__(self):
-        if self.obj:  # not null
+        if self.obj and self.owner:  # not null
             lib.ipap_template_destroy(self.obj)
 
+
+if IPAP_BACKEND == PYTHON_BACKEND:
+    from python_wrapper.ipap_codec import IpapTemplate
@@ -0,0 +1,154 @@
+from datetime import datetime
+
+
+
+def _seconds(value) -> int:
+    """
+    Gets the value to store in an integer field, datetimes are stored as seconds from 1970-1-1.
+    """
+    if isinstance(value, datetime):
+        return int((value - datetime.fromtimestamp(0)).total_seconds())
+    return value
+
+
+class IpapTemplateCodec:
+    """
+    Encoder and decoder of the records of a template, created by IpapTemplate.compile(field_def).
+
+    Field definitions, value constructors and mandatory fields are resolved once when the template is compiled,
+    so a record is encoded from its values in one call.
+    """
+
+    def __init__(self, template, field_def):
+        """
+        Creates the codec for the template given
+
+        :param template: template whose records are encoded, an IpapTemplate.
+        :param field_def: function giving the field definition of an (eno, ftype) code, as
+                          FieldDefManager.get_field_by_code. Definitions have the field name in key and its
+                          data type in type.
+        """
+        self.template_id = template.get_template_id()
+        self.template_type = template.get_type()
+
+        self.mandatory_fields = set()
+        for field_key in template.get_template_type_mandatory_field(self.template_type):
+            definition = field_def(field_key.get_eno(), field_key.get_ftype())
+            self.mandatory_fields.add(definition['key'])
+
+        # name -> (eno, ftype, encoder) and (eno, ftype) -> (name, type)
+        self.encoders = {}
+        self.decoders = {}
+        for field in template.get_fields():
+            eno = field.get_eno()
+            ftype = field.get_type()
+            definition = field_def(eno, ftype)
+            self.encoders[definition['key']] = (eno, ftype, self._get_encoder(field, definition['type']))
+            self.decoders[(eno, ftype)] = (definition['key'], definition['type'])
+
+    @staticmethod
+    def _get_encoder(field, field_type):
+        """
+        Gets the function creating the value of a field from a python value. Values given as strings
+        are parsed by the field, as in IpapMessageParser.include_non_mandatory_fields.
+
+        :param field: field to encode, an IpapField.
+        :param field_type: data type of the field, a DataType.
+        :return: function creating the value field
+        """
+        type_name = field_type.name
+        if type_name == 'STRING':
+            def encode_value(value):
+                return field.get_ipap_field_value_string(value.encode('ascii'))
+            return encode_value
+
+        if type_name == 'IPV4ADDR':
+            def encode_value(value):
+                return field.get_ipap_field_value_ipv4(value.encode('ascii'))
+            return encode_value
+
+        if type_name == 'IPV6ADDR':
+            def encode_value(value):
+                return field.get_ipap_field_value_ipv6(value.encode('ascii'))
+            return encode_value
+
+        if type_name == 'FLOAT':
+            typed_encoder = field.get_ipap_field_value_float
+        elif type_name == 'DOUBLE':
+            typed_encoder = field.get_ipap_field_value_double
+        elif field.get_length() == 1:
+            typed_encoder = field.get_ipap_field_value_uint8
+        elif field.get_length() == 2:
+            typed_encoder = field.get_ipap_field_value_uint16
+        elif field.get_length() == 4:
+            typed_encoder = field.get_ipap_field_value_uint32
+        elif field.get_length() == 8:
+            typed_encoder = field.get_ipap_field_value_uint64
+        else:
+            def encode_value(value):
+                return field.parse(str(value))
+            return encode_value
+
+        if type_name in ['FLOAT', 'DOUBLE']:
+            def encode_value(value):
+                if isinstance(value, str):
+                    return field.parse(value)
+                return typed_encoder(float(value))
+        else:
+            def encode_value(value):
+                if isinstance(value, str):
+                    return field.parse(value)
+                return typed_encoder(int(_seconds(value)))
+        return encode_value
+
+    def get_template_id(self) -> int:
+        """
+        Gets the id of the template compiled
+
+        :return: template id
+        """
+        return self.template_id
+
+    def is_mandatory(self, field_name: str) -> bool:
+        """
+        Checks whether or not a field is mandatory for the template
+
+        :param field_name: field name
+        :return: True if the field is mandatory.
+        """
+        return field_name in self.mandatory_fields
+
+    def encode(self, values: dict, record=None):
+        """
+        Encodes a record.
+
+        :param values: values by field name. Values are python values (str, int, float or datetime).
+        :param record: IpapDataRecord where values are inserted, a new one is created when not given.
+        :return: the data record
+        """
+        if record is None:
+            # imported here, the wrapper modules are bound to the backend when they are imported.
+            from python_wrapper.ipap_data_record import IpapDataRecord
+            record = IpapDataRecord(templ_id=self.template_id)
+
+        encoders = self.encoders
+        for field_name, value in values.items():
+            if field_name not in encoders:
+                raise ValueError("Field {0} is not part of template {1}".format(field_name, str(self.template_id)))
+
+            eno, ftype, encode_value = encoders[field_name]
+            record.insert_field(eno, ftype, encode_value(value))
+        return record
+
+    def decode(self, values: dict) -> dict:
+        """
+        Decodes a record read by IpapMessage.extract_records
+
+        :param values: record values by (eno, ftype)
+        :return: (type, value) by field name
+        """
+        decoded = {}
+        for key, value in values.items():
+            field_name, field_type = self.decoders[key]
+            decoded[field_name] = (field_type, value)
+        return decoded
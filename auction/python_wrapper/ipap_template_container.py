@@ -1,83 +1,125 @@
-from ctypes import cdll
-from ctypes import c_uint16
-from ctypes import c_bool
-from ctypes import c_int
+from python_wrapper.ipap_lib import lib
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import PYTHON_BACKEND
 
 from python_wrapper.ipap_template import IpapTemplate
+from python_wrapper.ipap_template_codec import IpapTemplateCodec
 from foundation.singleton import Singleton
-lib = cdll.LoadLibrary('libipap.so')
 
 class IpapTemplateContainerSingleton(metaclass=Singleton):
 
     def __init__(self):
         self.obj = lib.ipap_template_container_new()
+        self.codecs = {}
+        # Wrappers of the templates added, the container keeps them so their native templates stay alive.
+        self.templates = {}
 
     def add_template(self, template : IpapTemplate):
+        self.templates[template.get_template_id()] = template.detach()
         lib.ipap_template_container_add_template(self.obj, template.obj)
+        self.codecs.pop(template.get_template_id(), None)
 
     def delete_all_templates(self):
         lib.ipap_template_container_delete_all_templates(self.obj)
+        self.templates = {}
+        self.codecs = {}
 
     def delete_template(self, templid : int):
-        lib.ipap_template_container_delete_template(self.obj, c_uint16(templid))
+        lib.ipap_template_container_delete_template(self.obj, templid)
+        self.templates.pop(templid, None)
+        self.codecs.pop(templid, None)
 
     def exists_template(self, templid : int):
-        exists_template = lib.ipap_template_container_exists_template
-        exists_template.restype = c_bool
-
-        return lib.ipap_template_container_exists_template(self.obj, c_uint16(templid))
+        return lib.ipap_template_container_exists_template(self.obj, templid)
 
     def get_num_templates(self) -> int:
-        get_num_templates = lib.ipap_template_container_get_num_templates
-        get_num_templates.restype = c_int
-
         return lib.ipap_template_container_get_num_templates(self.obj)
 
     def __del__(self):
         lib.ipap_template_container_destroy(self.obj)
 
     def get_template(self, templid: int) -> IpapTemplate:
-        obj = lib.ipap_template_container_get_template(self.obj, c_uint16(templid))
+        if templid in self.templates:
+            return self.templates[templid]
+
+        obj = lib.ipap_template_container_get_template(self.obj, templid)
         if obj:  # not null
             ipap_template = IpapTemplate(obj=obj)
             return ipap_template
         else:
             raise ValueError('Template {0} not found'.format(str(templid)))
 
+    def get_codec(self, templid: int, field_def) -> IpapTemplateCodec:
+        """
+        Gets the compiled encoder and decoder of a template, templates are compiled once.
+
+        :param templid: template id
+        :param field_def: function giving the field definition of an (eno, ftype) code, see IpapTemplateCodec.
+        :return: codec for the records of the template
+        """
+        codec = self.codecs.get(templid)
+        if codec is None:
+            codec = self.codecs[templid] = self.get_template(templid).compile(field_def)
+        return codec
+
 
 class IpapTemplateContainer:
 
     def __init__(self):
         self.obj = lib.ipap_template_container_new()
+        self.codecs = {}
+        # Wrappers of the templates added, the container keeps them so their native templates stay alive.
+        self.templates = {}
 
     def add_template(self, template : IpapTemplate):
+        self.templates[template.get_template_id()] = template.detach()
         lib.ipap_template_container_add_template(self.obj, template.obj)
+        self.codecs.pop(template.get_template_id(), None)
 
     def delete_all_templates(self):
         lib.ipap_template_container_delete_all_templates(self.obj)
+        self.templates = {}
+        self.codecs = {}
 
     def delete_template(self, templid : int):
-        lib.ipap_template_container_delete_template(self.obj, c_uint16(templid))
+        lib.ipap_template_container_delete_template(self.obj, templid)
+        self.templates.pop(templid, None)
+        self.codecs.pop(templid, None)
 
     def exists_template(self, templid : int)-> bool:
-        exists_template = lib.ipap_template_container_exists_template
-        exists_template.restype = c_bool
-
-        return lib.ipap_template_container_exists_template(self.obj, c_uint16(templid))
+        return lib.ipap_template_container_exists_template(self.obj, templid)
 
     def get_num_templates(self) -> int:
-        get_num_templates = lib.ipap_template_container_get_num_templates
-        get_num_templates.restype = c_int
-
         return lib.ipap_template_container_get_num_templates(self.obj)
 
     def __del__(self):
         lib.ipap_template_container_destroy(self.obj)
 
     def get_template(self, templid: int) -> IpapTemplate:
-        obj = lib.ipap_template_container_get_template(self.obj, c_uint16(templid))
+        if templid in self.templates:
+            return self.templates[templid]
+
+        obj = lib.ipap_template_container_get_template(self.obj, templid)
         if obj:  # not null
             ipap_template = IpapTemplate(obj=obj)
             return ipap_template
         else:
             raise ValueError('Template {0} not found'.format(str(templid)))
+
+    def get_codec(self, templid: int, field_def) -> IpapTemplateCodec:
+        """
+        Gets the compiled encoder and decoder of a template, templates are compiled once.
+
+        :param templid: template id
+        :param field_def: function giving the field definition of an (eno, ftype) code, see IpapTemplateCodec.
+        :return: codec for the records of the template
+        """
+        codec = self.codecs.get(templid)
+        if codec is None:
+            codec = self.codecs[templid] = self.get_template(templid).compile(field_def)
+        return codec
+
+
+if IPAP_BACKEND == PYTHON_BACKEND:
+    from python_wrapper.ipap_codec import IpapTemplateContainerSingleton
+    from python_wrapper.ipap_codec import IpapTemplateContainer
@@ -0,0 +1,27 @@
+from enum import Enum
+
+
+class TemplateType(Enum):
+    IPAP_INVALID_TEMPLATE = -1
+    IPAP_SETID_AUCTION_TEMPLATE = 0
+    IPAP_OPTNS_AUCTION_TEMPLATE = 1
+    IPAP_SETID_BID_OBJECT_TEMPLATE = 2
+    IPAP_OPTNS_BID_OBJECT_TEMPLATE = 3
+    IPAP_SETID_ASK_OBJECT_TEMPLATE = 4
+    IPAP_OPTNS_ASK_OBJECT_TEMPLATE = 5
+    IPAP_SETID_ALLOC_OBJECT_TEMPLATE = 6
+    IPAP_OPTNS_ALLOC_OBJECT_TEMPLATE = 7
+
+
+class UnknownField(Enum):
+    KNOWN = 0
+    UNKNOWN = 1
+
+
+class ObjectType(Enum):
+    IPAP_INVALID = -1
+    IPAP_AUCTION = 0
+    IPAP_BID = 1
+    IPAP_ASK = 2
+    IPAP_ALLOCATION = 3
+    IPAP_MAX_OBJECT_TYPE = 4
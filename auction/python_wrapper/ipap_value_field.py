@@ -1,17 +1,7 @@
-from ctypes import cdll
-from ctypes import c_int
-from ctypes import c_uint8
-from ctypes import c_uint16
-from ctypes import c_uint32
-from ctypes import c_uint64
-from ctypes import c_float
-from ctypes import c_double
-from ctypes import POINTER
-from ctypes import c_size_t
-from ctypes import c_char_p
-from ctypes import c_wchar_p
-from ctypes import pointer
-lib = cdll.LoadLibrary('libipap.so')
+from python_wrapper.ipap_lib import lib
+from python_wrapper.ipap_backend import IPAP_BACKEND
+from python_wrapper.ipap_backend import PYTHON_BACKEND
+
 
 class IpapValueField:
 
@@ -22,25 +12,25 @@ class IpapValueField:
             self.obj = lib.ipap_value_field_new()
 
     def set_value_uint8(self, value : int):
-        lib.ipap_value_field_set_value_int8(self.obj, c_uint8(value))
+        lib.ipap_value_field_set_value_int8(self.obj, value)
 
     def set_value_uint16(self, value :int):
-        lib.ipap_value_field_set_value_int16(self.obj, c_uint16(value))
+        lib.ipap_value_field_set_value_int16(self.obj, value)
 
     def set_value_uint32(self, value:int):
-        lib.ipap_value_field_set_value_int32(self.obj, c_uint32(value))
+        lib.ipap_value_field_set_value_int32(self.obj, value)
 
     def set_value_uint64(self, value:int):
-        lib.ipap_value_field_set_value_int64(self.obj, c_uint64(value))
+        lib.ipap_value_field_set_value_int64(self.obj, value)
 
     def set_value_float32(self, value):
-        lib.ipap_value_field_set_value_float32(self.obj, c_float(value))
+        lib.ipap_value_field_set_value_float32(self.obj, value)
 
     def set_value_double(self, value):
-        lib.ipap_value_field_set_value_float64(self.obj, c_double(value))
+        lib.ipap_value_field_set_value_float64(self.obj, value)
 
     def set_value_vchar(self, value: str, lenght: int):
-        lib.ipap_value_field_set_value_vchar(self.obj, c_char_p(value), c_int(lenght))
+        lib.ipap_value_field_set_value_vchar(self.obj, value, lenght)
 
     def get_value_uint8(self):
         return lib.ipap_value_field_get_value_int8(self.obj)
@@ -55,23 +45,14 @@ class IpapValueField:
         return lib.ipap_value_field_get_value_int64(self.obj)
 
     def get_value_float(self):
-        get_value_float = lib.ipap_value_field_get_value_float
-        get_value_float.restype = c_float
-
         value = lib.ipap_value_field_get_value_float(self.obj)
         return value
 
     def get_value_double(self):
-        get_value_double = lib.ipap_value_field_get_value_double
-        get_value_double.restype = c_double
-
         value = lib.ipap_value_field_get_value_double(self.obj)
         return value
 
     def get_value_vchar(self):
-        get_value_vchar = lib.ipap_value_field_get_value_vchar
-        get_value_vchar.restype = c_char_p
-
         # we restrict to length to remove the ending null character.
         lenght = lib.ipap_value_field_get_length(self.obj)
         value =  lib.ipap_value_field_get_value_vchar(self.obj)
@@ -81,4 +62,8 @@ class IpapValueField:
         return lib.ipap_value_field_get_length(self.obj)
 
     def print_value(self):
-        return lib.ipap_value_field_print(self.obj)
\ No newline at end of file
+        return lib.ipap_value_field_print(self.obj)
+
+
+if IPAP_BACKEND == PYTHON_BACKEND:
+    from python_wrapper.ipap_codec import IpapValueField
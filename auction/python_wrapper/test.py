@@ -5,17 +5,43 @@ from python_wrapper.ipap_field_key import IpapFieldKey
 from python_wrapper.ipap_field_container import IpapFieldContainer
 from python_wrapper.ipap_data_record import IpapDataRecord
 from python_wrapper.ipap_message import IpapMessage
+from python_wrapper.ipap_message_view import IpapMessageView
 
 from python_wrapper.ipap_template import IpapTemplate
 from python_wrapper.ipap_template import TemplateType
 from python_wrapper.ipap_template import UnknownField
 from python_wrapper.ipap_template import ObjectType
 from python_wrapper.ipap_template_container import IpapTemplateContainerSingleton
+from python_wrapper.ipap_template_container import IpapTemplateContainer
+from python_wrapper.ipap_lib import lib
+from python_wrapper import ipap_codec
+from python_wrapper import ipap_native
+from python_wrapper.ipap_float32 import float32_value
+from foundation.field_def_manager import FieldDefManager
 
 from ctypes import pointer
 import unittest
 
 
+def get_field_type(eno: int, ftype: int) -> str:
+    return FieldDefManager().get_field_by_code(eno, ftype)['type'].name
+
+
+def get_record_texts(ipap_message) -> list:
+    """
+    Gets the records of a python codec message with their values as the text written by their fields.
+    """
+    records = []
+    for pos in range(0, ipap_message.get_data_record_size()):
+        ipap_data_record = ipap_message.get_data_record_at_pos(pos)
+        template = ipap_message.get_template_object(ipap_data_record.get_template_id())
+        records.append([ipap_data_record.get_template_id(),
+                        [[field.get_eno(), field.get_type(),
+                          field.write_value(ipap_data_record.get_field(field.get_eno(), field.get_type()))]
+                         for field in template.get_fields()]])
+    return records
+
+
 class IpapFieldTypeTest(unittest.TestCase):
     """
     IpapFieldTypeTest
@@ -279,6 +305,23 @@ class TemplateContainerTest(unittest.TestCase):
         temp = self.template_container.get_template(_id)
         self.assertEqual(temp.get_template_id(),_id)
 
+    def test_add_borrowed_template(self):
+        field_container = IpapFieldContainer()
+        field_container.initialize_forward()
+        field_container.initialize_reverse()
+        buffer = IpapCodecTest.build_message(IpapMessage, IpapDataRecord, field_container).get_message_bytes()
+
+        template_container = IpapTemplateContainer()
+        with IpapMessage.from_buffer(buffer) as ipap_message:
+            template_id = ipap_message.get_template_list()[0]
+            template = ipap_message.get_template_object(template_id)
+            template_container.add_template(template)
+
+        # the container keeps the template usable once the message is released.
+        self.assertIs(template_container.get_template(template_id), template)
+        self.assertEqual(template_container.get_template(template_id).get_type(),
+                         TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE)
+
 
 class FieldContainerTest(unittest.TestCase):
     """
@@ -299,6 +342,18 @@ class FieldContainerTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             field = self.field_container.get_field(0, 30)
 
+    def test_interned_fields(self):
+        self.field_container.initialize_forward()
+        field = self.field_container.get_field(0, 32)
+        self.assertIs(self.field_container.get_field(0, 32), field)
+        self.assertIs(self.field_container.get_field_by_name('recordid'), field)
+        self.assertEqual(field.get_type(), 32)
+
+        # other containers share the same handles.
+        field_container = IpapFieldContainer()
+        field_container.initialize_forward()
+        self.assertIs(field_container.get_field(0, 32), field)
+
 
 class IpapDataRecordTest(unittest.TestCase):
     """
@@ -522,3 +577,312 @@ class IpapMessageTest(unittest.TestCase):
         str_msg = 'aqui estoy'
         with self.assertRaises(ValueError):
             ipap_message4 = IpapMessage(1, 1, True, str_msg)
+
+    def test_from_buffer(self):
+        self.ipap_message2.set_syn(True)
+        self.ipap_message2.set_seqno(300)
+        self.ipap_message2.output()
+
+        str_msg = self.ipap_message2.get_message()
+        buffer = str_msg.encode('latin-1')
+
+        ipap_message3 = IpapMessage.from_buffer(buffer)
+        self.assertEqual(ipap_message3.get_seqno(), 300)
+        self.assertEqual(ipap_message3.get_syn(), True)
+
+        ipap_message4 = IpapMessage.from_buffer(bytearray(buffer))
+        self.assertEqual(ipap_message4.get_seqno(), 300)
+
+        ipap_message5 = IpapMessage.from_buffer(memoryview(buffer))
+        self.assertEqual(ipap_message5.get_seqno(), 300)
+
+        with self.assertRaises(ValueError):
+            IpapMessage.from_buffer(b'aqui estoy')
+
+    def test_get_message_bytes(self):
+        self.ipap_message2.set_syn(True)
+        self.ipap_message2.set_seqno(300)
+
+        bytes_msg = self.ipap_message2.get_message_bytes()
+        self.assertIsInstance(bytes_msg, bytes)
+        self.assertEqual(bytes_msg.decode('latin-1'), self.ipap_message2.get_message())
+
+        ipap_message3 = IpapMessage.from_buffer(bytes_msg)
+        self.assertEqual(ipap_message3.get_seqno(), 300)
+
+    def test_extract_records(self):
+        field_container = IpapFieldContainer()
+        field_container.initialize_forward()
+        field_container.initialize_reverse()
+
+        template_id = self.ipap_message.new_data_template(10, TemplateType.IPAP_SETID_AUCTION_TEMPLATE)
+        self.ipap_message.add_field(template_id, 0, 32)
+        self.ipap_message.add_field(template_id, 0, 33)
+
+        for i in range(0, 3):
+            ipap_data_record = IpapDataRecord(templ_id=template_id)
+            value = "record_{0}".format(str(i))
+            field = field_container.get_field(0, 32)
+            ipap_data_record.insert_field(0, 32, field.get_ipap_field_value_string(value.encode('ascii')))
+            field = field_container.get_field(0, 33)
+            ipap_data_record.insert_field(0, 33, field.get_ipap_field_value_double(i + 0.5))
+            self.ipap_message.include_data(template_id, ipap_data_record)
+
+        records = self.ipap_message.extract_records(field_type=get_field_type)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[1], (template_id, {(0, 32): "record_1", (0, 33): 1.5}))
+
+        columns = self.ipap_message.extract_records(template_id, columnar=True, field_type=get_field_type)
+        self.assertEqual(columns[(0, 32)], ["record_0", "record_1", "record_2"])
+        self.assertEqual(columns[(0, 33)], [0.5, 1.5, 2.5])
+
+        self.assertEqual(self.ipap_message.extract_records(template_id + 1, field_type=get_field_type), [])
+
+        with self.assertRaises(ValueError):
+            self.ipap_message.extract_records(columnar=True)
+
+
+class IpapCodecTest(unittest.TestCase):
+    """
+    Checks the python codec against the native library.
+    """
+
+    @staticmethod
+    def build_message(message_class, record_class, field_container):
+        ipap_message = message_class(1, IpapMessage.IPAP_VERSION, True)
+        template_id = ipap_message.new_data_template(10, TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE)
+        ipap_message.add_field(template_id, 0, 32)
+        ipap_message.add_field(template_id, 0, 33)
+
+        for i in range(0, 3):
+            ipap_data_record = record_class(templ_id=template_id)
+            value = "record_{0}".format(str(i))
+            field = field_container.get_field(0, 32)
+            ipap_data_record.insert_field(0, 32, field.get_ipap_field_value_string(value.encode('ascii')))
+            field = field_container.get_field(0, 33)
+            ipap_data_record.insert_field(0, 33, field.get_ipap_field_value_double(i + 0.5))
+            ipap_message.include_data(template_id, ipap_data_record)
+
+        ipap_message.set_syn(True)
+        ipap_message.set_seqno(100)
+        return ipap_message
+
+    def setUp(self):
+        self.field_container = ipap_codec.IpapFieldContainer()
+        self.field_container.initialize_forward()
+        self.field_container.initialize_reverse()
+        self.ipap_message = self.build_message(ipap_codec.IpapMessage, ipap_codec.IpapDataRecord,
+                                               self.field_container)
+
+    def test_round_trip(self):
+        ipap_message = ipap_codec.IpapMessage.from_buffer(self.ipap_message.get_message_bytes())
+        self.assertEqual(ipap_message.get_syn(), True)
+        self.assertEqual(ipap_message.get_ack(), False)
+        self.assertEqual(ipap_message.get_seqno(), 100)
+        self.assertEqual(ipap_message.get_template_list(), self.ipap_message.get_template_list())
+        self.assertEqual(ipap_message.extract_records(field_type=get_field_type),
+                         self.ipap_message.extract_records(field_type=get_field_type))
+        self.assertEqual(ipap_message.get_types().is_bidding_message(), True)
+
+        # text frames
+        ipap_message = ipap_codec.IpapMessage(1, IpapMessage.IPAP_VERSION, True, self.ipap_message.get_message())
+        self.assertEqual(ipap_message.extract_records(field_type=get_field_type),
+                         self.ipap_message.extract_records(field_type=get_field_type))
+
+    def test_invalid_message(self):
+        buffer = self.ipap_message.get_message_bytes()
+        with self.assertRaises(ValueError):
+            ipap_codec.IpapMessage.from_buffer(buffer[:-1])
+
+        with self.assertRaises(ValueError):
+            ipap_codec.IpapMessage.from_buffer(b'not a message')
+
+    def test_float_fields(self):
+        self.assertEqual(float32_value(0.10000000149011612), 0.1)
+        self.assertEqual(float32_value(0.5), 0.5)
+
+        ipap_message = ipap_codec.IpapMessage(1, IpapMessage.IPAP_VERSION, True)
+        template_id = ipap_message.new_data_template(10, TemplateType.IPAP_SETID_AUCTION_TEMPLATE)
+        ipap_message.add_field(template_id, 0, 38)
+        field = self.field_container.get_field(0, 38)
+        ipap_data_record = ipap_codec.IpapDataRecord(templ_id=template_id)
+        ipap_data_record.insert_field(0, 38, field.parse("0.1"))
+        ipap_message.include_data(template_id, ipap_data_record)
+
+        # values read from the 32 bit float keep the text they were written with.
+        ipap_message = ipap_codec.IpapMessage.from_buffer(ipap_message.get_message_bytes())
+        self.assertEqual(ipap_message.extract_records(field_type=get_field_type)[0][1][(0, 38)], 0.1)
+        value = ipap_message.get_data_record_at_pos(0).get_field(0, 38)
+        self.assertEqual(field.write_value(value), "0.1")
+
+    def test_mandatory_fields(self):
+        ipap_template = ipap_codec.IpapTemplate()
+        fields = ipap_template.get_template_type_mandatory_field(TemplateType.IPAP_SETID_AUCTION_TEMPLATE)
+        self.assertEqual(len(fields), 12)
+
+    def test_builtin_fields(self):
+        field = self.field_container.get_field(0, 30)
+        self.assertEqual(field.get_field_name(), b"endMilliSeconds")
+
+        ipap_template = ipap_codec.IpapTemplate()
+        codes = [(field_key.get_eno(), field_key.get_ftype()) for field_key in
+                 ipap_template.get_template_type_mandatory_field(TemplateType.IPAP_SETID_AUCTION_TEMPLATE)]
+        self.assertEqual(codes, ipap_codec.get_tables()['mandatory_fields'][TemplateType.IPAP_SETID_AUCTION_TEMPLATE])
+
+    def test_wire_compatible(self):
+        # the tables written in the codec were never checked against libipap.
+        checked = ipap_native.load_library() is not None or ipap_native.load_fixture() is not None
+        self.assertEqual(ipap_codec.is_wire_compatible(), checked)
+
+    def test_recipes(self):
+        # messages of the recipes round trip through the python codec.
+        for recipe in ipap_native.get_recipes(ipap_codec.get_tables()):
+            ipap_message = ipap_native.build_message(recipe, ipap_codec.IpapMessage, ipap_codec.IpapDataRecord,
+                                                     self.field_container)
+            decoded = ipap_codec.IpapMessage.from_buffer(ipap_message.get_message_bytes())
+            self.assertEqual(decoded.get_message_bytes(), ipap_message.get_message_bytes())
+            self.assertEqual(get_record_texts(decoded), get_record_texts(ipap_message))
+
+    @unittest.skipUnless(lib is not None, "libipap is not loaded")
+    def test_native_conformance(self):
+        field_container = IpapFieldContainer()
+        field_container.initialize_forward()
+        field_container.initialize_reverse()
+        native_message = self.build_message(IpapMessage, IpapDataRecord, field_container)
+
+        # Messages encoded by one backend are decoded by the other.
+        ipap_message = ipap_codec.IpapMessage.from_buffer(native_message.get_message_bytes())
+        self.assertEqual(ipap_message.extract_records(field_type=get_field_type),
+                         native_message.extract_records(field_type=get_field_type))
+
+        ipap_message = IpapMessage.from_buffer(self.ipap_message.get_message_bytes())
+        self.assertEqual(ipap_message.get_seqno(), 100)
+        self.assertEqual(ipap_message.extract_records(field_type=get_field_type),
+                         self.ipap_message.extract_records(field_type=get_field_type))
+
+        # the codec uses the tables of the library when it is loaded.
+        self.assertEqual(ipap_codec.get_tables(), ipap_native.read_tables(lib, FieldDefManager().get_field_defs()))
+
+    def test_compile(self):
+        ipap_message = ipap_codec.IpapMessage(1, IpapMessage.IPAP_VERSION, True)
+        template_id = ipap_message.new_data_template(10, TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE)
+        for ftype in [24, 25, 32, 50, 26, 33]:
+            ipap_message.add_field(template_id, 0, ftype)
+
+        template_container = ipap_codec.IpapTemplateContainer()
+        template_container.add_template(ipap_message.get_template_object(template_id))
+        codec = template_container.get_codec(template_id, FieldDefManager().get_field_by_code)
+        self.assertIs(template_container.get_codec(template_id, FieldDefManager().get_field_by_code), codec)
+        self.assertEqual(codec.is_mandatory('status'), True)
+        self.assertEqual(codec.is_mandatory('quantity'), False)
+
+        values = {'auctionid': 'auction_1', 'biddingobjectid': 'bid_1', 'recordid': 'record_1',
+                  'status': 1, 'biddingobjecttype': 1, 'quantity': '2.5'}
+        ipap_message.include_data(template_id, codec.encode(values))
+
+        ipap_message = ipap_codec.IpapMessage.from_buffer(ipap_message.get_message_bytes())
+        records = ipap_message.extract_records(template_id, field_type=get_field_type)
+        decoded = codec.decode(records[0][1])
+        self.assertEqual(decoded['auctionid'][1], 'auction_1')
+        self.assertEqual(decoded['quantity'][1], 2.5)
+        self.assertEqual(decoded['status'][1], 1)
+
+        with self.assertRaises(ValueError):
+            codec.encode({'unitprice': 1.0})
+
+        template_container.delete_template(template_id)
+        with self.assertRaises(ValueError):
+            template_container.get_codec(template_id, FieldDefManager().get_field_by_code)
+
+    def test_message_view(self):
+        field_container = IpapFieldContainer()
+        field_container.initialize_forward()
+        field_container.initialize_reverse()
+        ipap_message = self.build_message(IpapMessage, IpapDataRecord, field_container)
+
+        ipap_message_view = IpapMessageView(ipap_message.get_message_bytes())
+        self.assertEqual(ipap_message_view.get_syn(), True)
+        self.assertEqual(ipap_message_view.get_ack(), False)
+        self.assertEqual(ipap_message_view.get_seqno(), 100)
+        self.assertEqual(ipap_message_view.get_types().is_bidding_message(), True)
+        self.assertEqual(ipap_message_view.get_types().is_ask_message(), False)
+        self.assertEqual(ipap_message_view.is_decoded(), False)
+
+        # records are decoded when they are requested.
+        self.assertEqual(ipap_message_view.extract_records(field_type=get_field_type),
+                         ipap_message.extract_records(field_type=get_field_type))
+        self.assertEqual(ipap_message_view.is_decoded(), True)
+
+        with self.assertRaises(ValueError):
+            IpapMessageView(b'not a message')
+
+    def test_message_view_record_sets(self):
+        buffer = self.ipap_message.get_message_bytes()
+        ipap_codec.read_header(buffer)
+
+        # the last record set loses its last byte, the set and message lengths still match.
+        set_pos = ipap_codec.HEADER.size
+        while set_pos + ipap_codec.SET_HEADER.unpack_from(buffer, set_pos)[1] < len(buffer):
+            set_pos = set_pos + ipap_codec.SET_HEADER.unpack_from(buffer, set_pos)[1]
+        set_id, set_length = ipap_codec.SET_HEADER.unpack_from(buffer, set_pos)
+        malformed = bytearray(buffer[:-1])
+        ipap_codec.SET_HEADER.pack_into(malformed, set_pos, set_id, set_length - 1)
+        header = list(ipap_codec.HEADER.unpack_from(buffer, 0))
+        header[2] = len(malformed)
+        ipap_codec.HEADER.pack_into(malformed, 0, *header)
+
+        with self.assertRaises(ValueError):
+            ipap_codec.IpapMessage.from_buffer(bytes(malformed))
+        with self.assertRaises(ValueError):
+            IpapMessageView(bytes(malformed))
+
+    def test_message_scope(self):
+        field_container = IpapFieldContainer()
+        field_container.initialize_forward()
+        field_container.initialize_reverse()
+        buffer = self.build_message(IpapMessage, IpapDataRecord, field_container).get_message_bytes()
+
+        with IpapMessage.from_buffer(buffer) as ipap_message:
+            ipap_data_record = ipap_message.get_data_record_at_pos(0)
+            self.assertIs(ipap_message.get_data_record_at_pos(0), ipap_data_record)
+            self.assertEqual(ipap_data_record.get_num_fields(), 2)
+            template = ipap_message.get_template_object(ipap_data_record.get_template_id())
+            self.assertIs(template.detach(), template)
+
+        # detached objects outlive the message.
+        self.assertEqual(template.get_type(), TemplateType.IPAP_SETID_BID_OBJECT_TEMPLATE)
+
+        with IpapMessageView(buffer) as ipap_message_view:
+            self.assertEqual(len(ipap_message_view.extract_records(field_type=get_field_type)), 3)
+        self.assertEqual(ipap_message_view.get_seqno(), 100)
+        self.assertEqual(ipap_message_view.get_types().is_bidding_message(), True)
+
+
+@unittest.skipUnless(ipap_native.load_fixture() is not None, "the libipap fixture was not recorded")
+class IpapNativeFixtureTest(unittest.TestCase):
+    """
+    Checks the python codec byte for byte against the messages recorded from libipap, see ipap_native.
+    """
+
+    def setUp(self):
+        self.fixture = ipap_native.load_fixture()
+        self.field_container = ipap_codec.IpapFieldContainer()
+        self.field_container.initialize_forward()
+        self.field_container.initialize_reverse()
+
+    def test_tables(self):
+        self.assertEqual(ipap_native.dump_tables(ipap_codec.get_tables()), self.fixture['tables'])
+
+    def test_decode(self):
+        for recorded in self.fixture['messages']:
+            ipap_message = ipap_codec.IpapMessage.from_buffer(bytes.fromhex(recorded['message']))
+            self.assertEqual(get_record_texts(ipap_message), recorded['records'])
+
+    def test_encode(self):
+        for recorded in self.fixture['messages']:
+            message = bytes.fromhex(recorded['message'])
+            ipap_message = ipap_native.build_message(recorded['recipe'], ipap_codec.IpapMessage,
+                                                     ipap_codec.IpapDataRecord, self.field_container)
+            # the export time is the time the library wrote the message.
+            ipap_message.export_time = ipap_codec.HEADER.unpack_from(message, 0)[3]
+            self.assertEqual(ipap_message.get_message_bytes().hex(), recorded['message'])